@@ -0,0 +1,119 @@
+"""
+Benchmark identifiers with cached hashes and root sources against the dataclasses they replaced,
+  which hashed and walked the whole chain of nested identifiers on every dict operation and
+  find_source call. Identifiers are created, added to a dict, looked up and resolved to their
+  source.
+
+Usage: python benchmarks/bench_identifiers.py [identifiers] [depth]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from src.data.identifiers.identifier import SourceIdentifier, AnalysisIdentifier
+
+@dataclass(frozen=True)
+class LegacySourceIdentifier():
+    """
+    The previous SourceIdentifier, hashed on every call.
+    """
+    start_ts: int
+    end_ts: int
+    type: str
+
+    def __hash__(self) -> int:
+        return hash((hash((self.start_ts, self.end_ts, self.type)), self.type))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, LegacySourceIdentifier) and self.start_ts == other.start_ts and self.end_ts == other.end_ts and self.type == other.type
+
+@dataclass(frozen=True)
+class LegacyAnalysisIdentifier():
+    """
+    The previous AnalysisIdentifier, the hash and find_source recurse through the chain.
+    """
+    on: object
+    analysis: str
+
+    def __hash__(self) -> int:
+        return hash((self.on, self.analysis))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, LegacyAnalysisIdentifier) and self.on == other.on and self.analysis == other.analysis
+
+    def find_source(self):
+        on = self.on
+        while(on is not None):
+            if(isinstance(on, LegacySourceIdentifier)):
+                return on
+            on = on.on
+        return None
+
+def make_identifiers(source_class, analysis_class, count, depth):
+    """
+    count identifiers, each an analysis nested depth times on its own source. Analysis names are
+      built at runtime like the names read from settings and config.
+    """
+    identifiers = []
+    for i in range(count):
+        identifier = source_class(i * 3600, (i + 1) * 3600 - 1, "".join(["c", "pu"]))
+        for level in range(depth):
+            identifier = analysis_class(identifier, "".join(["cpu", "hours", "total" * level]))
+        identifiers.append(identifier)
+    return identifiers
+
+def run(source_class, analysis_class, count, depth):
+    """
+    Create the identifiers, add them to a dict, look each up and find its source.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    identifiers = make_identifiers(source_class, analysis_class, count, depth)
+    timings["create"] = time.perf_counter() - start
+
+    tracemalloc.start()
+    make_identifiers(source_class, analysis_class, count, depth)
+    memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # A dict like the DataRepository's, the legacy identifiers can't be added to a DataRepository
+    start = time.perf_counter()
+    data = {}
+    for identifier in identifiers:
+        data[identifier] = None
+    timings["add"] = time.perf_counter() - start
+
+    contains = data.__contains__
+    start = time.perf_counter()
+    found = sum(contains(identifier) for identifier in identifiers)
+    timings["lookup"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sources = [(source.start_ts, source.end_ts, source.type) for source in (identifier.find_source() for identifier in identifiers)]
+    timings["find_source"] = time.perf_counter() - start
+
+    return (found, sources), timings, memory
+
+if(__name__ == "__main__"):
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    print(f"{count} identifiers nested {depth} analyses deep.")
+
+    legacy_result, legacy_timings, legacy_memory = run(LegacySourceIdentifier, LegacyAnalysisIdentifier, count, depth)
+    result, timings, memory = run(SourceIdentifier, AnalysisIdentifier, count, depth)
+
+    print(f"{'':12} {'legacy':>8} {'cached':>8}")
+    for name in timings.keys():
+        print(f"{name:12} {legacy_timings[name]:7.3f}s {timings[name]:7.3f}s")
+    print(f"{'memory':12} {legacy_memory/2**20:6.1f}MB {memory/2**20:6.1f}MB")
+
+    assert result == legacy_result
+    print(f"Outputs are identical, lookups {legacy_timings['lookup']/timings['lookup']:.1f}x faster, find_source {legacy_timings['find_source']/timings['find_source']:.1f}x faster.")
@@ -0,0 +1,98 @@
+"""
+Benchmark _infer_times against the previous row by row implementation on a month of hourly rows
+  with many gaps.
+
+Usage: python benchmarks/bench_infer_times.py [columns] [gaps]
+"""
+
+import math
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from src.data.ingest.promql.query_ingest import _infer_times
+from src.utils.timeutils import to_unix_ts, from_unix_ts
+from src.data.ingest.grafana_df_analyzer import format_time_column
+
+START_TS = 1740816000 # 3/1/2025 0:00
+STEP = 3600
+STEPS = 744
+
+def legacy_infer_times(df: pd.DataFrame, step):
+    """
+    The row by row implementation _infer_times replaced.
+    """
+    columns_excluding_time = list(df.columns)
+    columns_excluding_time.remove("Time")
+
+    i = 0
+    while i < len(df["Time"]) - 1:
+
+        time = to_unix_ts(df["Time"][i])
+        next_time = to_unix_ts(df["Time"][i+1])
+        time_offset = next_time-time
+
+        if(time_offset <= step):
+            i += 1
+            continue
+
+        rows_to_add = math.floor(time_offset/step)
+
+        times_arr = [from_unix_ts(time + j*step) for j in range(1, rows_to_add)]
+        times_dict = { "Time": times_arr }
+
+        rows_arr = [float('NaN')]*len(times_arr)
+        rows_dict = { key: rows_arr for key in columns_excluding_time }
+
+        final_df = times_dict | rows_dict
+
+        rows_df = pd.DataFrame(final_df)
+
+        df = pd.concat([df.iloc[:i+1], rows_df, df.iloc[i+1:]]).reset_index(drop=True)
+
+        i += rows_to_add
+
+    return df
+
+def make_df(column_count, gap_count, seed=0):
+    """
+    A month of hourly rows with gap_count random hours removed, gaps can be next to each other.
+    """
+    rng = np.random.default_rng(seed)
+    missing = rng.choice(np.arange(1, STEPS - 1), size=gap_count, replace=False)
+    rows = np.setdiff1d(np.arange(STEPS), missing)
+
+    values = rng.random((len(rows), column_count))
+    values[values < 0.3] = np.nan
+
+    df = pd.DataFrame(values, columns=[f'{{uid="uid-{i:06d}"}}' for i in range(column_count)])
+    df.insert(0, "Time", START_TS + rows * STEP)
+    return df
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+if(__name__ == "__main__"):
+    column_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    gap_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    print(f"Generating {STEPS} steps x {column_count} columns with {gap_count} missing rows...")
+    df = make_df(column_count, gap_count)
+
+    new_df, new_time = time_call(_infer_times, df.copy(), STEP)
+    print(f"_infer_times:        {new_time:.3f}s")
+
+    # The legacy implementation parsed and formatted times
+    old_df, old_time = time_call(legacy_infer_times, format_time_column(df), STEP)
+    print(f"legacy _infer_times: {old_time:.3f}s")
+
+    pd.testing.assert_frame_equal(format_time_column(new_df), old_df)
+    print(f"Outputs are identical, {old_time/new_time:.1f}x speedup.")
@@ -1,7 +1,10 @@
+from functools import partial
+
 from src.program_data.program_data import ProgramData
 from src.analysis.implementations.hours import *
 from src.analysis.implementations.jobs import *
 from src.analysis.implementations.meta_analysis import meta_analyze
+from src.analysis.implementations.fused import FUSED_ANALYSES, get_fused_result
 from src.data.data_repository import DataRepository
 from src.data.identifiers.identifier import Identifier, AnalysisIdentifier, SourceIdentifier
 
@@ -35,6 +38,15 @@ def analyze(prog_data: ProgramData):
 
 	print(f"Analysis perform order: {", ".join(analyses_to_perform)}")
 
+	# With fused analysis the hours, jobs and totals analyses of each source are computed together
+	#   the first time one of them is performed, the rest are taken from fused_results.
+	fused = prog_data.get_option("analysis.fused", "fused", False)
+	fused_results = {}
+
+	# With lazy analysis each result is added as a lazy entry that's only computed when it's first
+	#   read, by a later analysis that requires it, a summary, visualization or saver.
+	lazy = prog_data.get_option("analysis.lazy", "lazy", False)
+
 	# Fulfilled analyses is used to ensure all analysis that were requested were performed. All
 	#   analyses may not be fulfilled if the user provides an input directory without all the
 	#   required csv files. For example, the user requests gpuhours but only provides cpu dfs.
@@ -65,27 +77,37 @@ def analyze(prog_data: ProgramData):
 			#   src/analysis/implementations/analyze_hours_byns.
 			analysis_method = analysis_options_methods[analysis]
 
-			print(f"  Performing {analysis} on {len(identifiers)} target(s).")
+			is_fused_analysis = fused and analysis in FUSED_ANALYSES
+
+			print(f"  Performing {analysis} on {len(identifiers)} target(s){" (fused)" if is_fused_analysis else ""}{" (lazy)" if lazy else ""}.")
 
 			for identifier in identifiers:
-				analysis_result = analysis_method(identifier, data_repo)
+				if(is_fused_analysis):
+					perform = partial(get_fused_result, identifier, analysis, analyses_to_perform, data_repo, fused_results)
+				else:
+					perform = partial(analysis_method, identifier, data_repo)
 
 				# Generate identifier and add to repository.
 				analysis_identifier = AnalysisIdentifier(identifier, analysis)
-				data_repo.add(analysis_identifier, analysis_result)
+				if(lazy):
+					data_repo.add_lazy(analysis_identifier, perform)
+				else:
+					data_repo.add(analysis_identifier, perform())
 
 			fulfilled_analyses.add(analysis)
 
 		else:
 			# Perform a meta analysis.
 
-			print(f"  Performing {analysis}.")
-
-			analysis_result, analysis_metadata = meta_analyze(analysis_settings["requires"], data_repo)
+			print(f"  Performing {analysis}{" (lazy)" if lazy else ""}.")
 
 			# Generate identifier and add to repository.
 			analysis_identifier = AnalysisIdentifier(None, analysis)
-			data_repo.add(analysis_identifier, analysis_result, analysis_metadata)
+			if(lazy):
+				data_repo.add_lazy(analysis_identifier, partial(_perform_meta_analysis, analysis_identifier, analysis_settings["requires"], data_repo))
+			else:
+				analysis_result, analysis_metadata = meta_analyze(analysis_settings["requires"], data_repo)
+				data_repo.add(analysis_identifier, analysis_result, analysis_metadata)
 
 			fulfilled_analyses.add(analysis)     			
 				
@@ -96,6 +118,14 @@ def analyze(prog_data: ProgramData):
 	
 	prog_data.data_repo = data_repo
 
+def _perform_meta_analysis(analysis_identifier: AnalysisIdentifier, requires: list, data_repo: DataRepository):
+	"""
+	The thunk of a lazy meta analysis, performs the meta analysis and stores its metadata.
+	"""
+	analysis_result, analysis_metadata = meta_analyze(requires, data_repo)
+	data_repo.update_metadata(analysis_identifier, analysis_metadata)
+	return analysis_result
+
 def get_analysis_order(prog_data: ProgramData):
 	"""
 	Given the list of analyses to perform, re-order it such that analyses with dependencies are
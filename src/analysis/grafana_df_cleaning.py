@@ -1,4 +1,7 @@
-from src.data.ingest.grafana_df_analyzer import _extract_column_data
+import numpy as np
+import pandas as pd
+
+from src.data.labels import label_table
 
 def has_time_column(df):
     return df.columns[0]=="Time"
@@ -15,23 +18,12 @@ def clear_duplicate_uids(df):
     Args:
     df (Pandas DataFrame): The DataFrame to deduplicate
     """
-    uids = set()
-
-    if(has_time_column(df)):
-        df = clear_time_column(df)
-
-    def is_not_duplicate(col_name):
-        nonlocal uids
-        col_data = _extract_column_data(col_name)
-        uid = col_data['uid']
-        if(uid in uids):
-            return False
-        else:
-            uids.add(uid)
-            return True
+    positions = _value_positions(df)
+    uids = label_table(df).require("uid", positions)
 
-    df_included_columns = [col_name for col_name in df.columns if is_not_duplicate(col_name)]
-    return df[df_included_columns]
+    # Keep the first column of each uid
+    is_duplicate = pd.Index(uids).duplicated(keep="first")
+    return df.iloc[:, positions[~is_duplicate]]
 
 def clear_blacklisted_uids(df, blacklist):
     """
@@ -42,8 +34,14 @@ def clear_blacklisted_uids(df, blacklist):
     df (Pandas DataFrame): The DataFrame to deduplicate
     blacklist (list): The list of uids to not include in the output DataFrame.
     """
-    if(has_time_column(df)):
-        df = clear_time_column(df)
+    positions = _value_positions(df)
+    uids = label_table(df).require("uid", positions)
 
-    df_included_columns = [col_name for col_name in df.columns if _extract_column_data(col_name)['uid'] not in blacklist]
-    return df[df_included_columns]
\ No newline at end of file
+    is_blacklisted = pd.Index(uids).isin(list(blacklist))
+    return df.iloc[:, positions[~is_blacklisted]]
+
+def _value_positions(df):
+    """
+    The positions of every column in the DataFrame except for the Time column.
+    """
+    return np.arange(1 if has_time_column(df) else 0, df.shape[1])
\ No newline at end of file
@@ -0,0 +1,85 @@
+import numpy as np
+
+from src.analysis.implementations.hours import _hours_byns, _hours_total, _analyze_available_hours_ondf
+from src.analysis.implementations.jobs import _gpu_job_uids, _jobs_keep, _jobs_byns
+from src.data.data_repository import DataRepository
+from src.data.identifiers.identifier import Identifier, SourceIdentifier
+
+# The analyses the fused kernel performs, these all read a single source DataFrame (or results of
+#   it) and share the namespace codes and column sums of its views
+FUSED_ANALYSES = {
+    "cpuhours", "cpuhourstotal", "cpuhoursavailable", "cpujobs", "cpujobstotal",
+    "gpuhours", "gpuhourstotal", "gpuhoursavailable", "gpujobs", "gpujobstotal"
+}
+
+def fused_analyze(identifier: SourceIdentifier, data_repo: DataRepository, analyses: list) -> dict:
+    """
+    Perform every hours, jobs and totals analysis of a source DataFrame in one pass. The source is
+        reduced to its namespace codes, column sums and job mask once and every requested result
+        is derived from them, the results are identical to the individual analyses.
+
+    Args:
+        identifier (SourceIdentifier): The identifier for the Grafana DataFrame.
+        data_repo (DataRepository): The DataRepository holding the DataFrame.
+        analyses (list[str]): The analyses being performed, only the fused analyses of the
+            DataFrame's type are computed.
+    Returns:
+        dict[str, object]: The result of each computed analysis by name.
+    Raises:
+        Exception: The cpu jobs' corresponding GPU DataFrame is missing or the total hours exceed
+            the available hours, see the individual analyses.
+    """
+    source_type = identifier.type
+    wanted = set(analysis[len(source_type):] for analysis in analyses if analysis in FUSED_ANALYSES and analysis.startswith(source_type))
+
+    df = data_repo.get_data(identifier)
+    views = data_repo.get_views(identifier)
+    namespace_codes, namespaces = views.namespace_codes
+
+    results = {}
+
+    if(len(wanted & {"hours", "hourstotal"}) > 0):
+        hours_df = _hours_byns(namespace_codes, namespaces, views.column_sums)
+        results["hours"] = hours_df
+
+    if(len(wanted & {"hoursavailable", "hourstotal"}) > 0):
+        results["hoursavailable"] = _analyze_available_hours_ondf(df, source_type, identifier.start_ts, identifier.end_ts, views)
+
+    if("hourstotal" in wanted):
+        results["hourstotal"] = _hours_total(hours_df, results["hoursavailable"])
+
+    if(len(wanted & {"jobs", "jobstotal"}) > 0):
+        # Cpu jobs are cpu only jobs, the jobs of the gpu DataFrame are blacklisted
+        blacklisted_uuids = _gpu_job_uids(identifier, data_repo) if source_type == "cpu" else None
+        jobs_df = _jobs_byns(namespace_codes, namespaces, _jobs_keep(views, blacklisted_uuids))
+        results["jobs"] = jobs_df
+
+    if("jobstotal" in wanted):
+        results["jobstotal"] = jobs_df['Count'].sum()
+
+    return {source_type + analysis: result for analysis, result in results.items() if analysis in wanted}
+
+def get_fused_result(identifier: Identifier, analysis: str, analyses: list, data_repo: DataRepository, fused_results: dict) -> object:
+    """
+    Get the result of a fused analysis, running the fused kernel on the identifier's source the
+        first time one of its analyses is requested.
+
+    Args:
+        identifier (Identifier): The identifier the analysis is performed on, a SourceIdentifier
+            or an AnalysisIdentifier of one.
+        analysis (str): The analysis, must be in FUSED_ANALYSES.
+        analyses (list[str]): The analyses being performed.
+        data_repo (DataRepository): The DataRepository holding the source DataFrame.
+        fused_results (dict): The pending results by SourceIdentifier, filled and consumed by this
+            method.
+    Returns:
+        object: The result of the analysis.
+    """
+    source_identifier = identifier if isinstance(identifier, SourceIdentifier) else identifier.find_source()
+
+    if(source_identifier not in fused_results.keys()):
+        fused_results[source_identifier] = fused_analyze(source_identifier, data_repo, analyses)
+
+    # Results are only needed once, popping them frees the kernel's copy after it's in the
+    #   DataRepository
+    return fused_results[source_identifier].pop(analysis)
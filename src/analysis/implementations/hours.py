@@ -1,8 +1,10 @@
 # This code is repackaged from Tide2.ipynb in https://github.com/SDSU-Research-CI/rci-helpful-scripts
+import numpy as np
 import pandas as pd
 
 from src.data.data_repository import DataRepository
-from src.analysis.grafana_df_cleaning import has_time_column, clear_time_column, _extract_column_data
+from src.analysis.grafana_df_cleaning import has_time_column, clear_time_column
+from src.data.source_views import SourceViews
 from src.data.ingest.grafana_df_analyzer import get_period
 from src.program_data.settings import settings
 from src.data.identifiers.identifier import *
@@ -20,33 +22,44 @@ def analyze_hours_byns(identifier, data_repo: DataRepository):
 	"""
 
 	df = data_repo.get_data(identifier)
-	return _analyze_hours_byns_ondf(df)
+	return _analyze_hours_byns_ondf(df, data_repo.get_views(identifier))
 
-def _analyze_hours_byns_ondf(df):
+def _analyze_hours_byns_ondf(df, views: SourceViews = None):
 	"""
 	Analyze hours by namespace.
 
 	Args:
 		df (pd.DataFrame): The Grafana DataFrame to analyze
+		views (SourceViews): The shared views of the DataFrame, created if None.
 	Returns:
 		pd.DataFrame: The result DataFrame with columns [Namespace, Hours].    
 	"""
 
-	if(has_time_column(df)):
-		df = clear_time_column(df)
+	if(views is None):
+		views = SourceViews(df)
 
-	# Extract namespaces from column names, excluding the first since that's the Time column
-	namespaces = df.columns.str.extract(r'namespace="([^"]+)"')[0]
+	namespace_codes, namespaces = views.namespace_codes
+	return _hours_byns(namespace_codes, namespaces, views.column_sums)
 
-	# Calculate the sum for each namespace
-	namespace_totals = {}
-	for namespace in namespaces.unique():
-		namespace_df = df.filter(regex=f'namespace="{namespace}"', axis=1)
+def _hours_byns(namespace_codes, namespaces, column_sums):
+	"""
+	Sum the hours of each namespace from the sums of a DataFrame's columns.
 
-		namespace_total = namespace_df.sum(axis=1).sum()
-		namespace_totals[namespace] = namespace_total
+	Args:
+		namespace_codes (np.ndarray): The namespace code of each column, -1 for columns without
+			a namespace.
+		namespaces (np.ndarray): The namespace of each code.
+		column_sums (np.ndarray): The sum of each column.
+	Returns:
+		pd.DataFrame: The result DataFrame with columns [Namespace, Hours].
+	"""
 
-	namespace_totals_df = pd.DataFrame(list(namespace_totals.items()), columns=["Namespace", "Hours"])
+	# Calculate the sum for each namespace by adding the column sums into their namespace's bin, a
+	#   single pass no matter how many namespaces there are
+	has_namespace = namespace_codes >= 0
+	namespace_hours = np.bincount(namespace_codes[has_namespace], weights=column_sums[has_namespace], minlength=len(namespaces))
+
+	namespace_totals_df = pd.DataFrame({"Namespace": namespaces, "Hours": namespace_hours})
 
 	# Drop NA and 0 values
 	namespace_totals_df.dropna(inplace=True)
@@ -70,12 +83,27 @@ def analyze_hours_total(identifier, data_repo: DataRepository):
 
 	# Retrieve the corresponding analysis thats already been performed
 	df = data_repo.get_data(identifier)
-	total_hours = df['Hours'].sum()
 
 	src_id = identifier.find_source()
 	avail_hrs_analysis_id = AnalysisIdentifier(src_id, src_id.type + "hoursavailable")
 	avail_hrs = data_repo.get_data(avail_hrs_analysis_id)
 
+	return _hours_total(df, avail_hrs)
+
+def _hours_total(hours_df, avail_hrs):
+	"""
+	Sum the Hours column of an hours by namespace result.
+
+	Args:
+		hours_df (pd.DataFrame): The hours by namespace result.
+		avail_hrs (float): The maximum amount of resource hours available.
+	Returns:
+		float: The sum of the hours column.
+	Raises:
+		Exception: The total exceeds the available hours.
+	"""
+	total_hours = hours_df['Hours'].sum()
+
 	# Ensure the hours we calculated doesn't exceed the maximum possible hours
 	if(total_hours > avail_hrs):
 		raise Exception(f"The total hours scheduled {total_hours} exceeds the maximum amount of resource hours available {avail_hrs}.")
@@ -95,29 +123,26 @@ def analyze_available_hours(identifier: SourceIdentifier, data_repo: DataReposit
 	
 	df = data_repo.get_data(identifier)
 
-	return _analyze_available_hours_ondf(df, identifier.type, identifier.start_ts, identifier.end_ts)
+	return _analyze_available_hours_ondf(df, identifier.type, identifier.start_ts, identifier.end_ts, data_repo.get_views(identifier))
 
-def _analyze_available_hours_ondf(df, df_type, start_ts, end_ts):
+def _analyze_available_hours_ondf(df, df_type, start_ts, end_ts, views: SourceViews = None):
 	"""
 	Determine the amount of available compute hours for the specific type.
 
 	Args:
 		identifier (SourceIdentifier): The identifier for the Grafana DataFrame.
+		views (SourceViews): The shared views of the DataFrame, created if None.
 	Returns:
 		float: The total amount of compute hours available.
 	"""
 
-	if(has_time_column(df)):
-		df = clear_time_column(df)
-		
 	# Calculate hour amount
 	total_hours_month = (end_ts-start_ts+1)/3600
 
-	# Get list of unique node names
-	unique_nodes = set()
-	for col_name in df.columns:
-		col_data = _extract_column_data(col_name)
-		unique_nodes.add(col_data["node"])
+	# Get list of unique node names, namespace aggregated source data doesn't have a node label
+	if(views is None):
+		views = SourceViews(df)
+	unique_nodes = set(views.labels.codes("node")[1])
 
 	# Loop through each node name adding resource count * hours to the total	
 	node_infos = settings["node_infos"]
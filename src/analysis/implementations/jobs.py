@@ -1,9 +1,10 @@
 # This code is repackaged from Tide2.ipynb in https://github.com/SDSU-Research-CI/rci-helpful-scripts
+import numpy as np
 import pandas as pd
 
 from src.data.data_repository import DataRepository
 from src.data.identifiers.identifier import SourceIdentifier, AnalysisIdentifier
-from src.analysis.grafana_df_cleaning import clear_duplicate_uids, clear_blacklisted_uids, has_time_column, clear_time_column
+from src.data.source_views import SourceViews
 
 def analyze_jobs_byns(identifier, data_repo: DataRepository):
     """
@@ -16,7 +17,7 @@ def analyze_jobs_byns(identifier, data_repo: DataRepository):
     """
 
     df = data_repo.get_data(identifier)
-    return _analyze_jobs_byns_ondf(df)
+    return _analyze_jobs_byns_ondf(df, views=data_repo.get_views(identifier))
 
 def analyze_cpu_only_jobs_byns(identifier: SourceIdentifier, data_repo: DataRepository):
     """
@@ -32,61 +33,118 @@ def analyze_cpu_only_jobs_byns(identifier: SourceIdentifier, data_repo: DataRepo
         pd.DataFrame: Result from _analyze_jobs_byns_ondf.
     """
 
+    gpu_uuid = _gpu_job_uids(identifier, data_repo)
+
+    # Unpack cpu dataframe
+    df = data_repo.get_data(identifier)
+
+    return _analyze_jobs_byns_ondf(df, gpu_uuid, True, data_repo.get_views(identifier))
+
+def _gpu_job_uids(identifier: SourceIdentifier, data_repo: DataRepository) -> np.ndarray:
+    """
+    Get the uids of the jobs in the GPU DataFrame corresponding to a CPU DataFrame, these are
+        blacklisted from the cpu only jobs.
+
+    Args:
+        identifier (SourceIdentifier): The identifier for the CPU Grafana DataFrame.
+    Returns:
+        np.ndarray: The uids of the gpu columns with a nonzero sum.
+    Raises:
+        Exception: The corresponding GPU DataFrame isn't in the DataRepository.
+    """
+
     # We have to locate the corresponding GPU data block
     # The UIDs in the GPU will be used to clear blacklisted IDs
     gpu_identifier = SourceIdentifier(identifier.start_ts, identifier.end_ts, "gpu")
     if(not data_repo.contains(gpu_identifier)):
         raise Exception("Failed to analyze cpu only jobs, the corresponding gpu data_block could not be found.")
-    
-    gpu_df = data_repo.get_data(gpu_identifier)
-    if(has_time_column(gpu_df)):
-        gpu_df = clear_time_column(gpu_df)
 
-    gpu_greater_than_zero_cols = [col for col in gpu_df.columns if gpu_df[col].sum() > 0]
-    gpu_df = gpu_df[gpu_greater_than_zero_cols].fillna(0)
-    gpu_uuid = set(gpu_df.columns.str.extract(r'uid="([^"]+)"')[0].dropna())
+    # The uids of the gpu columns with a nonzero sum, shared with every other analysis of the gpu
+    #   DataFrame
+    return data_repo.get_views(gpu_identifier).nonzero_uids
 
-    # Unpack cpu dataframe
-    df = data_repo.get_data(identifier)
-
-    return _analyze_jobs_byns_ondf(df, gpu_uuid, True)
-
-def _analyze_jobs_byns_ondf(df, blacklisted_uuids=None, strip_cols_0=True):
+def _analyze_jobs_byns_ondf(df, blacklisted_uuids=None, strip_cols_0=True, views: SourceViews = None):
     """
     Analyze jobs by namespace. Calculates the unique amount of uids per namespace and sums them.
 
     Args:
         df (pd.DataFrame): The Grafana DataFrame to analyze
-        blacklisted_uuids (list[str]): The blacklisted uuids to exclude from the job count.
+        blacklisted_uuids (list[str] | np.ndarray): The blacklisted uuids to exclude from the job
+            count.
         strip_cols_0 (bool): boolean to strip columns that total 0.
+        views (SourceViews): The shared views of the DataFrame, created if None.
     Returns:
         pd.DataFrame: The result DataFrame with columns [Namespace, Count].    
     """
 
-    # Preprocessing steps, clear time column, duplicate uids, and blacklisted uids.
-    if(has_time_column(df)):
-        df = clear_time_column(df)
+    if(views is None):
+        views = SourceViews(df)
 
-    df = clear_duplicate_uids(df)
-    if(blacklisted_uuids is not None):
-        df = clear_blacklisted_uids(df, blacklisted_uuids)
+    keep = _jobs_keep(views, blacklisted_uuids, strip_cols_0)
+    namespace_codes, namespaces = views.namespace_codes
+    return _jobs_byns(namespace_codes, namespaces, keep)
 
-    df = df.fillna(0)
+def _jobs_keep(views: SourceViews, blacklisted_uuids=None, strip_cols_0=True) -> np.ndarray:
+    """
+    Find the columns counted as jobs: the first column of each uid that isn't blacklisted.
+
+    Args:
+        views (SourceViews): The views of the Grafana DataFrame.
+        blacklisted_uuids (list[str] | np.ndarray): The blacklisted uuids to exclude.
+        strip_cols_0 (bool): boolean to strip columns that total 0.
+    Returns:
+        np.ndarray: The mask of value columns to count.
+    """
+
+    # Preprocessing steps, keep the first column of each uid and drop blacklisted uids. Uids are
+    #   compared by their integer codes, the Time column isn't in the views.
+    uid_codes, uid_values = views.uid_codes
+    keep = views.first_uid_columns.copy()
+    if(blacklisted_uuids is not None):
+        blacklisted_codes = pd.Index(uid_values).get_indexer(_as_uid_array(blacklisted_uuids))
+        keep &= ~np.isin(uid_codes, blacklisted_codes[blacklisted_codes >= 0])
 
     # If we want to strip the columns with 0 total values
     if(strip_cols_0):
-        greater_than_zero_columns = [col for col in df.columns if df[col].sum() > 0]
+        keep &= views.nonzero
 
-        df = df[greater_than_zero_columns].fillna(0)
+    return keep
 
-    #extract all the namespaces and use them as columns, group and summing the values 
-    columns = df.columns.str.extract(r'namespace="([^"]+)"')[0]
+def _jobs_byns(namespace_codes, namespaces, keep):
+    """
+    Count the kept columns of each namespace.
 
-    namespace_counts_sorted = pd.DataFrame(columns.value_counts().sort_values(ascending=False)).reset_index()
-    namespace_counts_sorted.columns = ["Namespace", "Count"]
+    Args:
+        namespace_codes (np.ndarray): The namespace code of each column, -1 for columns without
+            a namespace.
+        namespaces (np.ndarray): The namespace of each code.
+        keep (np.ndarray): The mask of columns to count.
+    Returns:
+        pd.DataFrame: The result DataFrame with columns [Namespace, Count].
+    """
+
+    # Count the kept columns of each namespace, columns without a namespace aren't counted
+    kept_codes = namespace_codes[keep]
+    kept_codes = kept_codes[kept_codes >= 0]
+    counts = np.bincount(kept_codes, minlength=len(namespaces))
+
+    # Namespaces in order of their first kept column, ties keep that order
+    present_codes, first_positions = np.unique(kept_codes, return_index=True)
+    present_codes = present_codes[np.argsort(first_positions)]
+    order = np.argsort(-counts[present_codes], kind="stable")
+
+    namespace_counts_sorted = pd.DataFrame({"Namespace": namespaces[present_codes[order]], "Count": counts[present_codes[order]]})
 
     return namespace_counts_sorted
 
+def _as_uid_array(uids) -> np.ndarray:
+    """
+    The uids of a list, set or array as an object array.
+    """
+    if(isinstance(uids, np.ndarray)):
+        return uids.astype(object, copy=False)
+    return np.array(list(uids), dtype=object)
+
 def analyze_jobs_total(identifier, data_repo: DataRepository):
     """
     Unpack the jobs analysis DataFrame from the DataRepository and sum the Count column.
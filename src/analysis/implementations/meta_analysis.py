@@ -67,9 +67,7 @@ def resolve_analysis(data_repo: DataRepository, start_ts, end_ts, analysis):
     """
     Resolve an analysis identifier with a specific analysis and matching start and end timestamps.
     """
-    for identifier in data_repo.filter_ids(filter_analyis_type(analysis)):
-        src_id: SourceIdentifier = identifier.find_source()
-
-        if(src_id.start_ts == start_ts and src_id.end_ts == end_ts):
-            return identifier
-    return None
\ No newline at end of file
+    identifiers = data_repo.query(AnalysisIdentifier, period=(start_ts, end_ts), analysis=analysis)
+    if(len(identifiers) == 0):
+        return None
+    return identifiers[0]
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""
+Checkpoints are snapshots of the DataRepository saved at the stage boundaries of main.py, so a run
+  that fails in a later stage can resume without ingesting its data again (see --resume-from).
+A checkpoint is a directory per stage holding every entry in the spill format (see
+  src/data/spill.py: Grafana DataFrames as .npy files that are memory-mapped when restored, other
+  data pickled) and a manifest of identifiers and metadata, written last. Checkpoints are only
+  valid for the run they were saved by, the run's analyses, period/file and data settings are in the
+  manifest.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+
+from src.data.data_repository import DataRepository
+from src.data import spill
+
+# The stages checkpoints are saved after, in the order they're performed
+STAGES = ["ingest", "metadata", "analysis"]
+
+CHECKPOINT_VERSION = 1
+MANIFEST_NAME = "manifest.pkl"
+
+def get_run_key(prog_data) -> dict:
+    """
+    Args:
+        prog_data (ProgramData): The program data, its arguments and config.
+
+    Returns:
+        dict: The arguments and config that determine a run's data, a checkpoint is only restored
+            by a run with the same key. Options that don't change the data (workers, cache,
+            sharding, memory budget) aren't part of it.
+    """
+    args = prog_data.args
+    config = prog_data.config
+    config_path = getattr(args, "config", None)
+
+    # The settings ingest, generate_metadata and the analyses read, command line overrides included
+    data_settings = {
+        "base_url": config.get("base_url"),
+        "step": config.get("step"),
+        "queries": config.get("queries"),
+        "query": config.get("query"),
+        "top5hours_blacklist": config.get("top5hours_blacklist"),
+        "status_filter": prog_data.get_option("ingest.status_filter", "status_filter", "client"),
+        "namespace_aggregation": prog_data.get_option("ingest.namespace_aggregation", default=False)
+    }
+
+    return {
+        "analysis_options": sorted(args.analysis_options),
+        "period": getattr(args, "period", None),
+        "file": getattr(args, "file", None),
+        "config_path": os.path.abspath(config_path) if config_path is not None else None,
+        "config_hash": hashlib.sha256(json.dumps(data_settings, sort_keys=True, default=str).encode()).hexdigest()
+    }
+
+def save_checkpoint(data_repo: DataRepository, directory: str, stage: str, run_key: dict):
+    """
+    Save a snapshot of the DataRepository as the checkpoint of a stage, lazy entries are evaluated
+        to save them. The checkpoint replaces the stage's previous checkpoint once it's complete,
+        the checkpoints of later stages are deleted as they're out of date.
+
+    Args:
+        data_repo (DataRepository): The repository to save.
+        directory (str): The checkpoint directory.
+        stage (str): The stage that was completed, one of STAGES.
+        run_key (dict): The run's key, see get_run_key.
+    """
+    os.makedirs(directory, exist_ok=True)
+    stage_path = os.path.join(directory, stage)
+    temp_path = f"{stage_path}.tmp-{os.getpid()}"
+    if(os.path.exists(temp_path)):
+        shutil.rmtree(temp_path)
+    os.mkdir(temp_path)
+
+    start = time.perf_counter()
+    entries = []
+    for position, identifier in enumerate(list(data_repo.get_ids())):
+        data, metadata = data_repo.get(identifier)
+        spilled = spill.spill(data, os.path.join(temp_path, str(position)))
+        entries.append((identifier, metadata, spilled.kind, str(position), spilled.size))
+
+    manifest = {
+        "version": CHECKPOINT_VERSION,
+        "stage": stage,
+        "run_key": run_key,
+        "entries": entries
+    }
+    with open(os.path.join(temp_path, MANIFEST_NAME), "wb") as file:
+        pickle.dump(manifest, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    # Replace the previous checkpoint, later stages were performed on the previous data
+    for later_stage in STAGES[STAGES.index(stage):]:
+        later_path = os.path.join(directory, later_stage)
+        if(os.path.exists(later_path)):
+            shutil.rmtree(later_path)
+    os.rename(temp_path, stage_path)
+
+    print(f"Saved {stage} checkpoint of {len(entries)} entries to {stage_path} in {time.perf_counter() - start:.2f}s.")
+
+def _read_manifest(stage_path: str, run_key: dict) -> dict:
+    """
+    Read a checkpoint's manifest and ensure it's complete and belongs to the run.
+
+    Returns:
+        dict: The manifest, None if the checkpoint isn't valid for the run.
+    """
+    manifest_path = os.path.join(stage_path, MANIFEST_NAME)
+    if(not os.path.exists(manifest_path)):
+        return None
+
+    try:
+        with open(manifest_path, "rb") as file:
+            manifest = pickle.load(file)
+    except Exception as e:
+        print(f"Skipping checkpoint {stage_path}, its manifest couldn't be read: {e}")
+        return None
+
+    if(manifest.get("version") != CHECKPOINT_VERSION):
+        print(f"Skipping checkpoint {stage_path}, it was saved by another version.")
+        return None
+    if(manifest["run_key"] != run_key):
+        print(f"Skipping checkpoint {stage_path}, it was saved by a run with other analyses, period/file arguments, config file or data settings.")
+        return None
+
+    for _, _, kind, name, size in manifest["entries"]:
+        missing = [path for path in spill.SpilledData(kind, os.path.join(stage_path, name), size).paths() if not os.path.exists(path)]
+        if(len(missing) > 0):
+            print(f"Skipping checkpoint {stage_path}, it's missing {missing[0]}.")
+            return None
+
+    return manifest
+
+def load_latest_checkpoint(directory: str, run_key: dict) -> tuple[str, DataRepository]:
+    """
+    Restore the DataRepository from the checkpoint of the latest stage that's valid for the run.
+        DataFrames are memory-mapped copy-on-write from the checkpoint's files.
+
+    Args:
+        directory (str): The checkpoint directory.
+        run_key (dict): The run's key, see get_run_key.
+
+    Returns:
+        tuple[str, DataRepository]: The stage of the checkpoint and its repository, (None, None)
+            if there isn't a valid checkpoint.
+    """
+    for stage in reversed(STAGES):
+        stage_path = os.path.join(directory, stage)
+        manifest = _read_manifest(stage_path, run_key)
+        if(manifest is None):
+            continue
+
+        start = time.perf_counter()
+        data_repo = DataRepository()
+        for identifier, metadata, kind, name, size in manifest["entries"]:
+            data = spill.load(spill.SpilledData(kind, os.path.join(stage_path, name), size))
+            data_repo.add(identifier, data, metadata)
+
+        print(f"Restored {stage} checkpoint of {data_repo.count()} entries from {stage_path} in {time.perf_counter() - start:.2f}s.")
+        return stage, data_repo
+
+    return None, None
@@ -1,18 +1,55 @@
+import os
+import shutil
+import tempfile
+import weakref
+
 import pandas as pd
 
-from src.data.identifiers.identifier import Identifier, SummaryIdentifier
+from src.data.identifiers.identifier import Identifier, SourceIdentifier, AnalysisIdentifier, SummaryIdentifier
 from src.data.filters import *
+from src.data.source_views import SourceViews
+from src.data import spill
+
+# The secondary indexes of a DataRepository, see DataRepository#query
+INDEXES = ["class", "period", "type", "analysis", "source"]
 
 class DataRepository():
     """
     The DataRepository can hold any data, along with optional metadata; both identified by a 
       string identifier. You can also retrieve lists of identifiers based off of a filtering
       function with the filter calls.
+    Grafana DataFrames also get a SourceViews, the derived views shared by every analysis of the
+      DataFrame, see get_views.
+    Identifiers are kept in secondary indexes (by class, period, resource type, analysis and root
+      source) as they're added and removed, see query. Filters from src/data/filters.py carry
+      index hints, so filter_ids only tests the identifiers in the matching index buckets.
+    With a memory budget (see set_memory_budget) the least recently used data is spilled to disk
+      while the resident data is over the budget and loaded again by get_data. Metadata is
+      always kept in memory.
+    Entries can also be lazy (see add_lazy), their data is computed by a thunk the first time it's
+      requested and kept from then on.
     """
 
     def __init__(self):
         self._data = {}
         self._metadata = {}
+        self._views = {}
+        # Index name -> key -> identifiers, each bucket is a dict used as an insertion ordered set
+        self._indexes = {name: {} for name in INDEXES}
+
+        # The estimated size of each entry's data, computed when it's first needed
+        self._sizes = {}
+        self._memory_budget = None
+        self._spill_dir = None
+        self._spill_count = 0
+        # Spilled identifiers -> spill.SpilledData, their _data value is None while spilled
+        self._spilled = {}
+        # Resident identifiers -> size with a memory budget, in least to most recently used order
+        self._resident = {}
+        self._resident_size = 0
+        # Lazy identifiers -> the thunk that computes their data, their _data value is None until
+        #   they're evaluated
+        self._thunks = {}
     
     def add(self, identifier: Identifier, data: object, metadata: dict = None):
         """
@@ -42,6 +79,58 @@ class DataRepository():
         self._data[identifier] = data
         self._metadata[identifier] = metadata
 
+        for name, key in _index_keys(identifier):
+            self._indexes[name].setdefault(key, {})[identifier] = None
+
+        if(self._memory_budget is not None):
+            self._set_resident(identifier)
+            self._enforce_budget(identifier)
+
+    def add_lazy(self, identifier: Identifier, thunk, metadata: dict = None):
+        """
+        Add an entry whose data is computed on demand. The thunk is called the first time the
+          data is requested (see get_data) and its result is kept, an entry that's never requested
+          is never computed. The identifier is indexed and filtered like any other.
+
+        Args:
+            identifier (Identifier): The identifier for the data and metadata.
+            thunk (callable): A function without arguments that returns the data.
+            metadata (dict): The metadata to add, the thunk may update it when it's called.
+        Raises:
+            ValueError: The identifier is already in the repository, the thunk isn't callable.
+        """
+        if(not callable(thunk)):
+            raise ValueError(f"Cannot add lazy data for \"{identifier}\" its thunk is not callable.")
+
+        self.add(identifier, None, metadata)
+        self._thunks[identifier] = thunk
+
+        # Lazy entries aren't in memory until they're evaluated
+        self._sizes.pop(identifier, None)
+        if(identifier in self._resident):
+            self._resident_size -= self._resident.pop(identifier)
+
+    def is_lazy(self, identifier: Identifier) -> bool:
+        """
+        Args:
+            identifier (Identifier): The identifier for the data.
+        Returns:
+            bool: The entry's data hasn't been computed yet.
+        """
+        return identifier in self._thunks
+
+    def _evaluate(self, identifier: Identifier):
+        """
+        Compute a lazy entry's data, the thunk is kept if it raises so the entry stays lazy.
+        """
+        data = self._thunks[identifier]()
+        self._thunks.pop(identifier)
+        self._data[identifier] = data
+
+        if(self._memory_budget is not None):
+            self._set_resident(identifier)
+            self._enforce_budget(identifier)
+
     def update_metadata(self, identifier: Identifier, metadata):
         """
         Update the metadata for a specific identifier.
@@ -73,6 +162,20 @@ class DataRepository():
         self._data.pop(identifier)
         if(identifier in self._metadata):
             self._metadata.pop(identifier)
+        self._views.pop(identifier, None)
+        self._thunks.pop(identifier, None)
+
+        self._sizes.pop(identifier, None)
+        if(identifier in self._resident):
+            self._resident_size -= self._resident.pop(identifier)
+        if(identifier in self._spilled):
+            spill.delete(self._spilled.pop(identifier))
+
+        for name, key in _index_keys(identifier):
+            bucket = self._indexes[name][key]
+            bucket.pop(identifier)
+            if(len(bucket) == 0):
+                self._indexes[name].pop(key)
 
     def contains(self, identifier: Identifier) -> bool:
         """
@@ -104,7 +207,7 @@ class DataRepository():
 
     def get_data(self, identifier: Identifier) -> object:
         """
-        Get the corresponding data object.
+        Get the corresponding data object, lazy entries are evaluated.
           
         Args:
             identifier (Identifier): The identifier for the data and metadata.
@@ -116,8 +219,171 @@ class DataRepository():
         if(not self.contains(identifier)):
             raise KeyError(f"Cannot get data for \"{identifier}\" it is not in the repo.")
 
+        if(identifier in self._thunks):
+            self._evaluate(identifier)
+        elif(identifier in self._spilled):
+            self._load(identifier)
+        elif(identifier in self._resident):
+            # Mark as most recently used
+            self._resident[identifier] = self._resident.pop(identifier)
+
         return self._data[identifier]
 
+    def get_views(self, identifier: Identifier) -> SourceViews:
+        """
+        Get the SourceViews of a DataFrame, created the first time they're requested and kept
+          until the identifier is removed or spilled. Every analysis of a source shares its views, so
+          matrices, labels and sums are only derived once per source.
+
+        Args:
+            identifier (Identifier): The identifier for the DataFrame, usually a SourceIdentifier.
+        Returns:
+            SourceViews: The views of the DataFrame.
+        Raises:
+            KeyError: The identifier is not in the repository.
+            ValueError: The identifier's data is not a DataFrame.
+        """
+        # Loads spilled data and marks the entry as used
+        data = self.get_data(identifier)
+
+        views = self._views.get(identifier)
+        if(views is None):
+            if(not isinstance(data, pd.DataFrame)):
+                raise ValueError(f"Cannot get views for \"{identifier}\" its data is a {type(data).__name__}, not a DataFrame.")
+
+            views = SourceViews(data)
+            self._views[identifier] = views
+
+        return views
+
+    def set_memory_budget(self, budget: int, spill_dir: str = None):
+        """
+        Limit the estimated size of the data kept in memory. While the resident data is over the
+          budget the least recently used entries are spilled to disk (see src/data/spill.py),
+          source DataFrames before any other data. Spilled entries are loaded again the next time
+          they're requested, DataFrames are memory-mapped.
+
+        Args:
+            budget (int): The budget in bytes, None keeps every entry in memory from now on.
+            spill_dir (str): The directory to create the spill directory in, the system's
+                temporary directory if None. The spill directory is deleted with the repository.
+        Raises:
+            ValueError: The budget is negative.
+        """
+        if(budget is not None and budget < 0):
+            raise ValueError(f"The memory budget must be at least 0 bytes, got {budget}.")
+
+        self._memory_budget = budget
+        if(budget is None):
+            return
+
+        if(self._spill_dir is None):
+            if(spill_dir is not None):
+                os.makedirs(spill_dir, exist_ok=True)
+            self._spill_dir = tempfile.mkdtemp(prefix="autotm-spill-", dir=spill_dir)
+            weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+
+        for identifier in self._data.keys():
+            if(identifier not in self._spilled and identifier not in self._resident and identifier not in self._thunks):
+                self._set_resident(identifier)
+        self._enforce_budget()
+
+    def get_size(self, identifier: Identifier) -> int:
+        """
+        Get the estimated in memory size of an entry's data, see spill#sizeof. Spilled entries
+          report the size they had when they were spilled, lazy entries that haven't been
+          evaluated report 0.
+
+        Args:
+            identifier (Identifier): The identifier for the data.
+        Returns:
+            int: The size in bytes.
+        Raises:
+            KeyError: The identifier is not in the repository.
+        """
+        if(not self.contains(identifier)):
+            raise KeyError(f"Cannot get size for \"{identifier}\" it is not in the repo.")
+
+        if(identifier in self._spilled):
+            return self._spilled[identifier].size
+        if(identifier in self._thunks):
+            return 0
+        if(identifier not in self._sizes):
+            self._sizes[identifier] = spill.sizeof(self._data[identifier])
+        return self._sizes[identifier]
+
+    def get_resident_size(self) -> int:
+        """
+        Returns:
+            int: The estimated size in bytes of the data kept in memory.
+        """
+        return sum(self.get_size(identifier) for identifier in self._data.keys() if identifier not in self._spilled)
+
+    def is_spilled(self, identifier: Identifier) -> bool:
+        """
+        Args:
+            identifier (Identifier): The identifier for the data.
+        Returns:
+            bool: The entry's data is on disk.
+        """
+        return identifier in self._spilled
+
+    def _set_resident(self, identifier: Identifier):
+        """
+        Account for an entry's data being in memory as the most recently used entry.
+        """
+        size = self.get_size(identifier)
+        self._resident[identifier] = size
+        self._resident_size += size
+
+    def _enforce_budget(self, keep: Identifier = None):
+        """
+        Spill the least recently used entries, source DataFrames first, until the resident data
+          is within the memory budget.
+
+        Args:
+            keep (Identifier): An entry that stays in memory, the one being added or loaded.
+        """
+        if(self._memory_budget is None or self._resident_size <= self._memory_budget):
+            return
+
+        # Source DataFrames are the largest entries and are only read by the first analyses of
+        #   each source
+        is_source_frame = lambda identifier: isinstance(identifier, SourceIdentifier) and isinstance(self._data[identifier], pd.DataFrame)
+        order = list(self._resident.keys())
+        candidates = [identifier for identifier in order if is_source_frame(identifier)] + [identifier for identifier in order if not is_source_frame(identifier)]
+
+        for identifier in candidates:
+            if(self._resident_size <= self._memory_budget):
+                break
+            if(identifier != keep):
+                self._spill(identifier)
+
+    def _spill(self, identifier: Identifier):
+        """
+        Write an entry's data to the spill directory and drop it, and its views, from memory.
+        """
+        self._spill_count += 1
+        path = os.path.join(self._spill_dir, str(self._spill_count))
+        self._spilled[identifier] = spill.spill(self._data[identifier], path)
+
+        self._data[identifier] = None
+        self._views.pop(identifier, None)
+        self._resident_size -= self._resident.pop(identifier)
+
+    def _load(self, identifier: Identifier):
+        """
+        Load a spilled entry's data back into memory as the most recently used entry.
+        """
+        spilled = self._spilled.pop(identifier)
+        self._data[identifier] = spill.load(spilled)
+        # Memory-mapped files stay readable after they're deleted on POSIX systems
+        spill.delete(spilled)
+
+        self._sizes[identifier] = spilled.size
+        self._set_resident(identifier)
+        self._enforce_budget(identifier)
+
     def get_metadata(self, identifier: Identifier) -> dict:
         """
         Get the corresponding metadata dictionary.
@@ -148,23 +414,73 @@ class DataRepository():
     def filter_ids(self, operation = lambda identifier: True) -> list:
         """
         Get a list of identifiers that satisfy an operation. The operation must return true/false.
+          Operations with index hints (see filters#IdentifierFilter) are only applied to the
+          identifiers in the hinted index buckets, other operations are applied to every
+          identifier.
 
         Args:
             operation (function): The operation to apply to each identifier.
         Returns:
-            list[Identifier]: The list of identifiers that satisfy the operation.
+            list[Identifier]: The list of identifiers that satisfy the operation, in the order
+                they were added.
         Raises:
             ValueError: Operation is none.    
         """
         if(operation is None):
             raise ValueError("Operation cannot be None.")
 
-        out_list = []
-        for identifier in self._data.keys():
-            if(operation(identifier)):
-                out_list.append(identifier)
+        return self._select(getattr(operation, "index_keys", {}), operation)
+
+    def query(self, identifier_class: type = None, strict: bool = False, period: tuple = None, resource_type: str = None, analysis: str = None, source: SourceIdentifier = None) -> list:
+        """
+        Get a list of identifiers from the secondary indexes, only the identifiers in every
+          requested index bucket are returned. Unlike filter_ids no operation is applied to the
+          identifiers.
+
+        Args:
+            identifier_class (type): The class identifiers must be an instance of.
+            strict (bool): Identifiers must be exactly identifier_class, not a subclass of it.
+            period (tuple[int, int]): The (start_ts, end_ts) of the identifier, or of the root
+                source of an AnalysisIdentifier.
+            resource_type (str): The type of a SourceIdentifier.
+            analysis (str): The analysis of an AnalysisIdentifier.
+            source (SourceIdentifier): The root source of an AnalysisIdentifier, see
+                AnalysisIdentifier#find_source.
+        Returns:
+            list[Identifier]: The matching identifiers, in the order they were added.
+        """
+        index_keys = {}
+        for name, key in [("class", identifier_class), ("period", period), ("type", resource_type), ("analysis", analysis), ("source", source)]:
+            if(key is not None):
+                index_keys[name] = key
+
+        operation = None
+        if(strict and identifier_class is not None):
+            operation = lambda identifier: type(identifier) is identifier_class
+
+        return self._select(index_keys, operation)
+
+    def _select(self, index_keys: dict, operation=None) -> list:
+        """
+        Get the identifiers in every index bucket of index_keys that satisfy an operation. Only
+          the smallest bucket is iterated, the others are checked by membership.
+        """
+        buckets = []
+        for name, key in index_keys.items():
+            if(name not in self._indexes.keys()):
+                raise ValueError(f"Cannot select identifiers by \"{name}\" it is not an index, indexes are {INDEXES}.")
+            bucket = self._indexes[name].get(key)
+            if(bucket is None):
+                return []
+            buckets.append(bucket)
+
+        if(len(buckets) == 0):
+            candidates, others = self._data.keys(), []
+        else:
+            buckets.sort(key=len)
+            candidates, others = buckets[0], buckets[1:]
 
-        return out_list
+        return [identifier for identifier in candidates if all(identifier in bucket for bucket in others) and (operation is None or operation(identifier))]
 
     def count(self):
         return len(self._data.keys())
@@ -195,14 +511,20 @@ class DataRepository():
     def print_contents(self, include_metadata=False):
         print("Summary of DataRepository:")
         for identifier in self.get_ids():
-            data = self.get_data(identifier)
             datastr = ""
-            if(isinstance(data, pd.DataFrame)):
-                datastr = "DataFrame"
-            elif(isinstance(identifier, SummaryIdentifier)):
-                datastr = "Summary tuple"
+            # Spilled entries aren't loaded and lazy entries aren't evaluated to print them
+            if(self.is_spilled(identifier)):
+                datastr = f"Spilled to disk ({self.get_size(identifier) / (1024 * 1024):.1f} MB)"
+            elif(self.is_lazy(identifier)):
+                datastr = "Lazy, not evaluated"
             else:
-                datastr = str(data)
+                data = self.get_data(identifier)
+                if(isinstance(data, pd.DataFrame)):
+                    datastr = "DataFrame"
+                elif(isinstance(identifier, SummaryIdentifier)):
+                    datastr = "Summary tuple"
+                else:
+                    datastr = str(data)
 
             outstr = f"ID {identifier}: \n  {"\n  ".join(datastr.split("\n"))}"
             if(include_metadata):
@@ -210,3 +532,24 @@ class DataRepository():
                 outstr += f"\n  {"\n  ".join(str(metadata).split("\n"))}"
 
             print(outstr)
+
+def _index_keys(identifier: Identifier) -> list[tuple[str, object]]:
+    """
+    The (index name, key) pairs of an identifier, see DataRepository#query.
+    """
+    index_keys = [("class", identifier_class) for identifier_class in type(identifier).__mro__ if issubclass(identifier_class, Identifier)]
+
+    source = identifier.find_source() if isinstance(identifier, AnalysisIdentifier) else None
+    if(hasattr(identifier, "start_ts") and hasattr(identifier, "end_ts")):
+        index_keys.append(("period", (identifier.start_ts, identifier.end_ts)))
+    elif(source is not None):
+        index_keys.append(("period", (source.start_ts, source.end_ts)))
+
+    if(isinstance(identifier, SourceIdentifier)):
+        index_keys.append(("type", identifier.type))
+    if(isinstance(identifier, AnalysisIdentifier)):
+        index_keys.append(("analysis", identifier.analysis))
+        if(source is not None):
+            index_keys.append(("source", source))
+
+    return index_keys
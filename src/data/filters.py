@@ -1,5 +1,32 @@
 from src.data.identifiers.identifier import *
 
+class IdentifierFilter():
+    """
+    A filter operation for DataRepository#filter_ids that also carries index hints. Calling the
+      filter tests a single identifier like any other operation, the hints are the DataRepository
+      index keys every identifier that passes must have (i.e. {"class": SourceIdentifier,
+      "type": "cpu"}), so the DataRepository only tests the identifiers in those index buckets
+      instead of every identifier. See DataRepository#query for the index names.
+    Filters are combined with &, the result passes identifiers that pass both filters.
+    """
+
+    def __init__(self, operation, **index_keys):
+        """
+        Args:
+            operation (Callable[[Identifier], bool]): The operation to apply to each identifier.
+            index_keys: The index name and key that every passing identifier has.
+        """
+        self.operation = operation
+        self.index_keys = index_keys
+
+    def __call__(self, identifier) -> bool:
+        return self.operation(identifier)
+
+    def __and__(self, other):
+        index_keys = dict(getattr(other, "index_keys", {}))
+        index_keys.update(self.index_keys)
+        return IdentifierFilter(lambda identifier: self(identifier) and other(identifier), **index_keys)
+
 def filter_type(filtertype: type, strict=False):
     """
     Get a list of identifiers that are the same type as the provided type argument.
@@ -7,18 +34,20 @@ def filter_type(filtertype: type, strict=False):
     Args:
         filtertype (type): The type that the identifier must have.
     Returns:
-        Callable[[Identifier], bool]: The lambda operation.
+        IdentifierFilter: The filter operation.
     Raises:
-        ValueError: type is not a subclass of Identifier.    
+        ValueError: type is not a subclass of Identifier.
     """
 
     if(not issubclass(filtertype, Identifier)):
         raise ValueError(f"Cannot filter by type \"{filtertype}\" it is not an instance of Identifier.")
 
+    # The class index holds every identifier under each of its classes, a strict filter narrows it
+    #   down to the exact class
     if strict:
-        return lambda identifier: type(identifier) is filtertype
+        return IdentifierFilter(lambda identifier: type(identifier) is filtertype, **{"class": filtertype})
     else:
-        return lambda identifier: isinstance(identifier, filtertype)
+        return IdentifierFilter(lambda identifier: isinstance(identifier, filtertype), **{"class": filtertype})
 
 def filter_source_type(resource_type: str):
     """
@@ -27,24 +56,22 @@ def filter_source_type(resource_type: str):
     Args:
         resource_type (str): The target resource type for SourceIdentifiers.
     Returns:
-        Callable[[Identifier], bool]: The lambda operation.
+        IdentifierFilter: The filter operation.
     """
 
-    analysis_type_lambda = filter_type(SourceIdentifier)
-    return lambda identifier: analysis_type_lambda(identifier) and identifier.type == resource_type
+    return filter_type(SourceIdentifier) & IdentifierFilter(lambda identifier: identifier.type == resource_type, type=resource_type)
 
 def filter_timestamps(start_ts: int, end_ts: int):
     """
     Get a list of TimestampIdentifiers that have the same starting and ending timestamps.
-    
+
     Args:
         start_ts (int): The target start timestamp.
         end_ts (int): The target end timestamp.
     Returns:
-        Callable[[Identifier], bool]: The lambda operation.
+        IdentifierFilter: The filter operation.
     """
-    time_stamp_lambda = filter_type(TimeStampIdentifier)
-    return lambda identifier: time_stamp_lambda(identifier) and identifier.start_ts == start_ts and identifier.end_ts == end_ts
+    return filter_type(TimeStampIdentifier) & IdentifierFilter(lambda identifier: identifier.start_ts == start_ts and identifier.end_ts == end_ts, period=(start_ts, end_ts))
 
 def filter_analyis_type(analysis_type: str):
     """
@@ -53,11 +80,10 @@ def filter_analyis_type(analysis_type: str):
     Args:
         targ_identifier (Identifier): The identifier that the analyses are performed on.
     Returns:
-        Callable[[Identifier], bool]: The lambda operation.
+        IdentifierFilter: The filter operation.
     """
 
-    analysis_type_lambda = filter_type(AnalysisIdentifier)
-    return lambda identifier: analysis_type_lambda(identifier) and identifier.analysis == analysis_type
+    return filter_type(AnalysisIdentifier) & IdentifierFilter(lambda identifier: identifier.analysis == analysis_type, analysis=analysis_type)
 
 def filter_analyses_of(targ_identifier: Identifier):
     """
@@ -66,8 +92,14 @@ def filter_analyses_of(targ_identifier: Identifier):
     Args:
         targ_identifier (Identifier): The identifier that the analyses are performed on.
     Returns:
-        Callable[[Identifier], bool]: The lambda operation.
+        IdentifierFilter: The filter operation.
     """
 
-    analysis_type_lambda = filter_type(AnalysisIdentifier)
-    return lambda identifier: analysis_type_lambda(identifier) and identifier.on == targ_identifier
+    # Analyses of the identifier share its root source
+    index_keys = {}
+    if(isinstance(targ_identifier, SourceIdentifier)):
+        index_keys["source"] = targ_identifier
+    elif(isinstance(targ_identifier, AnalysisIdentifier) and targ_identifier.find_source() is not None):
+        index_keys["source"] = targ_identifier.find_source()
+
+    return filter_type(AnalysisIdentifier) & IdentifierFilter(lambda identifier: identifier.on == targ_identifier, **index_keys)
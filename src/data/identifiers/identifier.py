@@ -1,10 +1,47 @@
+import sys
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def _field_names(identifier_class: type) -> tuple[str]:
+    """
+    The names of an identifier class' dataclass fields, in __init__ order.
+    """
+    return tuple(field.name for field in fields(identifier_class))
 
 @dataclass(frozen=True)
 class Identifier(ABC):
-    @abstractmethod
+    """
+    The base of every identifier. Identifiers are compact and immutable: fields are slots, string
+      fields are interned and the hash is computed once when the identifier is created, so dict
+      lookups don't re-hash nested identifiers.
+    Pickled identifiers are created again from their fields, hashes of strings differ between
+      processes.
+    """
+    __slots__ = ("_hash",)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # A class that defines __eq__ without __hash__ isn't hashable, every identifier uses the
+        #   cached hash
+        cls.__hash__ = Identifier.__hash__
+
+    def __post_init__(self):
+        for name in _field_names(type(self)):
+            value = getattr(self, name)
+            if(type(value) is str):
+                object.__setattr__(self, name, sys.intern(value))
+        object.__setattr__(self, "_hash", self._compute_hash())
+
     def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self):
+        return (type(self), tuple(getattr(self, name) for name in _field_names(type(self))))
+
+    @abstractmethod
+    def _compute_hash(self) -> int:
         pass
 
     @abstractmethod
@@ -20,11 +57,12 @@ class TimeStampIdentifier(Identifier):
     """
     Identifier for a time range.
     """
+    __slots__ = ("start_ts", "end_ts")
     start_ts: int
     end_ts: int
 
-    def __hash__(self) -> int:
-        return hash((self.start_ts, self.end_ts, self.type))
+    def _compute_hash(self) -> int:
+        return hash((self.start_ts, self.end_ts))
 
     def __eq__(self, other) -> bool:
         return isinstance(other, SourceIdentifier) and self.start_ts == other.start_ts and self.end_ts == other.end_ts and self.type == other.type
@@ -37,10 +75,11 @@ class SourceIdentifier(TimeStampIdentifier):
     """
     Identifier for a source Grafana DataFrame.
     """
+    __slots__ = ("type",)
     type: str # cpu/gpu
 
-    def __hash__(self) -> int:
-        return hash((super().__hash__(), self.type))
+    def _compute_hash(self) -> int:
+        return hash((super()._compute_hash(), self.type))
 
     def __eq__(self, other) -> bool:
         return isinstance(other, SourceIdentifier) and super().__eq__(other) and self.type == other.type
@@ -54,10 +93,11 @@ class SourceQueryIdentifier(SourceIdentifier):
     Identifier for a source Grafana DataFrame. With additional information about the query that
       generated it. Used in PromQL ingest process.
     """
+    __slots__ = ("query_name",)
     query_name: str # status/truth (-> values)
 
-    def __hash__(self) -> int:
-        return hash((super().__hash__(), self.query_name))
+    def _compute_hash(self) -> int:
+        return hash((super()._compute_hash(), self.query_name))
 
     def __eq__(self, other) -> bool:
         return isinstance(other, SourceQueryIdentifier) and super().__eq__(other) and self.query_name == other.query_name
@@ -70,12 +110,23 @@ class AnalysisIdentifier(Identifier):
     """
     Identifier for an anlysis of something else, can either be a SourceIdentifier or another
       AnalysisIdentifier. This means there can be multiple layers of AnalysisIdentifiers before you
-      reach the root SourceIdentifier. Use find_source() to find the root.
+      reach the root SourceIdentifier. Use find_source() to find the root, it's found once when
+      the identifier is created.
     """
+    __slots__ = ("on", "analysis", "_source")
     on: Identifier
     analysis: str
 
-    def __hash__(self) -> int:
+    def __post_init__(self):
+        on = self.on
+        if(isinstance(on, AnalysisIdentifier)):
+            source = on.find_source()
+        else:
+            source = on if isinstance(on, SourceIdentifier) else None
+        object.__setattr__(self, "_source", source)
+        super().__post_init__()
+
+    def _compute_hash(self) -> int:
         return hash((self.on, self.analysis))
 
     def __eq__(self, other) -> bool:
@@ -92,12 +143,7 @@ class AnalysisIdentifier(Identifier):
         Returns:
             SourceIdentifier: The base source identifier that this analysis is based off of.
         """
-        on = self.on
-        while(on is not None):
-            if(isinstance(on, SourceIdentifier)):
-                return on
-            on = on.on
-        return None
+        return self._source
 
     def is_meta_analysis(self):
         """
@@ -113,10 +159,11 @@ class VisIdentifier(Identifier):
     """
     An identifier for a visualization of an analysis.
     """
+    __slots__ = ("of", "graph_type")
     of: Identifier
     graph_type: str
 
-    def __hash__(self) -> int:
+    def _compute_hash(self) -> int:
         return hash(("vis", self.of, self.graph_type))
 
     def __eq__(self, other) -> bool:
@@ -131,10 +178,11 @@ class SummaryIdentifier(Identifier):
     An identifier for a summary of a period, the start_ts and end_ts will match the corresponding
       SourceIdentifiers' start_ts and end_ts.
     """
+    __slots__ = ("start_ts", "end_ts")
     start_ts: int
     end_ts: int
 
-    def __hash__(self) -> int:
+    def _compute_hash(self) -> int:
         return hash((self.start_ts, self.end_ts))
 
     def __eq__(self, other) -> bool:
@@ -21,6 +21,8 @@ class FileSystemIngestController(IngestController):
             file_df = pd.read_csv(file_path)
             # Convert values to numeric
             file_df = convert_to_numeric(file_df)
+            # Parse times once, they're UNIX timestamps from here on
+            file_df = convert_time_column(file_df)
 
             # Read identifying data about DataFrame
             period = get_period(file_df)
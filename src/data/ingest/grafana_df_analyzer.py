@@ -1,31 +1,53 @@
 import datetime
+import numpy as np
 import pandas as pd
 
 from src.program_data.settings import settings
-from src.utils.timeutils import to_unix_ts
+from src.data.labels import parse_labels, label_table
+from src.utils.timeutils import to_unix_ts_array, from_unix_ts_array
 
 def convert_to_numeric(df: pd.DataFrame):
     # Convert the data frame to numeric values so we can properly analyze it later.
     df.iloc[:, 1:] = df.iloc[:, 1:].map(pd.to_numeric, errors="coerce")
     return df
 
-def _extract_column_data(col_name):
+def convert_time_column(df: pd.DataFrame):
     """
-    Given a column name with the format {label1="value1", label2="value2",...} break it down into a
-      usable python dictionary.
+    Convert the Time column of a Grafana .csv file, formatted as %m/%d/%Y %H:%M, into the int64
+        UNIX timestamps every Grafana DataFrame uses internally. Times are only parsed here and
+        only formatted again by format_time_column when a DataFrame is saved.
+
+    Args:
+        df (pd.DataFrame): The Grafana DataFrame read from a .csv file, modified in place.
+
+    Returns:
+        pd.DataFrame: The DataFrame with an int64 Time column.
+    """
+    if(not pd.api.types.is_integer_dtype(df["Time"])):
+        df["Time"] = to_unix_ts_array(df["Time"])
+    return df
+
+def format_time_column(df: pd.DataFrame):
     """
-    # Strip opening and closing {}
-    col_name = col_name[1:-1]
-    data = {}
+    Format the UNIX timestamps of a Grafana DataFrame's Time column as %m/%d/%Y %H:%M, the format
+        Grafana .csv files have, see convert_time_column.
 
-    for pair in col_name.split(', '):
-        pairsplit = pair.split('=')
-        label = pairsplit[0]
-        value = pairsplit[1][1:-1] # Grab the value without the first and last characters to remove quotes.
+    Args:
+        df (pd.DataFrame): The Grafana DataFrame, isn't modified.
 
-        data[label] = value
+    Returns:
+        pd.DataFrame: A shallow copy of the DataFrame with a formatted Time column.
+    """
+    df = df.copy(deep=False)
+    df["Time"] = from_unix_ts_array(df["Time"])
+    return df
 
-    return data
+def _extract_column_data(col_name):
+    """
+    Given a column name with the format {label1="value1", label2="value2",...} break it down into a
+      usable python dictionary. See labels#parse_labels.
+    """
+    return parse_labels(col_name)
 
 def get_resource_type(df):
     """
@@ -45,14 +67,14 @@ def get_resource_type(df):
             DataFrame, the settings["type_string"] doesn't contain the target type- the function
             won't be able to reverse the program type from the type string.
     """
-    col_datas = [_extract_column_data(col_name) for col_name in df.columns[1:]]
+    resources = label_table(df).values("resource")[1:]
+
+    missing = np.flatnonzero(pd.isna(resources))
+    if(len(missing) > 0):
+        raise Exception(f"Column \"{df.columns[missing[0]+1]}\" doesn't have a resource type.")
 
     # Create a set of all the type strings, this will give a list of unique type names
-    type_set = set()
-    for col_data in col_datas:
-        if("resource" not in col_data.keys()):
-            raise Exception(f"Column \"{col_data}\" doesn't have a resource type.")
-        type_set.add(col_data["resource"])
+    type_set = set(resources)
 
     # If the length of the set is more than one we have an invalid DF
     if(len(type_set) > 1):
@@ -82,15 +104,15 @@ def get_period(df):
     if('Time' not in df.columns):
         raise Exception("Period analysis error: \"Time\" not in the columns of the DataFrame.")
 
-    times = list(df['Time'])
+    times = df['Time']
 
     if(len(times) < 1):
         raise Exception("Period analysis error: Time column of length less than 1")
     
-    start = to_unix_ts(times[0])
+    start = int(times.iloc[0])
     start_dt = datetime.datetime.fromtimestamp(start)
 
-    end = to_unix_ts(times[-1])
+    end = int(times.iloc[-1])
     end_dt = datetime.datetime.fromtimestamp(end)
     
     if(start_dt.month != end_dt.month or start_dt.year != end_dt.year):
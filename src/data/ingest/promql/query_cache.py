@@ -0,0 +1,282 @@
+"""
+The Query Cache persists PromQL responses on disk so that re-running a report doesn't have to
+  perform the same queries again. Entries are content-addressed by the normalized query (base url,
+  query string, start, end and step) and stored gzip compressed.
+Queries for periods that have closed never change, these entries are kept forever. Other entries
+  expire after a TTL. The cache is bounded in size, evicting the least recently used entries.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit, parse_qsl
+
+from src.program_data.program_data import ProgramData
+
+# Seconds after a period's end before its data is considered final, gives Prometheus time to
+#   finish scraping and Thanos time to upload the final blocks.
+CLOSED_PERIOD_GRACE = 3600
+
+def normalize_query_url(query_url: str) -> dict:
+    """
+    Break a query url down into the values that identify its response. Whitespace outside of
+      quoted strings is insignificant in PromQL so it is collapsed, and timestamps are converted
+      to integers so that 1704096000 and 1704096000.0 are the same query.
+
+    Args:
+        query_url (str): The query url, see query_designer#build_url.
+    Returns:
+        dict: The normalized base_url, query, start, end and step.
+    """
+    split_url = urlsplit(query_url)
+    params = dict(parse_qsl(split_url.query, keep_blank_values=True))
+
+    return {
+        "base_url": f"{split_url.scheme}://{split_url.netloc}{split_url.path}",
+        "query": _collapse_whitespace(params.get("query", "")),
+        "start": int(float(params.get("start", 0))),
+        "end": int(float(params.get("end", 0))),
+        "step": int(float(params.get("step", 0)))
+    }
+
+def _collapse_whitespace(query_string: str) -> str:
+    """
+    Collapse whitespace outside of quoted strings. Whitespace is only kept (as a single space)
+      between two word characters, where removing it would join two tokens.
+    """
+    out = []
+    quote = None
+    pending_space = False
+    for char in query_string.strip():
+        if(quote is None and char.isspace()):
+            pending_space = True
+            continue
+
+        if(pending_space):
+            if(len(out) > 0 and _is_word_char(out[-1]) and _is_word_char(char)):
+                out.append(" ")
+            pending_space = False
+
+        out.append(char)
+        if(quote is None and char in "\"'`"):
+            quote = char
+        elif(quote is not None and char == quote and (len(out) < 2 or out[-2] != "\\")):
+            quote = None
+
+    return "".join(out)
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+class QueryCache():
+    """
+    A thread safe, size bounded, on disk cache of PromQL response bodies.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, directory: str, ttl: int = 3600, max_bytes: int = 1024**3, refresh: bool = False):
+        """
+        Args:
+            directory (str): The directory to store cache entries in, created if it's missing.
+            ttl (int): Seconds that entries for periods that haven't closed are valid for.
+            max_bytes (int): The maximum size of all entries, least recently used entries are
+                evicted past this size.
+            refresh (bool): Ignore existing entries, every query will be performed and its
+                response will replace the cached one.
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._index = self._load_index()
+
+    def key(self, query_url: str) -> str:
+        """
+        Get the content address for a query url.
+
+        Args:
+            query_url (str): The query url.
+        Returns:
+            str: The hex digest identifying the query.
+        """
+        normalized = json.dumps(normalize_query_url(query_url), sort_keys=True)
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def get(self, query_url: str) -> bytes:
+        """
+        Get the cached response body for a query url.
+
+        Args:
+            query_url (str): The query url.
+        Returns:
+            bytes: The response body, None if there is no valid entry for the query.
+        """
+        key = self.key(query_url)
+
+        with self._lock:
+            entry = self._index.get(key)
+
+            if(self.refresh or entry is None):
+                self.misses += 1
+                return None
+
+            if(entry["expires"] is not None and entry["expires"] < time.time()):
+                self._remove_entry(key)
+                self.misses += 1
+                return None
+
+        try:
+            with open(self._entry_path(key), "rb") as file:
+                body = gzip.decompress(file.read())
+        except (OSError, EOFError):
+            # Missing or corrupted entry, treat it as a miss and let it be replaced
+            with self._lock:
+                self._remove_entry(key)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            entry["last_access"] = time.time()
+            self.hits += 1
+
+        return body
+
+    def put(self, query_url: str, body: bytes):
+        """
+        Store a response body for a query url, evicting least recently used entries if the cache
+          grows past its maximum size.
+
+        Args:
+            query_url (str): The query url.
+            body (bytes): The response body.
+        """
+        key = self.key(query_url)
+        compressed = gzip.compress(body)
+
+        now = time.time()
+        end_ts = normalize_query_url(query_url)["end"]
+        expires = None if end_ts + CLOSED_PERIOD_GRACE < now else now + self.ttl
+
+        # Write to a temporary file first so readers never see a partial entry
+        path = self._entry_path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(compressed)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._index[key] = {
+                "size": len(compressed),
+                "created": now,
+                "last_access": now,
+                "expires": expires
+            }
+            self._evict(protected_key=key)
+            self._save_index()
+
+    def size(self) -> int:
+        """
+        Returns:
+            int: The size in bytes of all entries in the cache.
+        """
+        with self._lock:
+            return sum(entry["size"] for entry in self._index.values())
+
+    def close(self):
+        """
+        Persist access times so LRU ordering survives between runs.
+        """
+        with self._lock:
+            self._save_index()
+
+    def print_stats(self):
+        print(f"Query cache: {self.hits} hit(s), {self.misses} miss(es), {self.size()/(1024*1024):.2f} MB in \"{self.directory}\".")
+
+    def _evict(self, protected_key: str = None):
+        """
+        Remove least recently used entries until the cache is within max_bytes. Must hold _lock.
+        """
+        total = sum(entry["size"] for entry in self._index.values())
+        if(total <= self.max_bytes):
+            return
+
+        by_access = sorted(self._index.items(), key=lambda item: item[1]["last_access"])
+        for key, entry in by_access:
+            if(total <= self.max_bytes):
+                break
+            if(key == protected_key):
+                continue
+
+            self._remove_entry(key)
+            total -= entry["size"]
+
+    def _remove_entry(self, key: str):
+        """
+        Remove an entry from the index and disk. Must hold _lock.
+        """
+        self._index.pop(key, None)
+        try:
+            os.remove(self._entry_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json.gz")
+
+    def _load_index(self) -> dict:
+        path = os.path.join(self.directory, QueryCache.INDEX_FILE)
+        if(not os.path.isfile(path)):
+            return {}
+
+        try:
+            with open(path, "r") as file:
+                index = json.load(file)
+        except (OSError, ValueError):
+            print(f"WARN: Query cache index \"{path}\" is unreadable, starting with an empty cache.")
+            return {}
+
+        # Drop entries whose files have disappeared
+        return {key: entry for key, entry in index.items() if os.path.isfile(self._entry_path(key))}
+
+    def _save_index(self):
+        """
+        Atomically write the index to disk. Must hold _lock.
+        """
+        path = os.path.join(self.directory, QueryCache.INDEX_FILE)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(self._index, file)
+        os.replace(temp_path, path)
+
+def load_query_cache(prog_data: ProgramData) -> QueryCache:
+    """
+    Create a QueryCache using the cache options in the config and arguments.
+
+    Args:
+        prog_data (ProgramData): The program data to read options from.
+    Returns:
+        QueryCache: The configured cache, None if caching is disabled.
+    """
+    refresh = getattr(prog_data.args, "refresh", False)
+    enabled = prog_data.get_option("cache.enabled", "cache", False) or refresh
+
+    if(not enabled):
+        return None
+
+    return QueryCache(
+        prog_data.get_option("cache.directory", default="./.promql_cache"),
+        ttl=prog_data.get_option("cache.ttl", default=3600),
+        max_bytes=int(prog_data.get_option("cache.max_size_mb", default=1024) * 1024 * 1024),
+        refresh=refresh
+    )
@@ -0,0 +1,149 @@
+"""
+The Query Client owns the HTTP session that PromQL queries are performed with. The session keeps
+  connections alive between queries, negotiates gzip compression and retries transient failures
+  with exponential backoff. Stats are recorded for every query so we can see where ingest time
+  goes.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.program_data.program_data import ProgramData
+
+@dataclass(frozen=True)
+class QueryStats():
+    """
+    Information about a single performed query.
+    """
+    query_url: str
+    status_code: int
+    wire_bytes: int # Bytes received over the network, compressed if the server used gzip
+    body_bytes: int # Bytes of the decompressed response body
+    latency: float # Seconds between sending the request and receiving the full body
+    retries: int
+
+class QueryClient():
+    """
+    A thread safe HTTP client for performing PromQL queries. A single QueryClient should be shared
+      by all of the queries in an ingest so that connections are pooled.
+    """
+
+    # Status codes that are considered transient and are safe to retry for a GET request
+    RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+    def __init__(self, pool_size: int = 1, connect_timeout: float = 10, read_timeout: float = 300, retries: int = 3, backoff_factor: float = 1.0):
+        """
+        Args:
+            pool_size (int): The amount of connections kept alive, should match the amount of
+                workers performing queries.
+            connect_timeout (float): Seconds to wait for a connection to the server.
+            read_timeout (float): Seconds to wait between bytes received from the server.
+            retries (int): The amount of times a failed query is retried.
+            backoff_factor (float): Retries wait backoff_factor * 2^(retry-1) seconds.
+        """
+        self.timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=QueryClient.RETRY_STATUS_CODES,
+            allowed_methods=["GET"],
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip"})
+
+        self._stats: list[QueryStats] = []
+        self._stats_lock = threading.Lock()
+
+    def get(self, query_url: str) -> requests.Response:
+        """
+        Perform a GET request with the pooled session, retrying transient failures.
+
+        Args:
+            query_url (str): The url to request.
+        Returns:
+            requests.Response: The response, the body will already be read.
+        Raises:
+            requests.exceptions.RequestException: The request failed after all retries.
+        """
+        start_time = time.perf_counter()
+        response = self.session.get(query_url, timeout=self.timeout)
+        body_bytes = len(response.content)
+        latency = time.perf_counter() - start_time
+
+        # urllib3 tracks the amount of bytes pulled over the wire, before decompression
+        wire_bytes = body_bytes
+        if(hasattr(response.raw, "tell")):
+            wire_bytes = response.raw.tell()
+
+        retries = 0
+        if(getattr(response.raw, "retries", None) is not None):
+            retries = len(response.raw.retries.history)
+
+        stats = QueryStats(query_url, response.status_code, wire_bytes, body_bytes, latency, retries)
+        with self._stats_lock:
+            self._stats.append(stats)
+
+        return response
+
+    def get_stats(self) -> list[QueryStats]:
+        """
+        Get the stats of every query performed by this client.
+
+        Returns:
+            list[QueryStats]: The list of stats in the order that queries finished.
+        """
+        with self._stats_lock:
+            return list(self._stats)
+
+    def print_stats(self, verbose=False):
+        """
+        Print a summary of the queries performed by this client.
+
+        Args:
+            verbose (bool): Print the stats of each query as well as the summary.
+        """
+        stats = self.get_stats()
+        if(len(stats) == 0):
+            return
+
+        wire_mb = sum(stat.wire_bytes for stat in stats) / (1024 * 1024)
+        body_mb = sum(stat.body_bytes for stat in stats) / (1024 * 1024)
+        total_latency = sum(stat.latency for stat in stats)
+        retries = sum(stat.retries for stat in stats)
+
+        print(f"Performed {len(stats)} query/queries: {wire_mb:.2f} MB transferred ({body_mb:.2f} MB decompressed), {total_latency:.2f} seconds of total latency, {retries} retries.")
+
+        if(verbose):
+            for stat in sorted(stats, key=lambda stat: stat.latency, reverse=True):
+                print(f"  {stat.latency:.2f}s {stat.wire_bytes/1024:.1f} KB ({stat.body_bytes/1024:.1f} KB) status {stat.status_code} retries {stat.retries}")
+
+    def close(self):
+        self.session.close()
+
+def load_query_client(prog_data: ProgramData) -> QueryClient:
+    """
+    Create a QueryClient using the ingest options in the config.
+
+    Args:
+        prog_data (ProgramData): The program data to read options from.
+    Returns:
+        QueryClient: The configured client.
+    """
+    return QueryClient(
+        pool_size=prog_data.get_option("ingest.workers", "workers", 1),
+        connect_timeout=prog_data.get_option("ingest.connect_timeout", default=10),
+        read_timeout=prog_data.get_option("ingest.read_timeout", default=300),
+        retries=prog_data.get_option("ingest.retries", default=3),
+        backoff_factor=prog_data.get_option("ingest.backoff_factor", default=1.0)
+    )
@@ -0,0 +1,225 @@
+"""
+The Query Decoder turns the body of a PromQL range query response directly into a Grafana
+  DataFrame. Instead of loading the entire response as python dicts and lists, the data.result
+  array is walked one series at a time and each series' values are written straight into a
+  preallocated NumPy matrix (time index x series). Only one series is held as python objects at
+  a time, peak memory is about twice the size of the response (the body and its decoded text)
+  plus the final matrix.
+"""
+
+import json
+import re
+import numpy as np
+import pandas as pd
+
+
+_json_decoder = json.JSONDecoder()
+_whitespace_regex = re.compile(r'[ \t\n\r]*')
+
+def format_metric(metric_dict: dict) -> str:
+    """
+    Given a metric dictionary, convert it to string format such that {'key': 'pair'} becomes
+      {key="pair"}. This ensures parity with Grafana .csv downloads.
+    """
+    return "{" + ", ".join(f'{key}="{value}"' for key, value in metric_dict.items()) + "}"
+
+def decode_query_response(body: bytes, start_ts: int, end_ts: int, step: int) -> pd.DataFrame:
+    """
+    Decode the body of a PromQL range query response into a Grafana DataFrame. The result is the
+      same as transform_query_response(json.loads(body)['data']['result']) without holding the
+      whole response as python objects. Series with the same labels are merged into one column,
+      the first series' samples are kept and later series only fill its missing timestamps.
+
+    Args:
+        body (bytes): The response body.
+        start_ts (int): The start of the query, the first timestamp of the step grid.
+        end_ts (int): The end of the query.
+        step (int): The step of the query.
+
+    Returns:
+        pd.DataFrame: The Grafana DataFrame, a Time column of int64 UNIX timestamps followed by a
+            column for each series.
+
+    Raises:
+        Exception: The response is malformed or doesn't contain data.
+    """
+    text = body.decode("utf-8") if isinstance(body, (bytes, bytearray)) else body
+    builder = _MatrixBuilder(int(start_ts), int(end_ts), int(step))
+    found_data = False
+
+    def on_data_key(key, idx):
+        if(key == "result"):
+            return _walk_array(text, idx, builder.add_series)
+        if(key == "resultType"):
+            result_type, idx = _json_decoder.raw_decode(text, idx)
+            if(result_type != "matrix"):
+                raise Exception(f"Can't decode query response, expected a matrix result but got \"{result_type}\".")
+            return idx
+        return _skip_value(text, idx)
+
+    def on_root_key(key, idx):
+        nonlocal found_data
+        if(key == "data"):
+            found_data = True
+            return _walk_object(text, idx, on_data_key)
+        return _skip_value(text, idx)
+
+    try:
+        _walk_object(text, _skip_whitespace(text, 0), on_root_key)
+    except ValueError as e:
+        raise Exception(f"Failed to decode query response: {e}") from e
+
+    if(not found_data):
+        raise Exception(f"Missing 'data' in the response:\n{text[:1000]}")
+
+    return builder.to_dataframe()
+
+class _MatrixBuilder():
+    """
+    Collects series into a column-major float64 matrix over the query's step grid, growing the
+      series capacity geometrically.
+    """
+
+    def __init__(self, start_ts: int, end_ts: int, step: int):
+        self.start_ts = start_ts
+        self.step = step
+        self.n_steps = max(0, (end_ts - start_ts) // step + 1)
+
+        self.labels = []
+        # Label -> column, series with the same labels share a column
+        self.columns = {}
+        self.row_present = np.zeros(self.n_steps, dtype=bool)
+        self.matrix = np.full((self.n_steps, 64), np.nan, dtype=np.float64, order="F")
+
+    def add_series(self, series: dict):
+        values = series["values"]
+        label = format_metric(series["metric"])
+        column = self.columns.get(label)
+        is_duplicate = column is not None
+
+        if(not is_duplicate):
+            column = len(self.labels)
+            if(column == self.matrix.shape[1]):
+                self._grow()
+
+        timestamps = np.fromiter((pair[0] for pair in values), dtype=np.float64, count=len(values))
+        samples = np.array([pair[1] for pair in values], dtype=np.float64)
+
+        rows = np.rint((timestamps - self.start_ts) / self.step).astype(np.intp)
+        in_range = (rows >= 0) & (rows < self.n_steps)
+        if(not in_range.all()):
+            rows = rows[in_range]
+            samples = samples[in_range]
+
+        if(is_duplicate):
+            # The first series wins, later samples only fill its missing timestamps
+            missing = np.isnan(self.matrix[rows, column])
+            rows = rows[missing]
+            samples = samples[missing]
+        else:
+            self.columns[label] = column
+            self.labels.append(label)
+
+        self.matrix[rows, column] = samples
+        self.row_present[rows] = True
+
+    def to_dataframe(self) -> pd.DataFrame:
+        n_series = len(self.labels)
+        matrix = self.matrix[:, :n_series] # A view, the matrix is column-major
+
+        # Order columns by their label like a pivoted DataFrame, in place to avoid a copy
+        order = np.argsort(np.array(self.labels, dtype=object), kind="stable")
+        _permute_columns_inplace(matrix, order)
+        labels = [self.labels[i] for i in order]
+
+        # Only keep timestamps where at least one series had a sample
+        rows = np.flatnonzero(self.row_present)
+        if(len(rows) != self.n_steps):
+            matrix = matrix[rows]
+        times = self.start_ts + rows * self.step
+
+        df = pd.DataFrame(matrix, columns=labels, copy=False)
+        df.insert(0, "Time", times.astype(np.int64))
+        return df
+
+    def _grow(self):
+        grown = np.full((self.n_steps, self.matrix.shape[1] * 2), np.nan, dtype=np.float64, order="F")
+        grown[:, :self.matrix.shape[1]] = self.matrix
+        self.matrix = grown
+
+def _permute_columns_inplace(matrix: np.ndarray, order: np.ndarray):
+    """
+    Reorder the columns of a matrix in place such that matrix[:, j] becomes matrix[:, order[j]],
+      using a single column of temporary memory by following the permutation's cycles.
+    """
+    visited = np.zeros(len(order), dtype=bool)
+    for start in range(len(order)):
+        if(visited[start] or order[start] == start):
+            visited[start] = True
+            continue
+
+        temp = matrix[:, start].copy()
+        current = start
+        while(True):
+            visited[current] = True
+            source = order[current]
+            if(source == start):
+                matrix[:, current] = temp
+                break
+            matrix[:, current] = matrix[:, source]
+            current = source
+
+def _skip_whitespace(text: str, idx: int) -> int:
+    return _whitespace_regex.match(text, idx).end()
+
+def _expect(text: str, idx: int, char: str) -> int:
+    idx = _skip_whitespace(text, idx)
+    if(text[idx:idx+1] != char):
+        raise ValueError(f"expected '{char}' at position {idx}")
+    return idx + 1
+
+def _skip_value(text: str, idx: int) -> int:
+    _, idx = _json_decoder.raw_decode(text, idx)
+    return idx
+
+def _walk_object(text: str, idx: int, on_key) -> int:
+    """
+    Walk the JSON object starting at idx. on_key(key, value_idx) is called for each key and must
+      return the index after its value. Returns the index after the object.
+    """
+    idx = _skip_whitespace(text, _expect(text, idx, "{"))
+    if(text[idx:idx+1] == "}"):
+        return idx + 1
+
+    while(True):
+        key, idx = _json_decoder.raw_decode(text, _skip_whitespace(text, idx))
+        idx = _expect(text, idx, ":")
+        idx = _skip_whitespace(text, on_key(key, _skip_whitespace(text, idx)))
+
+        if(text[idx:idx+1] == ","):
+            idx += 1
+        elif(text[idx:idx+1] == "}"):
+            return idx + 1
+        else:
+            raise ValueError(f"expected ',' or '}}' at position {idx}")
+
+def _walk_array(text: str, idx: int, on_item) -> int:
+    """
+    Walk the JSON array starting at idx, decoding one item at a time and passing it to on_item.
+      Returns the index after the array.
+    """
+    idx = _skip_whitespace(text, _expect(text, idx, "["))
+    if(text[idx:idx+1] == "]"):
+        return idx + 1
+
+    while(True):
+        item, idx = _json_decoder.raw_decode(text, _skip_whitespace(text, idx))
+        on_item(item)
+        idx = _skip_whitespace(text, idx)
+
+        if(text[idx:idx+1] == ","):
+            idx += 1
+        elif(text[idx:idx+1] == "]"):
+            return idx + 1
+        else:
+            raise ValueError(f"expected ',' or ']' at position {idx}")
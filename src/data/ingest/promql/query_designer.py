@@ -1,8 +1,15 @@
-from dataclasses import dataclass
+import math
+import re
+from dataclasses import dataclass, replace
 
 from src.utils.timeutils import get_range_printable, break_period_into_months
 from src.program_data.settings import settings
 
+SECONDS_PER_DAY = 86400
+
+# Matches the namespace=~"..." matcher of a query, capturing the regex
+NAMESPACE_MATCHER_REGEX = re.compile(r'namespace\s*=~\s*"([^"]*)"')
+
 def build_url(base, url_options = {}):
     """
     Build a URL using a base url and additional options.
@@ -23,24 +30,42 @@ def build_url(base, url_options = {}):
 @dataclass(frozen=True)
 class QueryData():
     """
-    Information for a query, including the query url, the target type, and the period.
+    Information for a query, including the query string, the target type, and the period.
     """
-    query_url: str
+    base_url: str
+    query_string: str
+    step: int
     query_name: str
     type: str
     start_ts: int
     end_ts: int
 
+    @property
+    def query_url(self) -> str:
+        return build_url(
+            self.base_url,
+            {
+                "start": self.start_ts,
+                "end": self.end_ts,
+                "step": self.step,
+                "query": self.query_string
+            }
+        )
+
     def __str__(self) -> str:
         return f"{self.query_name} {self.type.upper()} {get_range_printable(self.start_ts, self.end_ts)}"
 
-def build_query_list(config, args) -> list[QueryData]:
+def build_query_list(config, args, server_status_join: bool = False, aggregate_namespaces: bool = False) -> list[QueryData]:
     """
     Build a list of queries by analysing the state of the current ProgramData.
     
     Args:
         config (dict): The loaded configuration.
         args (argparse.Namespace): The program arguments.
+        server_status_join (bool): Join the status query into each truth query server-side (see
+            join_status_query) instead of building separate status queries.
+        aggregate_namespaces (bool): Aggregate each truth query to namespace level sums (see
+            aggregate_namespace_query), implies server_status_join.
 
     Returns:
         list[QueryData]: The list of QueryData which contains the query URL itself and 
@@ -61,24 +86,24 @@ def build_query_list(config, args) -> list[QueryData]:
 
         query_string_orig: str = config["queries"][query_name]
 
+        if(server_status_join or aggregate_namespaces):
+            if(query_name == "status"):
+                continue
+            query_string_orig = join_status_query(query_string_orig, config["queries"]["status"])
+
+        if(aggregate_namespaces):
+            query_string_orig = aggregate_namespace_query(query_string_orig)
+
         for period in periods:
-            for type in required_types:
+            for type in sorted(required_types):
                 
                 type_string = settings['type_strings'][type]
                 query_string = query_string_orig.replace(settings['type_string_identifier'], type_string)
 
-                query_url = build_url(
-                    config["base_url"], 
-                    {
-                        "start": period[0],
-                        "end": period[1],
-                        "step": config["step"],
-                        "query": query_string
-                    }
-                )
-
                 query_data = QueryData(
-                    query_url,
+                    config["base_url"],
+                    query_string,
+                    config["step"],
                     query_name,
                     type,
                     period[0],
@@ -94,4 +119,172 @@ def build_query_list(config, args) -> list[QueryData]:
                     break
 
     return query_list
-    
\ No newline at end of file
+
+def join_status_query(truth_query: str, status_query: str) -> str:
+    """
+    Join a truth query with the status query so that Prometheus only returns truth samples at
+      timestamps where the pod (identified by uid) has a running/pending status.
+    The status series of a pod are merged with max by(uid), the same as the client-side status
+      filter. The and operator keeps the truth series' labels (including __name__) and values
+      as they are, so the result looks exactly like a status filtered truth query.
+
+    Args:
+        truth_query (str): The truth query string.
+        status_query (str): The status query string, series with a value of 1 are running/pending.
+
+    Returns:
+        str: The joined query string.
+    """
+    return f"({truth_query.strip()}) and on(uid) (max by(uid) ({status_query.strip()}) > 0)"
+
+def aggregate_namespace_query(query: str) -> str:
+    """
+    Aggregate a status joined truth query (see join_status_query) into a series per namespace.
+      Series of the same pod are merged with max by(uid) first, the same as the client-side uid
+      merge, then summed by namespace. The resource label is kept so the resource type can still
+      be read from the response.
+
+    Args:
+        query (str): The status joined truth query string.
+
+    Returns:
+        str: The aggregated query string.
+    """
+    return f"sum by(namespace, resource) (max by(namespace, resource, uid) ({query.strip()}))"
+
+def can_aggregate_namespaces(analysis_options: list[str]) -> bool:
+    """
+    Check if every analysis in a list can be performed on namespace aggregated source data.
+
+    Args:
+        analysis_options (list[str]): The analyses to perform, including requirements.
+
+    Returns:
+        bool: True if all of the analyses are aggregatable.
+    """
+    analysis_settings = settings['analysis_settings']
+    return all(analysis_settings[analysis].get('aggregatable', False) for analysis in analysis_options)
+
+def shard_query(query_data: QueryData, sample_budget: int = None, series_estimate: int = 1) -> list[QueryData]:
+    """
+    Split a query into time shards so that each response stays within a sample budget. The
+      amount of samples in a response is estimated as steps * series_estimate. Shards are whole
+      days (or multiples of days) when possible, and always whole multiples of the step.
+    Shard boundaries are aligned to the query's step grid and each shard ends one second before
+      the next one starts, so stitching the shard responses back together yields the same
+      timestamps as the unsharded query.
+
+    Args:
+        query_data (QueryData): The query to shard.
+        sample_budget (int): The target maximum amount of samples per shard, None disables
+            sharding.
+        series_estimate (int): The estimated amount of series returned by the query.
+
+    Returns:
+        list[QueryData]: The shards in chronological order, a list containing only query_data if
+            no sharding is necessary.
+    """
+    step = int(query_data.step)
+    start_ts = int(query_data.start_ts)
+    end_ts = int(query_data.end_ts)
+
+    steps = (end_ts - start_ts) // step + 1
+    samples = steps * series_estimate
+
+    if(sample_budget is None or samples <= sample_budget):
+        return [query_data]
+
+    shard_count = math.ceil(samples / sample_budget)
+    shard_seconds = math.ceil(steps / shard_count) * step
+
+    # Prefer shards of whole days, then ensure the shard is a whole multiple of the step
+    if(shard_seconds >= SECONDS_PER_DAY):
+        shard_seconds = (shard_seconds // SECONDS_PER_DAY) * SECONDS_PER_DAY
+    shard_seconds = max(step, (shard_seconds // step) * step)
+
+    shards = []
+    shard_start = start_ts
+    while(shard_start <= end_ts):
+        shard_end = min(shard_start + shard_seconds - 1, end_ts)
+        shards.append(replace(query_data, start_ts=shard_start, end_ts=shard_end))
+        shard_start += shard_seconds
+
+    return shards
+
+def partition_namespaces(query_data: QueryData, group_count: int = 1) -> list[QueryData]:
+    """
+    Split a query into namespace groups by partitioning the alternatives of its namespace=~"..."
+      matcher. For example, with two groups namespace=~"a.*|b.*|c.*" becomes namespace=~"a.*|b.*"
+      and namespace=~"c.*". Other matchers (including namespace!~) are left as is. A joined query
+      (see join_status_query) has a matcher per selector, they're partitioned together if their
+      regexes are the same.
+    Alternatives may overlap (i.e. csusb.* and csu.*) so the same series can be returned by more
+      than one group, see query_ingest#_join_namespace_groups.
+
+    Args:
+        query_data (QueryData): The query to partition.
+        group_count (int): The amount of namespace groups to create.
+
+    Returns:
+        list[QueryData]: The namespace group queries, a list containing only query_data if the
+            query can't be partitioned.
+    """
+    if(group_count is None or group_count <= 1):
+        return [query_data]
+
+    matches = list(NAMESPACE_MATCHER_REGEX.finditer(query_data.query_string))
+    if(len(matches) == 0 or len(set(match.group(1) for match in matches)) != 1):
+        return [query_data]
+
+    alternatives = _split_alternatives(matches[0].group(1))
+    if(len(alternatives) <= 1):
+        return [query_data]
+
+    group_count = min(group_count, len(alternatives))
+    group_size = math.ceil(len(alternatives) / group_count)
+
+    groups = []
+    for i in range(0, len(alternatives), group_size):
+        group_regex = "|".join(alternatives[i:i+group_size])
+
+        # Replace matchers back to front so earlier match positions stay valid
+        query_string = query_data.query_string
+        for match in reversed(matches):
+            query_string = query_string[:match.start(1)] + group_regex + query_string[match.end(1):]
+        groups.append(replace(query_data, query_string=query_string))
+
+    return groups
+
+def _split_alternatives(regex: str) -> list[str]:
+    """
+    Split a regex on its top level | characters, alternations inside of groups, character classes
+      and escaped characters are ignored.
+    """
+    alternatives = []
+    depth = 0
+    in_class = False
+    escaped = False
+    current = ""
+
+    for char in regex:
+        if(escaped):
+            escaped = False
+        elif(char == "\\"):
+            escaped = True
+        elif(in_class):
+            in_class = char != "]"
+        elif(char == "["):
+            in_class = True
+        elif(char == "("):
+            depth += 1
+        elif(char == ")"):
+            depth -= 1
+        elif(char == "|" and depth == 0):
+            alternatives.append(current)
+            current = ""
+            continue
+
+        current += char
+
+    alternatives.append(current)
+    return alternatives
@@ -3,72 +3,112 @@ The Query Executor actually performs the GET request then transforms the returne
   Grafana DF we're expecting.
 """
 
-import datetime
 import json
+import numpy as np
 import pandas as pd
 import requests
 
-from src.utils.timeutils import from_unix_ts
+from src.data.ingest.promql.query_client import QueryClient
+from src.data.ingest.promql.query_cache import QueryCache
+from src.data.ingest.promql.query_decoder import format_metric
 
-def perform_query(queryURL):
+def perform_query(queryURL, client: QueryClient = None, cache: QueryCache = None, decoder = None):
     """
     Perform an HTTP GET request with the queryURL, handle the response and return the DataFrame
+
+    Args:
+        queryURL (str): The url of the query.
+        client (QueryClient): The pooled client to perform the request with, a new client is
+            created if none is provided.
+        cache (QueryCache): The cache to read the response from and store it in, optional.
+        decoder (Callable[[bytes], object]): Decodes the response body into the returned value,
+            see query_decoder#decode_query_response. Defaults to the data.result portion of the
+            response json. Responses that the decoder raises an Exception for aren't cached.
     """
 
-    cache_mode = 'nocache'
-    json_response = None
+    if(decoder is None):
+        decoder = _decode_result
+
+    # Use the cached response body if there is one
+    body = None
+    if(cache is not None):
+        body = cache.get(queryURL)
+
+    from_cache = body is not None
 
-    if(cache_mode == 'nocache' or cache_mode == 'save'):
-        response = requests.get(queryURL)
+    if(not from_cache):
+        if(client is None):
+            client = QueryClient()
+
+        try:
+            response = client.get(queryURL)
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Failed to perform PromQL query for url:\n{queryURL}") from e
 
         if(response.status_code != 200):
-            raise Exception(f"Failed to perform PromQL query for url:\n{queryURL}")
-
-        # Check if 'data' is in the response JSON to avoid KeyError
-        json_response = response.json()
-        if 'data' not in json_response:
-            raise Exception(f"Missing 'data' in the response:\n{json_response}")
-
-    if(cache_mode == 'save'):
-        with open('./cached_response.json', 'w') as f:
-            json.dump(json_response, f)
-            print("Saved json.")
-    elif(cache_mode == 'use'):
-        print("WARN: Used cached response instead of performing a new PromQL query.")
-        with open('./cached_response.json', 'r') as f:
-            json_response = json.load(f)
+            raise Exception(f"Failed to perform PromQL query for url (status {response.status_code}):\n{queryURL}")
+
+        body = response.content
+
+    decoded = decoder(body)
+
+    # Only store responses that were successfully decoded
+    if(cache is not None and not from_cache):
+        cache.put(queryURL, body)
+
+    return decoded
+
+def _decode_result(body: bytes):
+    """
+    Decode the data.result portion of a response body.
+    """
+    json_response = json.loads(body)
+
+    # Check if 'data' is in the response JSON to avoid KeyError
+    if 'data' not in json_response:
+        raise Exception(f"Missing 'data' in the response:\n{json_response}")
 
     return json_response['data']['result']
 
 def transform_query_response(query_response):
     """
-    Given query_response json, produce a “time-joined” table like Grafana's CSV export.
+    Given query_response json, produce a "time-joined" table like Grafana's CSV export. The query
+       response json is the data.result portion of the web request, see perform_query.
+    Every sample is scattered straight into a dense float64 matrix, the time axis is the union of
+       all series' timestamps and columns are ordered by their metric string. When more than one
+       series has the same metric string, the first series' value is kept.
+
+    Args:
+        query_response (list[dict]): The series of the response, each with metric and values.
+    Returns:
+        pd.DataFrame: The Grafana DataFrame, a Time column of int64 UNIX timestamps followed by a
+            numeric column for each metric.
     """
-    # 1) Helper to turn metric dict → {key="value",…} string
-    def fmt_metric(mdict):
-        return "{"+", ".join(f'{k}=\"{v}\"' for k,v in mdict.items())+"}"
-
-    # 2) Build a flat list of (timestamp, metric_str, value)
-    records = []
-    for series in query_response:
-        mstr = fmt_metric(series['metric'])
-        # extend with tuples (time, metric, value)
-        # values is list of [time, value]
-        records.extend((int(ts), mstr, val)
-                       for ts, val in series['values'])
-
-    # 3) One-shot construction of the long DataFrame
-    long_df = pd.DataFrame.from_records(records,
-                                        columns=['Time','Metric','Value'])
-
-    # 4) Pivot so each metric becomes its own column, outer‐joining on Time
-    out_df = long_df.pivot_table(index='Time',
-                                 columns='Metric',
-                                 values='Value',
-                                 aggfunc='first') \
-                    .reset_index()
-
-    # 5) Convert Unix seconds → datetime once, vectorized
-    out_df['Time'] = out_df['Time'].map(from_unix_ts)
+    series_count = len(query_response)
+    lengths = np.fromiter((len(series['values']) for series in query_response), dtype=np.intp, count=series_count)
+    sample_count = int(lengths.sum())
+
+    # Flatten every series' samples, then find each sample's row on the union time axis and column
+    #   from its metric string
+    timestamps = np.fromiter((pair[0] for series in query_response for pair in series['values']), dtype=np.float64, count=sample_count).astype(np.int64)
+    samples = np.array([pair[1] for series in query_response for pair in series['values']], dtype=np.float64)
+
+    metrics = np.array([format_metric(series['metric']) for series in query_response], dtype=object)
+    labels, series_columns = np.unique(metrics, return_inverse=True)
+    columns = np.repeat(series_columns.reshape(-1), lengths)
+
+    times, rows = np.unique(timestamps, return_inverse=True)
+
+    # Repeated metric strings land samples on the same cell, only keep the first of them. Fancy
+    #   assignment doesn't define which duplicate wins.
+    if(len(labels) < series_count):
+        _, first = np.unique(rows * len(labels) + columns, return_index=True)
+        rows, columns, samples = rows[first], columns[first], samples[first]
+
+    matrix = np.full((len(times), len(labels)), np.nan, dtype=np.float64)
+    matrix[rows, columns] = samples
+
+    out_df = pd.DataFrame(matrix, columns=list(labels), copy=False)
+    out_df.insert(0, 'Time', times)
 
     return out_df
\ No newline at end of file
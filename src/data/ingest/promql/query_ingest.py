@@ -1,17 +1,29 @@
+import os
 import re
 import math
 import time
+import multiprocessing
+from multiprocessing import resource_tracker
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass
 
 from src.program_data.program_data import ProgramData
 from src.data.data_repository import DataRepository
-from src.data.identifiers.identifier import SourceQueryIdentifier
+from src.data.identifiers.identifier import SourceIdentifier, SourceQueryIdentifier
 from data.ingest.ingest_controller import *
 from src.data.ingest.grafana_df_analyzer import *
 from src.data.processors import process_periods
-from src.data.ingest.promql.query_executor import perform_query, transform_query_response
-from src.data.ingest.promql.query_designer import build_query_list
-from src.utils.timeutils import to_unix_ts, from_unix_ts, get_range_printable
+from src.data.ingest.promql.query_client import QueryClient, load_query_client
+from src.data.ingest.promql.query_cache import QueryCache, load_query_cache
+from src.data.ingest.promql.query_executor import perform_query
+from src.data.ingest.promql.query_decoder import decode_query_response
+from src.data.ingest.promql.shared_frames import SharedFrame, share_frame, open_frame, take_frame, unlink_frame
+from src.data.ingest.promql.query_designer import build_query_list, shard_query, partition_namespaces, can_aggregate_namespaces, QueryData
+from src.utils.timeutils import from_unix_ts, get_range_printable
 from src.data.filters import *
+from src.data.labels import label_table
 
 class PromQLIngestController(IngestController):
     def ingest(self) -> DataRepository:
@@ -22,33 +34,82 @@ class PromQLIngestController(IngestController):
         #   used in the processing step where we only get pending/running pods.
         data_repo: DataRepository = DataRepository()
 
-        query_blocks = build_query_list(prog_data.config, prog_data.args)
-
-        print(f"Loading data from {len(query_blocks)} query/queries:")
+        # The running/pending status filter is either applied here after every query is
+        #   performed (client) or joined into the truth queries so Prometheus applies it (server).
+        status_filter = prog_data.get_option("ingest.status_filter", "status_filter", "client")
+        server_status_join = status_filter == "server"
 
-        for query_block in query_blocks:
-            print(f"  {query_block}")
+        # Hours analyses only need namespace sums, if no analysis needs per pod data Prometheus can
+        #   aggregate the (server-side status filtered) truth queries for us.
+        aggregate_namespaces = prog_data.get_option("ingest.namespace_aggregation", default=False) and can_aggregate_namespaces(prog_data.args.analysis_options)
+        if(aggregate_namespaces):
+            print("All analyses are aggregatable, ingesting namespace level data.")
+            server_status_join = True
 
-            # Perform the query and transform the json response into a Grafana DataFrame
-            json_response = perform_query(query_block.query_url)
-            grafana_df = transform_query_response(json_response)
+        query_blocks = build_query_list(prog_data.config, prog_data.args, server_status_join, aggregate_namespaces)
+        workers = prog_data.get_option("ingest.workers", "workers", 1)
 
-            # Convert values to numeric
-            grafana_df = convert_to_numeric(grafana_df)
+        # Each query block is split into namespace groups, then each group is split into time
+        #   shards if its response would exceed the sample budget.
+        namespace_groups = prog_data.get_option("sharding.namespace_groups", default=1)
+        sample_budget = prog_data.get_option("sharding.sample_budget")
+        series_estimate = prog_data.get_option("sharding.series_estimate", default=1)
 
-            # Read identifying data about DataFrame
-            period = get_period(grafana_df)
-            resource_type = None
-            if(query_block.query_name == "truth"):
-                resource_type = get_resource_type(grafana_df)
+        query_plans = []
+        for query_block in query_blocks:
+            groups = partition_namespaces(query_block, namespace_groups)
+            group_series_estimate = math.ceil(series_estimate / len(groups))
+            query_plans.append([shard_query(group, sample_budget, group_series_estimate) for group in groups])
+
+        shards = [shard for query_plan in query_plans for group in query_plan for shard in group]
+
+        print(f"Loading data from {len(query_blocks)} query/queries ({len(shards)} shard(s)) with {workers} worker(s):")
+
+        # Queries spend most of their time waiting on the network, so they're performed in a
+        #   bounded thread pool. executor.map yields results in the same order as shards,
+        #   keeping the contents of the DataRepository deterministic.
+        client = load_query_client(prog_data)
+        cache = load_query_cache(prog_data)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            shard_dfs = executor.map(lambda shard: _load_query_block(shard, client, cache), shards)
+
+            for query_block, query_plan in zip(query_blocks, query_plans):
+                print(f"  {query_block}")
+
+                group_dfs = [_stitch_shards([next(shard_dfs) for _ in group]) for group in query_plan]
+                grafana_df = _join_namespace_groups(group_dfs)
+
+                # Read identifying data about DataFrame
+                period = get_period(grafana_df)
+                resource_type = None
+                if(query_block.query_name == "truth"):
+                    resource_type = get_resource_type(grafana_df)
+
+                if(aggregate_namespaces):
+                    # Columns are namespaces, there are no uids to merge
+                    identifier = SourceIdentifier(period[0], period[1], resource_type)
+                    grafana_df = _infer_times(_filter_cols_zero(grafana_df), prog_data.config["step"])
+                elif(server_status_join):
+                    # Already status filtered, only the uid merge and time inference are left
+                    identifier = SourceIdentifier(period[0], period[1], resource_type)
+                    grafana_df = _preprocess_df(grafana_df, True, prog_data.config["step"])
+                else:
+                    identifier = SourceQueryIdentifier(period[0], period[1], resource_type, query_block.query_name)
+                
+                data_repo.add(identifier, grafana_df)
 
-            identifier = SourceQueryIdentifier(period[0], period[1], resource_type, query_block.query_name)
-            
-            data_repo.add(identifier, grafana_df)
+        client.print_stats(getattr(prog_data.args, "verbose", False))
+        client.close()
+        if(cache is not None):
+            cache.print_stats()
+            cache.close()
 
         # Normalize periods for filtering step, then perform filtering
         data_repo = process_periods(data_repo)
 
+        if(server_status_join):
+            return data_repo
+
         print("Applying running/pending filter...")
 
         start_time = time.time()
@@ -59,10 +120,77 @@ class PromQLIngestController(IngestController):
 
         return data_repo
 
+def _load_query_block(query_block: QueryData, client: QueryClient, cache: QueryCache) -> pd.DataFrame:
+    """
+    Perform the query for a single query block and decode the response into a numeric Grafana
+        DataFrame. Safe to call from worker threads.
+
+    Args:
+        query_block (QueryData): The query to perform.
+        client (QueryClient): The shared client to perform the query with.
+        cache (QueryCache): The shared cache for query responses, None if caching is disabled.
+
+    Returns:
+        pd.DataFrame: The Grafana DataFrame for the query.
+    """
+    # The decoder writes values straight into a numeric matrix, so there's no need to convert
+    #   them to numeric afterwards.
+    decoder = lambda body: decode_query_response(body, query_block.start_ts, query_block.end_ts, query_block.step)
+    return perform_query(query_block.query_url, client, cache, decoder)
+
+def _stitch_shards(shard_dfs: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Stitch the Grafana DataFrames of a query's time shards back into a single Grafana DataFrame.
+        Series that are missing from a shard are filled with NaN and a timestamp that appears in
+        more than one shard (on a shard boundary) is only kept once.
+
+    Args:
+        shard_dfs (list[pd.DataFrame]): The shard DataFrames in chronological order.
+
+    Returns:
+        pd.DataFrame: The stitched Grafana DataFrame, columns are ordered like an unsharded
+            query's.
+    """
+    if(len(shard_dfs) == 1):
+        return shard_dfs[0]
+
+    df = pd.concat(shard_dfs, axis=0, ignore_index=True, sort=False)
+    df = df.drop_duplicates(subset="Time", keep="first").reset_index(drop=True)
+
+    value_columns = sorted(column for column in df.columns if column != "Time")
+    return df[["Time"] + value_columns]
+
+def _join_namespace_groups(group_dfs: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Join the Grafana DataFrames of a query's namespace groups column-wise into a single Grafana
+        DataFrame. Groups can overlap (see query_designer#partition_namespaces), a series that is
+        returned by more than one group is only kept once.
+
+    Args:
+        group_dfs (list[pd.DataFrame]): The namespace group DataFrames.
+
+    Returns:
+        pd.DataFrame: The joined Grafana DataFrame with rows in chronological order and columns
+            ordered like an unpartitioned query's.
+    """
+    if(len(group_dfs) == 1):
+        return group_dfs[0]
+
+    df = pd.concat([group_df.set_index("Time") for group_df in group_dfs], axis=1, sort=False)
+    df = df.loc[:, ~df.columns.duplicated()]
+    df = df.sort_index()
+
+    df = df[sorted(df.columns)]
+    df.index.name = "Time"
+
+    return df.reset_index()
+
 def _filter_to_running_pending(prog_data: ProgramData, data_repo: DataRepository) -> DataRepository:
     """
     Filter a DataRepository containing multiple SourceQueryIdentifiers to SourceIdentifiers
         based off of their running/pending status.
+    Every (status, truth) pair is independent, with ingest.filter_processes > 1 the pairs are
+        preprocessed and filtered in a process pool.
 
     Args:
         data_repo (DataRepository): The input repository, contains SourceQueryIdentifiers to
@@ -75,42 +203,242 @@ def _filter_to_running_pending(prog_data: ProgramData, data_repo: DataRepository
     out_repository = DataRepository()
 
     step = prog_data.config["step"]
+    verbose = getattr(prog_data.args, "verbose", False)
+    processes = prog_data.get_option("ingest.filter_processes", "filter_processes", 1)
+    total_report = PreprocessReport()
+
+    filter_plan = _plan_running_pending(data_repo)
+    pair_count = sum(len(pairs) for _, pairs in filter_plan)
+
+    if(processes > 1 and pair_count > 1):
+        print(f"  Filtering {pair_count} DataFrame(s) with {processes} processes.")
+        results = _filter_plan_parallel(data_repo, filter_plan, step, processes)
+    else:
+        results = _filter_plan_serial(data_repo, filter_plan, step)
 
-    # Get filter lambdas for both source query types
-    source_query_type_lambda = filter_type(SourceQueryIdentifier)
-    status_lambda = lambda id: source_query_type_lambda(id) and id.query_name == "status"
-    truth_lambda = lambda id: source_query_type_lambda(id) and id.query_name == "truth"
+    for source_identifier, report, output in results:
+        total_report += report
+        if(verbose):
+            print(f"  {source_identifier}: {report}")
 
-    for status_identifier in data_repo.filter_ids(status_lambda):
-        status_df_raw = data_repo.get_data(status_identifier)
-        status_df = _preprocess_df(status_df_raw, False, step)
+        if(output is not None):
+            out_repository.add(*output)
 
+    print(f"Preprocessed {total_report}.")
+
+    return out_repository
+
+def _plan_running_pending(data_repo: DataRepository) -> list:
+    """
+    Pair every status SourceQueryIdentifier with the truth SourceQueryIdentifiers of its period.
+
+    Args:
+        data_repo (DataRepository): The repository containing SourceQueryIdentifiers.
+
+    Returns:
+        list[tuple[SourceQueryIdentifier, list[tuple[SourceQueryIdentifier, SourceIdentifier]]]]:
+            Each status identifier with the truth identifiers to filter by it and the
+            SourceIdentifiers their results are stored as.
+    """
+    filter_plan = []
+
+    status_identifiers = [identifier for identifier in data_repo.query(SourceQueryIdentifier) if identifier.query_name == "status"]
+
+    for status_identifier in status_identifiers:
         # Tracks the set of created types, used to protect from creating multiple SourceIdentifiers
         #   with the same start_ts, end_ts, and type        
         created_types = set() 
+        pairs = []
 
-        # Filter identifiers with type SourceQueryIdentifier, query_name=truth, and matching 
-        #   timestamps 
-        timestamps_filter = filter_timestamps(status_identifier.start_ts, status_identifier.end_ts)
-        identifiers_filter = lambda identifier: truth_lambda(identifier) and timestamps_filter(identifier)
-        identifiers = data_repo.filter_ids(identifiers_filter)
+        # Find identifiers with type SourceQueryIdentifier, query_name=truth, and matching
+        #   timestamps through the repository's indexes
+        period = (status_identifier.start_ts, status_identifier.end_ts)
+        identifiers = [identifier for identifier in data_repo.query(SourceQueryIdentifier, period=period) if identifier.query_name == "truth"]
 
         for values_identifier in identifiers:
             if(values_identifier.type in created_types):
                 print(f"ERROR: Identifier of type \"{values_identifier.type}\" is already in created_types for this timestamp range. This shouldn't happen.")
                 continue
-        
-            values_df_raw = data_repo.get_data(values_identifier)
-
-            values_df = _preprocess_df(values_df_raw, True, step)
-            values_df = _apply_status_df(status_df, values_df)
 
             identifier = SourceIdentifier(values_identifier.start_ts, values_identifier.end_ts, values_identifier.type)
-            out_repository.add(identifier, values_df)         
+            pairs.append((values_identifier, identifier))
 
             created_types.add(identifier.type)   
 
-    return out_repository
+        filter_plan.append((status_identifier, pairs))
+
+    return filter_plan
+
+def _filter_plan_serial(data_repo: DataRepository, filter_plan: list, step):
+    """
+    Run a plan from _plan_running_pending in this process.
+
+    Yields:
+        tuple[SourceQueryIdentifier, PreprocessReport, tuple]: Each preprocessed identifier, what
+            was done to it and the (SourceIdentifier, DataFrame) to store for truth identifiers,
+            None for status identifiers. In plan order.
+    """
+    for status_identifier, pairs in filter_plan:
+        status_df, report = _preprocess_df_report(data_repo.get_data(status_identifier), False, step)
+        yield status_identifier, report, None
+
+        for values_identifier, identifier in pairs:
+            values_df, report = _filter_values_df(status_df, data_repo.get_data(values_identifier), step)
+            yield values_identifier, report, (identifier, values_df)
+
+def _filter_plan_parallel(data_repo: DataRepository, filter_plan: list, step, processes: int):
+    """
+    Run a plan from _plan_running_pending in a process pool. Where fork is available the workers
+        read source frames from the DataRepository they inherit, without copying it. Otherwise
+        source frames are passed to the workers through shared memory. Preprocessed status frames
+        and results always come back through shared memory (see shared_frames), not pickles.
+    At most 2*processes truth frames are in flight so only a few results are held in shared
+        memory at once, results are yielded in plan order.
+
+    Yields:
+        tuple[SourceQueryIdentifier, PreprocessReport, tuple]: See _filter_plan_serial.
+    """
+    max_pending = 2 * processes
+    # (values_identifier, identifier, future, values_source, status_frame), status_frame is only
+    #   set on the last pair of each status identifier so it's unlinked once all pairs are done
+    pending = deque()
+    owned_frames = {} # Frames this process is responsible for unlinking, by name
+
+    fork = "fork" in multiprocessing.get_all_start_methods()
+
+    def own(frame):
+        if(isinstance(frame, SharedFrame)):
+            owned_frames[frame.name] = frame
+        return frame
+
+    def release(frame):
+        if(isinstance(frame, SharedFrame)):
+            unlink_frame(owned_frames.pop(frame.name))
+
+    def source(identifier):
+        return identifier if fork else own(share_frame(data_repo.get_data(identifier)))
+
+    def submit_status(index):
+        if(index >= len(filter_plan)):
+            return None
+        status_source = source(filter_plan[index][0])
+        return executor.submit(_preprocess_source, status_source, False, step), status_source
+
+    def collect_pair():
+        values_identifier, identifier, future, values_source, status_frame = pending.popleft()
+        out_frame, report = future.result()
+        release(values_source)
+        release(status_frame)
+        return values_identifier, report, (identifier, take_frame(out_frame))
+
+    # Workers must share this process' resource tracker, a tracker started by a worker would
+    #   unlink the blocks the worker created when it exits
+    if(os.name == "posix"):
+        resource_tracker.ensure_running()
+
+    if(fork):
+        executor = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("fork"), initializer=_init_filter_worker, initargs=(data_repo,))
+    else:
+        executor = ProcessPoolExecutor(max_workers=processes)
+
+    next_status = None
+    try:
+        # The next status frame is preprocessed while the current one's pairs are filtered
+        next_status = submit_status(0)
+        for index, (status_identifier, pairs) in enumerate(filter_plan):
+            status_future, status_source = next_status
+            status_frame, report = status_future.result()
+            own(status_frame)
+            release(status_source)
+            next_status = submit_status(index + 1)
+
+            yield status_identifier, report, None
+
+            if(len(pairs) == 0):
+                release(status_frame)
+
+            for pair_index, (values_identifier, identifier) in enumerate(pairs):
+                while(len(pending) >= max_pending):
+                    yield collect_pair()
+
+                values_source = source(values_identifier)
+                future = executor.submit(_filter_values_source, status_frame, values_source, step)
+                last_pair = pair_index == len(pairs) - 1
+                pending.append((values_identifier, identifier, future, values_source, status_frame if last_pair else None))
+
+        while(len(pending) > 0):
+            yield collect_pair()
+    finally:
+        # Only reached with work left on failure, wait for running tasks so none of their
+        #   results are left behind in shared memory
+        executor.shutdown(wait=True, cancel_futures=True)
+        futures = [entry[2] for entry in pending] + ([next_status[0]] if next_status is not None else [])
+        for future in futures:
+            if(future.done() and not future.cancelled() and future.exception() is None):
+                unlink_frame(future.result()[0])
+        for frame in owned_frames.values():
+            unlink_frame(frame)
+
+def _filter_values_df(status_df: pd.DataFrame, values_df_raw: pd.DataFrame, step):
+    """
+    Preprocess a truth DataFrame and apply a preprocessed status DataFrame to it.
+
+    Returns:
+        tuple[pd.DataFrame, PreprocessReport]: The filtered DataFrame and what preprocessing did
+            to it.
+    """
+    values_df, report = _preprocess_df_report(values_df_raw, True, step)
+    return _apply_status_df(status_df, values_df), report
+
+# The DataRepository a forked filter worker reads source frames from, see _filter_plan_parallel
+_worker_data_repo: DataRepository = None
+
+def _init_filter_worker(data_repo: DataRepository):
+    global _worker_data_repo
+    _worker_data_repo = data_repo
+
+def _open_source(source):
+    """
+    Get the DataFrame of a filter worker's source, a SourceQueryIdentifier in the inherited
+        DataRepository or a SharedFrame.
+
+    Returns:
+        tuple[pd.DataFrame, SharedMemory]: The DataFrame and the shared memory block to close
+            once it's no longer used, None if it isn't shared.
+    """
+    if(isinstance(source, SharedFrame)):
+        return open_frame(source)
+    return _worker_data_repo.get_data(source), None
+
+def _preprocess_source(source, preserve_columns, step):
+    """
+    _preprocess_df_report for a process pool worker, the result is returned in a new shared
+        memory block owned by the caller.
+    """
+    df, shm = _open_source(source)
+    try:
+        out_df, report = _preprocess_df_report(df, preserve_columns, step)
+    finally:
+        del df
+        if(shm is not None):
+            shm.close()
+    return share_frame(out_df), report
+
+def _filter_values_source(status_frame: SharedFrame, values_source, step):
+    """
+    _filter_values_df for a process pool worker, the result is returned in a new shared memory
+        block owned by the caller.
+    """
+    status_df, status_shm = open_frame(status_frame)
+    values_df, values_shm = _open_source(values_source)
+    try:
+        out_df, report = _filter_values_df(status_df, values_df, step)
+    finally:
+        del status_df, values_df
+        status_shm.close()
+        if(values_shm is not None):
+            values_shm.close()
+    return share_frame(out_df), report
 
 def _filter_cols_zero(df: pd.DataFrame):
     """
@@ -126,9 +454,6 @@ def _filter_cols_zero(df: pd.DataFrame):
     df.drop(columns=df.columns[df.sum() == 0], inplace=True)
     return df    
 
-import time
-import numpy as np
-
 def _merge_columns_on_uid(df: pd.DataFrame, preserve_columns: bool = False):
     """
     Takes the max value from each uid in the DataFrame and places it in a single row, this
@@ -141,56 +466,38 @@ def _merge_columns_on_uid(df: pd.DataFrame, preserve_columns: bool = False):
     Returns:
         pd.DataFrame: The adjusted DataFrame with squashed columns.
     """
-    # Holds string uid key with original column name values
-    orig_names = {}
-
-    def select_uid(string):
-        if(string == "Time"):
-            return string
-
-        match = re.search(r'uid="([^"]+)"', string)
-        if match:
-            uid = match.group(1)
-
-            # Store first instance of the uid's original name, pandas will append .X to duplicate 
-            #   column names
-            if(preserve_columns and uid not in orig_names):
-                orig_names[uid] = string
-
-            return uid
-        else:
-            raise Exception(f"Failed to read uid in column name \"{string}\"")
-
-    time_col = df['Time'] # Separate Time column
-    df = df.drop(columns='Time')
-
-    uids = [select_uid(col) for col in df.columns]
-    df.columns = uids
-
-    seen_uids = set() # The set of uids that have been visited in the loop
-    duplicate_uids = set() # The set of uids that have more than one column
-    for uid in uids:
-        if(uid in seen_uids):
-            duplicate_uids.add(uid)
-        
-        seen_uids.add(uid)
-        
-    static_df = df[list(seen_uids-duplicate_uids)]
-
-    to_merge_df = df[list(duplicate_uids)]
-    to_merge_df = to_merge_df.T.groupby(to_merge_df.columns).max().T # Merge columns with the same UID
-
-    df = pd.concat([static_df, to_merge_df], axis=1)
-
-    order = np.argsort(df.columns)
-    df = df.iloc[:, order]
+    value_positions = np.flatnonzero(df.columns != "Time")
+    value_columns = df.columns[value_positions]
+    uids = label_table(df).require("uid", value_positions)
+
+    # Group columns by uid, groups are ordered by uid and the sort is stable so the first column
+    #   of each uid (the one whose name is preserved) is first in its group
+    order = np.argsort(uids, kind="stable")
+    sorted_uids = uids[order]
+    sorted_positions = value_positions[order]
+    is_group_start = np.ones(len(sorted_uids), dtype=bool)
+    is_group_start[1:] = sorted_uids[1:] != sorted_uids[:-1]
+    group_starts = np.flatnonzero(is_group_start)
+    group_sizes = np.diff(np.append(group_starts, len(sorted_uids)))
+
+    # Start from the first column of every group, then fold in the k-th column of the groups
+    #   that have one. Only duplicate columns are copied a second time, the full matrix is never
+    #   reordered or transposed. NaNs are ignored unless the whole group is NaN.
+    values = df.iloc[:, sorted_positions[group_starts]].to_numpy(dtype=np.float64)
+    for k in range(1, group_sizes.max(initial=1)):
+        groups = np.flatnonzero(group_sizes > k)
+        kth_values = df.iloc[:, sorted_positions[group_starts[groups] + k]].to_numpy(dtype=np.float64)
+        values[:, groups] = np.fmax(values[:, groups], kth_values)
 
     if(preserve_columns):
-        df.columns = [orig_names[uid] for uid in df.columns]
+        columns = value_columns[order][group_starts]
+    else:
+        columns = sorted_uids[group_starts]
 
-    df.insert(0, 'Time', time_col) # Reattach Time column
+    out_df = pd.DataFrame(values, columns=columns, index=df.index)
+    out_df.insert(0, 'Time', df['Time']) # Reattach Time column
 
-    return df
+    return out_df
 
 def _infer_times(df: pd.DataFrame, step):
     """
@@ -206,104 +513,242 @@ def _infer_times(df: pd.DataFrame, step):
         pd.DataFrame: The adjusted DataFrame with inferred time rows.    
     """
 
-    columns_excluding_time = list(df.columns)
-    columns_excluding_time.remove("Time")
+    if(len(df) < 2):
+        return df
 
-    i = 0
-    while i < len(df["Time"]) - 1:
-        
-        time = to_unix_ts(df["Time"][i])
-        next_time = to_unix_ts(df["Time"][i+1])
-        time_offset = next_time-time
+    times = df["Time"].to_numpy(dtype=np.int64)
+    source_rows, offsets = _infer_time_rows(times, step)
 
-        if(time_offset <= step):
-            i += 1
-            continue
+    if(len(source_rows) == len(df)):
+        return df
 
-        rows_to_add = math.floor(time_offset/step)
+    inferred = offsets > 0
+    labels = np.where(inferred, -1, source_rows)
 
-        times_arr = [from_unix_ts(time + j*step) for j in range(1, rows_to_add)]
-        times_dict = { "Time": times_arr } 
+    out_df = df.reset_index(drop=True).reindex(labels).reset_index(drop=True)
+    out_df["Time"] = times[source_rows] + offsets * step
 
-        rows_arr = [float('NaN')]*len(times_arr)
-        rows_dict = { key: rows_arr for key in columns_excluding_time }
+    return out_df
 
-        final_df = times_dict | rows_dict
+def _infer_time_rows(times: np.ndarray, step):
+    """
+    Lay out the rows of a DataFrame with inferred times, see _infer_times. A gap of time_offset
+        seconds after a row is filled with floor(time_offset/step)-1 rows, stepping from the row
+        before the gap.
 
-        rows_df = pd.DataFrame(final_df)        
-                
-        df = pd.concat([df.iloc[:i+1], rows_df, df.iloc[i+1:]]).reset_index(drop=True)
+    Args:
+        times (np.ndarray): The UNIX timestamps of the DataFrame's rows.
+        step (int): The time in seconds between expected steps.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: For each output row, the row it comes from (or steps from
+            if it's inferred) and its offset in steps from that row, 0 for existing rows.
+    """
+    row_counts = np.ones(len(times), dtype=np.int64)
+    if(len(times) > 1):
+        gaps = np.diff(times)
+        row_counts[:-1] += np.where(gaps > step, gaps // step - 1, 0)
 
-        i += rows_to_add
+    # Inferred rows are placed after the row they step from
+    source_rows = np.repeat(np.arange(len(times)), row_counts)
+    offsets = np.arange(len(source_rows)) - np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
 
-    return df
+    return source_rows, offsets
+
+@dataclass
+class PreprocessReport():
+    """
+    What _preprocess_df did to a DataFrame.
+    """
+    columns: int = 0 # Value columns in the input DataFrame
+    dropped_columns: int = 0 # Columns with a sum of 0
+    merged_columns: int = 0 # Columns merged into another column with the same uid
+    inferred_rows: int = 0
+
+    def __add__(self, other):
+        return PreprocessReport(
+            self.columns + other.columns,
+            self.dropped_columns + other.dropped_columns,
+            self.merged_columns + other.merged_columns,
+            self.inferred_rows + other.inferred_rows
+        )
+
+    def __str__(self):
+        return f"{self.columns} column(s): dropped {self.dropped_columns} empty, merged {self.merged_columns} duplicate uid column(s), inferred {self.inferred_rows} row(s)"
 
 def _preprocess_df(df: pd.DataFrame, preserve_columns, step):
-    df = _filter_cols_zero(df)
-    df = _merge_columns_on_uid(df, preserve_columns)
-    df = _infer_times(df, step)
-    return df
+    """
+    The same as _filter_cols_zero, _merge_columns_on_uid then _infer_times, see
+        _preprocess_df_report.
+    """
+    return _preprocess_df_report(df, preserve_columns, step)[0]
 
-def _apply_status_df(status_df, values_df):
+def _preprocess_df_report(df: pd.DataFrame, preserve_columns, step, chunk_size = 4096):
     """
-    Apply the status DataFrame to the values DataFrame, only accepting values from the values_df
-        when the status_df has a 1 in that cell position.
-    Cells are identified by column=uid and row=timestamp, so the status_df and the values_df must
-        have matching time columns.
+    Drop columns with a sum of 0, merge columns with the same uid and infer missing times in a
+        single pass. The result is the same as running _filter_cols_zero, _merge_columns_on_uid
+        and _infer_times one after another but labels are only parsed once, the input DataFrame
+        isn't modified and the only full size allocation is the output matrix.
+    Columns are visited in uid order, a chunk at a time. Each chunk is copied out of the
+        DataFrame once and its merged columns are written straight to their rows in the output.
 
     Args:
-        status_df (pd.DataFrame): The DataFrame holding running/pending statuses.
-        values_df (pd.DataFrame): The DataFrame holding the usage values.
+        df (pd.DataFrame): The Grafana DataFrame to preprocess.
+        preserve_columns (bool): Keep the column names as they were or replace with only UIDs.
+        step (int): The time in seconds between expected steps.
+        chunk_size (int): The amount of uids whose columns are processed at once.
 
     Returns:
-        pd.DataFrame: The values DataFrame with the running/pending statuses applied.
+        tuple[pd.DataFrame, PreprocessReport]: The preprocessed DataFrame and what was done to it.
     """
+    value_positions = np.flatnonzero(df.columns != "Time")
+    value_columns = df.columns[value_positions]
+    uids = label_table(df).require("uid", value_positions)
+
+    # Visit columns grouped by uid, the sort is stable so the first column of each uid stays first
+    order = np.argsort(uids, kind="stable")
+    sorted_uids = uids[order]
+    sorted_positions = value_positions[order]
+    sorted_names = value_columns[order] if preserve_columns else sorted_uids
+
+    is_group_start = np.ones(len(sorted_uids), dtype=bool)
+    is_group_start[1:] = sorted_uids[1:] != sorted_uids[:-1]
+    group_starts = np.flatnonzero(is_group_start)
+
+    # Rows of the output. Existing rows are copied in runs of consecutive rows (the rows between
+    #   gaps), inferred rows are left NaN.
+    times = df["Time"].to_numpy(dtype=np.int64)
+    source_rows, offsets = _infer_time_rows(times, step)
+    inferred = offsets > 0
+
+    existing_rows = np.flatnonzero(~inferred)
+    run_breaks = np.flatnonzero(np.diff(existing_rows) != 1) + 1
+    run_starts = np.concatenate(([0], run_breaks))
+    run_ends = np.append(run_breaks, len(existing_rows))
+    row_runs = [(existing_rows[run_start], existing_rows[run_start] + run_end - run_start, run_start, run_end) for run_start, run_end in zip(run_starts, run_ends) if run_end > run_start]
+
+    report = PreprocessReport(columns=len(value_columns), inferred_rows=int(inferred.sum()))
+
+    # The output is column-major like the decoder's matrices (see query_decoder#_MatrixBuilder) so
+    #   every column is contiguous. Kept columns are packed to the left, dropped uids leave unused
+    #   columns on the right that are sliced off without a copy at the end.
+    out = np.full((len(source_rows), len(group_starts)), np.nan, dtype=np.float64, order="F")
+    out_columns = []
+
+    # Chunks always end on a uid group boundary
+    chunk_bounds = np.append(group_starts[::max(1, chunk_size)], len(sorted_uids)) if len(group_starts) > 0 else []
+    for chunk_start, chunk_end in zip(chunk_bounds[:-1], chunk_bounds[1:]):
+        values = np.asfortranarray(df.iloc[:, sorted_positions[chunk_start:chunk_end]].to_numpy(dtype=np.float64))
+
+        # Drop columns with a sum of 0 (all 0 or NaN) before merging, so they can't turn a NaN
+        #   of another column with the same uid into a 0
+        kept = np.flatnonzero(_has_nonzero_sum(values))
+        report.dropped_columns += (chunk_end - chunk_start) - len(kept)
+        chunk_uids = sorted_uids[chunk_start:chunk_end][kept]
+        chunk_names = sorted_names[chunk_start:chunk_end][kept]
+
+        if(len(chunk_uids) == 0):
+            continue
 
-    def select_uid(string):
-        if(string == "Time"):
-            return string
+        chunk_is_start = np.ones(len(chunk_uids), dtype=bool)
+        chunk_is_start[1:] = chunk_uids[1:] != chunk_uids[:-1]
+        chunk_starts = np.flatnonzero(chunk_is_start)
+        chunk_sizes = np.diff(np.append(chunk_starts, len(chunk_uids)))
+        report.merged_columns += len(chunk_uids) - len(chunk_starts)
+
+        # Fold the k-th kept column of every group into its first, see _merge_columns_on_uid
+        merged = values if len(chunk_starts) == values.shape[1] else values[:, kept[chunk_starts]]
+        for k in range(1, chunk_sizes.max()):
+            groups = np.flatnonzero(chunk_sizes > k)
+            merged[:, groups] = np.fmax(merged[:, groups], values[:, kept[chunk_starts[groups] + k]])
+
+        out_start = len(out_columns)
+        out_end = out_start + len(chunk_starts)
+        for out_row_start, out_row_end, row_start, row_end in row_runs:
+            out[out_row_start:out_row_end, out_start:out_end] = merged[row_start:row_end]
+        out_columns.extend(chunk_names[chunk_starts])
+
+    if(len(out_columns) < len(group_starts)):
+        out = out[:, :len(out_columns)]
+        if(len(out_columns) < len(group_starts) // 2):
+            # Don't hold on to a mostly unused allocation
+            out = out.copy(order="F")
+
+    index = df.index if report.inferred_rows == 0 else None
+    out_df = pd.DataFrame(out, columns=pd.Index(out_columns, dtype=object), index=index, copy=False)
+
+    if(report.inferred_rows == 0):
+        out_df.insert(0, "Time", df["Time"])
+    else:
+        out_df.insert(0, "Time", times[source_rows] + offsets * step)
+
+    return out_df, report
+
+def _has_nonzero_sum(values: np.ndarray) -> np.ndarray:
+    """
+    For each column of a matrix check if its sum, ignoring NaN, isn't 0. Columns where every value
+        has the same sign only sum to 0 if all of their values are 0 or NaN, which the column
+        max and min can tell without the temporary copy np.nansum makes. Only columns with
+        values of both signs are summed.
 
-        match = re.search(r'uid="([^"]+)"', string)
-        if match:
-            uid = match.group(1)
-            return uid
-        else:
-            raise Exception(f"Failed to read uid in column name \"{string}\"")
+    Args:
+        values (np.ndarray): The matrix.
 
-    start_ts = to_unix_ts(values_df["Time"][0])
-    end_ts = to_unix_ts(list(values_df["Time"])[-1])
+    Returns:
+        np.ndarray: A boolean for each column, True if its sum isn't 0.
+    """
+    with np.errstate(invalid="ignore"):
+        col_max = np.fmax.reduce(values, axis=0) # NaN if the column is all NaN
+        col_min = np.fmin.reduce(values, axis=0)
 
-    times_list = [to_unix_ts(time) for time in status_df["Time"]]
+    nonzero = ((col_max != 0) & ~np.isnan(col_max)) | ((col_min != 0) & ~np.isnan(col_min))
 
-    try:
-        start_index = times_list.index(start_ts)
-    except ValueError:
-        start_index = 0
+    mixed_signs = np.flatnonzero((col_min < 0) & (col_max > 0))
+    if(len(mixed_signs) > 0):
+        nonzero[mixed_signs] = np.nansum(values[:, mixed_signs], axis=0) != 0
 
-    try:
-        end_index = times_list.index(end_ts)
-    except ValueError:
-        end_index = len(times_list)-1
+    return nonzero
 
-    drop_columns = []
+def _apply_status_df(status_df, values_df):
+    """
+    Apply the status DataFrame to the values DataFrame, only accepting values from the values_df
+        when the status_df has a 1 in that cell position.
+    Cells are identified by column=uid and row=timestamp, so the status_df and the values_df must
+        have matching time columns.
 
-    for column in values_df.columns:
-        if(column == "Time"):
-            continue
+    Args:
+        status_df (pd.DataFrame): The DataFrame holding running/pending statuses.
+        values_df (pd.DataFrame): The DataFrame holding the usage values.
 
-        uid = select_uid(column)
+    Returns:
+        pd.DataFrame: The values DataFrame with the running/pending statuses applied.
+    """
 
-        if(uid not in status_df.columns):
-            drop_columns.append(column)
-            continue
+    value_positions = np.flatnonzero(values_df.columns != "Time")
+    value_columns = values_df.columns[value_positions]
+    uids = label_table(values_df).require("uid", value_positions)
 
-        status_column = status_df[uid].iloc[range(start_index, end_index+1)]
-        status_column.index = values_df.index
+    # The status rows covering the values DataFrame's period
+    times = status_df["Time"].to_numpy(dtype=np.int64)
+    start_ts, end_ts = int(values_df["Time"].iloc[0]), int(values_df["Time"].iloc[-1])
+    start_matches = np.flatnonzero(times == start_ts)
+    end_matches = np.flatnonzero(times == end_ts)
+    start_index = start_matches[0] if len(start_matches) > 0 else 0
+    end_index = end_matches[0] if len(end_matches) > 0 else len(times)-1
 
-        values_df[column] = values_df[column].where(status_column == 1)
+    if(end_index - start_index + 1 != len(values_df)):
+        raise ValueError(f"Can't apply status DataFrame, its {end_index - start_index + 1} rows between {from_unix_ts(start_ts)} and {from_unix_ts(end_ts)} don't match the {len(values_df)} rows of the values DataFrame.")
 
-    values_df.drop(columns=drop_columns, inplace=True)
+    # Values columns are dropped if their uid doesn't have a status column
+    status_positions = status_df.columns.get_indexer(uids)
+    has_status = status_positions >= 0
+    kept_columns = value_columns[has_status]
 
-    return values_df
+    status = status_df.iloc[start_index:end_index+1, status_positions[has_status]].to_numpy(dtype=np.float64)
+    values = values_df[kept_columns].to_numpy(dtype=np.float64, copy=True)
+    values[status != 1] = np.nan
 
+    out_df = pd.DataFrame(values, columns=kept_columns, index=values_df.index)
+    out_df.insert(0, "Time", values_df["Time"])
 
+    return out_df
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+Shared Frames move Grafana DataFrames between processes through shared memory. A DataFrame's
+  values are copied into a multiprocessing.shared_memory block once and only a small SharedFrame
+  handle (the block's name, the Time column and the column names) is pickled. Without this a
+  process pool pickles the whole matrix through a pipe, copying it several times on each side.
+Every block has a single owner that is responsible for unlinking it, see unlink_frame and
+  take_frame.
+"""
+
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+@dataclass(frozen=True)
+class SharedFrame():
+    """
+    A handle to a Grafana DataFrame stored in shared memory, cheap to pickle.
+    """
+    name: str # The name of the shared memory block holding the column-major values matrix
+    shape: tuple
+    columns: pd.Index # The value column names
+    time: np.ndarray # The Time column, int64 UNIX timestamps
+    index: pd.Index
+
+def share_frame(df: pd.DataFrame) -> SharedFrame:
+    """
+    Copy the values of a Grafana DataFrame into a new shared memory block. The block outlives
+        this process' handle to it and must be unlinked by its owner once no process needs it.
+
+    Args:
+        df (pd.DataFrame): The Grafana DataFrame, every column other than Time must be numeric.
+
+    Returns:
+        SharedFrame: The handle to the shared DataFrame.
+    """
+    # A slice of the columns after Time is a view of a DataFrame with a single values block, so
+    #   the values are only copied once, straight into shared memory
+    values_df = df.iloc[:, 1:] if df.columns[0] == "Time" else df.drop(columns="Time")
+    value_columns = values_df.columns
+    shape = values_df.shape
+
+    # Empty blocks aren't allowed
+    shm = SharedMemory(create=True, size=max(1, shape[0] * shape[1] * np.dtype(np.float64).itemsize))
+    try:
+        values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf, order="F")
+        values[:] = values_df.to_numpy(dtype=np.float64)
+        del values
+    except:
+        shm.close()
+        shm.unlink()
+        raise
+
+    shm.close()
+    return SharedFrame(shm.name, shape, value_columns, df["Time"].to_numpy(), df.index)
+
+def open_frame(frame: SharedFrame) -> tuple[pd.DataFrame, SharedMemory]:
+    """
+    Open a shared DataFrame without copying its values. The DataFrame is only valid while the
+        returned SharedMemory is open, it must be closed (not unlinked) after every reference to
+        the DataFrame is gone.
+
+    Args:
+        frame (SharedFrame): The handle to the shared DataFrame.
+
+    Returns:
+        tuple[pd.DataFrame, SharedMemory]: The Grafana DataFrame backed by shared memory and the
+            handle to its block.
+    """
+    shm = SharedMemory(name=frame.name)
+    values = np.ndarray(frame.shape, dtype=np.float64, buffer=shm.buf, order="F")
+
+    df = pd.DataFrame(values, columns=frame.columns, index=frame.index, copy=False)
+    df.insert(0, "Time", frame.time)
+    return df, shm
+
+def take_frame(frame: SharedFrame) -> pd.DataFrame:
+    """
+    Copy a shared DataFrame into this process' memory then unlink its block, taking ownership
+        of the DataFrame.
+
+    Args:
+        frame (SharedFrame): The handle to the shared DataFrame.
+
+    Returns:
+        pd.DataFrame: The Grafana DataFrame.
+    """
+    shm = SharedMemory(name=frame.name)
+    try:
+        values = np.array(np.ndarray(frame.shape, dtype=np.float64, buffer=shm.buf, order="F"), order="F")
+    finally:
+        shm.close()
+        shm.unlink()
+
+    df = pd.DataFrame(values, columns=frame.columns, index=frame.index, copy=False)
+    df.insert(0, "Time", frame.time)
+    return df
+
+def unlink_frame(frame: SharedFrame):
+    """
+    Unlink the block of a shared DataFrame, processes that have it open can keep using it until
+        they close it.
+
+    Args:
+        frame (SharedFrame): The handle to the shared DataFrame.
+    """
+    try:
+        shm = SharedMemory(name=frame.name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
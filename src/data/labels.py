@@ -0,0 +1,186 @@
+"""
+Labels reads the {label="value", ...} column names of Grafana DataFrames. Every module that needs
+  a column's labels gets them from here instead of parsing column names itself.
+A LabelTable holds the labels of a set of columns as categorical arrays, one per label, parsed
+  the first time each label is requested. Tables are cached per columns Index and parsed values
+  are cached per column name, so a label is only parsed once no matter how many analyses read it.
+"""
+
+import re
+import weakref
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# The amount of (column name, label) values kept by get_label, a year of data has ~1M columns
+#   but analyses work on a month at a time
+LABEL_CACHE_SIZE = 1 << 17
+
+_label_pair_regex = re.compile(r'(\w+)\s*=\s*"([^"]*)"')
+
+@lru_cache(maxsize=None)
+def _label_regexes(label: str) -> tuple[re.Pattern, re.Pattern]:
+    """
+    The regex for label="value" and a slower one that allows whitespace around the =.
+    """
+    return re.compile(re.escape(label) + r'="([^"]*)"'), re.compile(re.escape(label) + r'\s*=\s*"([^"]*)"')
+
+@lru_cache(maxsize=LABEL_CACHE_SIZE)
+def get_label(column: str, label: str) -> str:
+    """
+    Read a single label of a column name.
+
+    Args:
+        column (str): The column name, {label1="value1", label2="value2", ...}. Whitespace around
+            labels is ignored (custom .csv files have "{ namespace=...").
+        label (str): The label to read.
+
+    Returns:
+        str: The label's value, None if the column doesn't have the label.
+    """
+    # A literal search is much faster than a regex that checks where the label starts, a match is
+    #   only rejected if it's the end of a longer label (i.e. pod_uid= for uid=)
+    for regex in _label_regexes(label):
+        match = regex.search(column)
+        while(match is not None):
+            if(match.start() == 0 or column[match.start()-1] in "{, \t"):
+                return match.group(1)
+            match = regex.search(column, match.start() + 1)
+    return None
+
+@lru_cache(maxsize=LABEL_CACHE_SIZE)
+def _parse_label_pairs(column: str) -> tuple:
+    return tuple(_label_pair_regex.findall(column))
+
+def parse_labels(column: str) -> dict:
+    """
+    Read every label of a column name.
+
+    Args:
+        column (str): The column name, {label1="value1", label2="value2", ...}.
+
+    Returns:
+        dict: The labels and their values.
+    """
+    return dict(_parse_label_pairs(column))
+
+class LabelTable():
+    """
+    The labels of a set of columns, one categorical array per label with an entry for each column
+      in order. Columns without a label (i.e. Time) are missing from its array. Use label_table
+      to get the cached table of a DataFrame's columns.
+    """
+
+    def __init__(self, columns):
+        """
+        Args:
+            columns (pd.Index): The column names.
+        """
+        # The names are held instead of the Index so the table doesn't keep the Index alive
+        self._names = np.asarray(columns, dtype=object)
+        self._values = {}
+        self._codes = {}
+
+    def __len__(self):
+        return len(self._names)
+
+    def values(self, label: str) -> np.ndarray:
+        """
+        Args:
+            label (str): The label to read.
+
+        Returns:
+            np.ndarray: The label's value for each column, None where a column doesn't have it.
+        """
+        if(label not in self._values):
+            self._values[label] = np.array([get_label(name, label) if isinstance(name, str) else None for name in self._names], dtype=object)
+        return self._values[label]
+
+    def codes(self, label: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            label (str): The label to read.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The code of each column's value (-1 where a column
+                doesn't have the label) and the unique values in order of appearance.
+        """
+        if(label not in self._codes):
+            codes, categories = pd.factorize(self.values(label), use_na_sentinel=True)
+            self._codes[label] = (codes, np.asarray(categories, dtype=object))
+        return self._codes[label]
+
+    def categorical(self, label: str) -> pd.Categorical:
+        """
+        Args:
+            label (str): The label to read.
+
+        Returns:
+            pd.Categorical: The label's value for each column, NaN where a column doesn't have it.
+        """
+        codes, categories = self.codes(label)
+        return pd.Categorical.from_codes(codes, categories)
+
+    def require(self, label: str, positions: np.ndarray = None) -> np.ndarray:
+        """
+        Get a label that every column must have.
+
+        Args:
+            label (str): The label to read.
+            positions (np.ndarray): Only the columns at these positions, all columns if None.
+
+        Returns:
+            np.ndarray: The label's value for each column.
+
+        Raises:
+            Exception: A column doesn't have the label.
+        """
+        values = self.values(label) if positions is None else self.values(label)[positions]
+        names = self._names if positions is None else self._names[positions]
+
+        missing = np.flatnonzero(pd.isna(values))
+        if(len(missing) > 0):
+            raise Exception(f"Failed to read {label} in column name \"{names[missing[0]]}\"")
+        return values
+
+    def to_dataframe(self, labels: list[str] = None) -> pd.DataFrame:
+        """
+        Args:
+            labels (list[str]): The labels to include, every label of every column if None.
+
+        Returns:
+            pd.DataFrame: A row per column and a categorical column per label.
+        """
+        if(labels is None):
+            labels = list(dict.fromkeys(label for name in self._names if isinstance(name, str) for label, _ in _parse_label_pairs(name)))
+        return pd.DataFrame({label: self.categorical(label) for label in labels})
+
+# Tables by the id of their columns Index, entries are removed when the Index is garbage
+#   collected so an id is never reused while it has an entry
+_label_tables: dict[int, LabelTable] = {}
+
+def label_table(columns) -> LabelTable:
+    """
+    Get the cached LabelTable of a DataFrame's columns. Indexes are immutable so a table is valid
+        for as long as its Index exists.
+
+    Args:
+        columns (pd.DataFrame | pd.Index): The DataFrame or its columns. Other sequences of column
+            names get a new table that isn't cached.
+
+    Returns:
+        LabelTable: The labels of every column, including Time (which doesn't have any labels).
+    """
+    if(isinstance(columns, pd.DataFrame)):
+        columns = columns.columns
+    if(not isinstance(columns, pd.Index)):
+        return LabelTable(columns)
+
+    key = id(columns)
+    table = _label_tables.get(key)
+    if(table is None):
+        table = LabelTable(columns)
+        _label_tables[key] = table
+        weakref.finalize(columns, _label_tables.pop, key, None)
+    return table
@@ -22,7 +22,7 @@ class AnalysisSaver(Saver):
 
         # Keep a list of files we've written to so we can clear the contents previously existing files
         self.has_written = set()
-        # Keep a dict of SourceIdentifiers and their corresponding text results
+        # Keep a dict of SourceIdentifiers and their corresponding (analysis, text result) pairs
         self.text_results = {}
 
         for identifier in data_repo.filter_ids(filter_type(AnalysisIdentifier)):
@@ -39,14 +39,18 @@ class AnalysisSaver(Saver):
             else:
                 self.save_meta_analysis(identifier)
 
-        # Save text results, order keys by start time
-        ordered_keys = sorted(self.text_results.keys(), key=lambda x: x.start_ts)
+        # Save text results, order keys by start time and type and each key's results by the order
+        #   of the analysis settings. Results are added to the repository in an order that depends
+        #   on the analysis order, fused and lazy analysis.
+        analysis_positions = {analysis: position for position, analysis in enumerate(self.prog_data.settings["analysis_settings"].keys())}
+        ordered_keys = sorted(self.text_results.keys(), key=lambda x: (x.start_ts, x.type))
         for identifier in ordered_keys:
             metadata = data_repo.get_metadata(identifier)
+            text_results = [text_result for _, text_result in sorted(self.text_results[identifier], key=lambda pair: analysis_positions.get(pair[0], len(analysis_positions)))]
 
-            if(len(self.text_results[identifier]) > 0):
+            if(len(text_results) > 0):
                 path = os.path.join(self.out_path, f"text_results.txt")
-                to_append = f"For {identifier.type}-{metadata["readable_period"]}:\n  {"\n  ".join(self.text_results[identifier])}"
+                to_append = f"For {identifier.type}-{metadata["readable_period"]}:\n  {"\n  ".join(text_results)}"
 
                 append_line_to_file(path, to_append, path not in self.has_written)
                 self.has_written.add(path)
@@ -76,7 +80,7 @@ class AnalysisSaver(Saver):
             print(f"  Saving analysis file \"{path}\"")
             result.to_csv(path, index=False)
         else:
-            self.text_results[src_id].append(f"{identifier.analysis}: {str(result)}")
+            self.text_results[src_id].append((identifier.analysis, f"{identifier.analysis}: {str(result)}"))
 
     def save_meta_analysis(self, identifier):
         data_repo: DataRepository = self.prog_data.data_repo
@@ -4,6 +4,7 @@ from src.program_data.program_data import ProgramData
 from src.data.data_repository import DataRepository
 from src.data.filters import *
 from src.data.saving.saver import Saver
+from src.data.ingest.grafana_df_analyzer import format_time_column
 
 class DataFrameSaver(Saver):
     def __init__(self, prog_data: ProgramData):
@@ -26,4 +27,4 @@ class DataFrameSaver(Saver):
             df_path = os.path.join(out_path, f"{metadata['out_file_name']}.csv")
             print(f"  Saving DataFrame file \"{df_path}\"")
 
-            df.to_csv(df_path, index=False)
\ No newline at end of file
+            format_time_column(df).to_csv(df_path, index=False)
\ No newline at end of file
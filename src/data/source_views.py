@@ -0,0 +1,164 @@
+"""
+Source Views are the derived views of a Grafana DataFrame that several analyses need: the
+  numeric matrix without the Time column, the label table, uid and namespace codes, per-column
+  sums, the mask of columns with a nonzero sum and the uids of those columns. Each view is
+  computed the first time it's requested and kept for the lifetime of the SourceViews.
+The DataRepository keeps a SourceViews per SourceIdentifier (see DataRepository#get_views), so
+  every analysis of a source reuses the same views instead of recomputing them from the frame.
+"""
+
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from src.data.labels import label_table, LabelTable
+
+class SourceViews():
+    """
+    The lazily computed views of a Grafana DataFrame. The DataFrame must not be modified after
+      its views are created, every analysis treats source frames as read only.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Args:
+            df (pd.DataFrame): The Grafana DataFrame, with or without a Time column first.
+        """
+        self.df = df
+
+    @cached_property
+    def value_positions(self) -> np.ndarray:
+        """
+        np.ndarray: The positions of every column in the DataFrame except for the Time column.
+        """
+        return np.arange(1 if self.df.columns[0] == "Time" else 0, self.df.shape[1])
+
+    @cached_property
+    def values(self) -> np.ndarray:
+        """
+        np.ndarray: The float64 matrix of the value columns, a row per time and a column per
+            value position. Only a view of the DataFrame when it has a single float64 block.
+        """
+        values = self.df.iloc[:, self.value_positions].to_numpy(dtype=np.float64)
+        values.flags.writeable = False
+        return values
+
+    @cached_property
+    def labels(self) -> LabelTable:
+        """
+        LabelTable: The labels of every column of the DataFrame, including Time.
+        """
+        return label_table(self.df)
+
+    def label_values(self, label: str) -> np.ndarray:
+        """
+        Args:
+            label (str): The label to read.
+
+        Returns:
+            np.ndarray: The label's value for each value column, None where a column doesn't have
+                it.
+        """
+        return self.labels.values(label)[self.value_positions]
+
+    @cached_property
+    def uids(self) -> np.ndarray:
+        """
+        np.ndarray: The uid of each value column.
+
+        Raises:
+            Exception: A value column doesn't have a uid.
+        """
+        return self.labels.require("uid", self.value_positions)
+
+    @cached_property
+    def uid_codes(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        tuple[np.ndarray, np.ndarray]: The code of each value column's uid and the unique uids in
+            order of appearance, see LabelTable#codes.
+
+        Raises:
+            Exception: A value column doesn't have a uid.
+        """
+        self.uids
+        codes, categories = self.labels.codes("uid")
+        return codes[self.value_positions], categories
+
+    @cached_property
+    def namespace_codes(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        tuple[np.ndarray, np.ndarray]: The code of each value column's namespace (-1 where a
+            column doesn't have one) and the unique namespaces in order of appearance, see
+            LabelTable#codes.
+        """
+        codes, categories = self.labels.codes("namespace")
+        return codes[self.value_positions], categories
+
+    @cached_property
+    def first_uid_columns(self) -> np.ndarray:
+        """
+        np.ndarray: The mask of value columns that are the first column of their uid.
+
+        Raises:
+            Exception: A value column doesn't have a uid.
+        """
+        codes = self.uid_codes[0]
+        _, first_positions = np.unique(codes, return_index=True)
+
+        first_columns = np.zeros(len(codes), dtype=bool)
+        first_columns[first_positions] = True
+        return first_columns
+
+    @cached_property
+    def column_sums(self) -> np.ndarray:
+        """
+        np.ndarray: The sum of each value column, NaN values count as 0.
+        """
+        return _nansum_columns(self.values)
+
+    @cached_property
+    def nonzero(self) -> np.ndarray:
+        """
+        np.ndarray: The mask of value columns with a sum greater than 0, resource values are never
+            negative so these are the columns with any nonzero value.
+        """
+        return self.column_sums > 0
+
+    @cached_property
+    def nonzero_uids(self) -> np.ndarray:
+        """
+        np.ndarray: The unique uids of the value columns with a nonzero sum in order of
+            appearance, columns without a uid are ignored.
+        """
+        codes, categories = self.labels.codes("uid")
+        codes = codes[self.value_positions][self.nonzero]
+        return categories[np.unique(codes[codes >= 0])]
+
+def _nansum_columns(values: np.ndarray, chunk_size: int = 64) -> np.ndarray:
+    """
+    The same as np.nansum(values, axis=0) without its full size copy of the matrix. Resource
+        values are never negative, so NaNs are replaced by taking np.fmax with 0 a few columns at
+        a time in a small buffer. The rare columns with a negative value are summed by np.nansum.
+
+    Args:
+        values (np.ndarray): The matrix, column-major matrices are summed fastest.
+        chunk_size (int): The amount of columns copied into the buffer at once.
+
+    Returns:
+        np.ndarray: The sum of each column, ignoring NaN.
+    """
+    sums = np.empty(values.shape[1], dtype=np.float64)
+    buffer = np.empty((values.shape[0], chunk_size), dtype=np.float64, order="F")
+    for start in range(0, values.shape[1], chunk_size):
+        chunk = values[:, start:start+chunk_size]
+        chunk_buffer = buffer[:, :chunk.shape[1]]
+        np.fmax(chunk, 0, out=chunk_buffer)
+        np.sum(chunk_buffer, axis=0, out=sums[start:start+chunk.shape[1]])
+
+    with np.errstate(invalid="ignore"):
+        negative = np.flatnonzero(np.fmin.reduce(values, axis=0, initial=0) < 0)
+    if(len(negative) > 0):
+        sums[negative] = np.nansum(values[:, negative], axis=0)
+
+    return sums
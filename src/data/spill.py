@@ -0,0 +1,141 @@
+"""
+Spill moves DataRepository entries to disk when the repository is over its memory budget, see
+  DataRepository#set_memory_budget. Grafana DataFrames (an int64 Time column and float64 value
+  columns) are written in a columnar format, the values matrix and Time column as .npy files with
+  the column names pickled beside them, and are memory-mapped when they're loaded again. Any other
+  data is pickled.
+"""
+
+import os
+import pickle
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+@dataclass(frozen=True)
+class SpilledData():
+    """
+    The files of an entry spilled to disk.
+    """
+    kind: str # frame/pickle
+    path: str # The path of the files without their extensions
+    size: int # The in memory size of the data, see sizeof
+
+    def paths(self) -> list[str]:
+        """
+        Returns:
+            list[str]: Every file of the spilled entry.
+        """
+        if(self.kind == "frame"):
+            return [self.path + ".npy", self.path + ".time.npy", self.path + ".meta.pkl"]
+        return [self.path + ".pkl"]
+
+def sizeof(data: object) -> int:
+    """
+    Estimate the amount of memory data uses. Columns of plain NumPy dtypes are sized from their
+        dtype instead of DataFrame#memory_usage, which takes a second for a frame with tens of
+        thousands of columns.
+
+    Args:
+        data (object): The data, DataFrames, arrays and tuples/lists/dicts of them are measured,
+            anything else is sys.getsizeof.
+
+    Returns:
+        int: The size in bytes.
+    """
+    if(isinstance(data, pd.DataFrame)):
+        dtypes = data.dtypes
+        is_plain = np.array([isinstance(dtype, np.dtype) and dtype != object for dtype in dtypes], dtype=bool)
+        size = data.shape[0] * sum(dtype.itemsize for dtype in dtypes[is_plain])
+        if(not is_plain.all()):
+            size += data.iloc[:, ~is_plain].memory_usage(index=False, deep=True).sum()
+        return int(size + data.index.memory_usage(deep=True) + data.columns.memory_usage(deep=True))
+    if(isinstance(data, (pd.Series, pd.Index))):
+        return int(data.memory_usage(deep=True))
+    if(isinstance(data, np.ndarray)):
+        return data.nbytes
+    if(isinstance(data, (tuple, list))):
+        return sys.getsizeof(data) + sum(sizeof(item) for item in data)
+    if(isinstance(data, dict)):
+        return sys.getsizeof(data) + sum(sizeof(key) + sizeof(value) for key, value in data.items())
+    return sys.getsizeof(data)
+
+def is_grafana_frame(data: object) -> bool:
+    """
+    Args:
+        data (object): The data.
+
+    Returns:
+        bool: The data is a DataFrame of an int64 Time column followed by float64 value columns,
+            these are spilled as .npy files.
+    """
+    if(not isinstance(data, pd.DataFrame) or data.shape[1] == 0 or data.columns[0] != "Time"):
+        return False
+    dtypes = data.dtypes
+    return dtypes.iloc[0] == np.int64 and bool((dtypes.iloc[1:] == np.float64).all())
+
+def spill(data: object, path: str) -> SpilledData:
+    """
+    Write data to disk.
+
+    Args:
+        data (object): The data to write.
+        path (str): The path of the files without their extensions, must be unique to the entry.
+
+    Returns:
+        SpilledData: The spilled entry, used to load it again.
+    """
+    size = sizeof(data)
+
+    if(is_grafana_frame(data)):
+        # The values are written column-major like the frames are built, the slice after Time of
+        #   a single block frame is a view so it's written without a copy
+        np.save(path + ".npy", np.asfortranarray(data.iloc[:, 1:].to_numpy(dtype=np.float64)))
+        np.save(path + ".time.npy", data["Time"].to_numpy())
+        with open(path + ".meta.pkl", "wb") as file:
+            pickle.dump((data.columns[1:], data.index), file, protocol=pickle.HIGHEST_PROTOCOL)
+        return SpilledData("frame", path, size)
+
+    with open(path + ".pkl", "wb") as file:
+        pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+    return SpilledData("pickle", path, size)
+
+def load(spilled: SpilledData) -> object:
+    """
+    Read spilled data. The values of frames are memory-mapped copy-on-write, pages are read when
+        they're used and writes stay in memory.
+
+    Args:
+        spilled (SpilledData): The spilled entry.
+
+    Returns:
+        object: The data.
+    """
+    if(spilled.kind == "frame"):
+        values = np.load(spilled.path + ".npy", mmap_mode="c")
+        time = np.load(spilled.path + ".time.npy")
+        with open(spilled.path + ".meta.pkl", "rb") as file:
+            columns, index = pickle.load(file)
+
+        df = pd.DataFrame(values, columns=columns, index=index, copy=False)
+        df.insert(0, "Time", time)
+        return df
+
+    with open(spilled.path + ".pkl", "rb") as file:
+        return pickle.load(file)
+
+def delete(spilled: SpilledData):
+    """
+    Delete the files of spilled data. Files that are still memory-mapped can't be deleted on some
+        platforms, they're left for the spill directory's cleanup.
+
+    Args:
+        spilled (SpilledData): The spilled entry.
+    """
+    for path in spilled.paths():
+        try:
+            os.remove(path)
+        except OSError:
+            pass
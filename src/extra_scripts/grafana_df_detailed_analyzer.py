@@ -1,18 +1,23 @@
 import argparse
+import os
+import sys
 import pandas as pd
-import re
 
 if(__name__ != "__main__"):
     print("This script is only supposed to be executed by itself")
     exit()
 
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, project_root)
+
+from src.data.labels import get_label
+
 def select_uid(string):
     if string == "Time":
         return string
 
-    match = re.search(r'uid="([^"]+)"', string)
-    if match:
-        uid = match.group(1)
+    uid = get_label(string, "uid")
+    if uid is not None:
         return uid
     else:
         raise Exception(f"Failed to read uid in column name \"{string}\"")
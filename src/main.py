@@ -15,64 +15,106 @@ from src.data.saving.summary_saver import SummarySaver
 from src.data.saving.dataframe_saver import DataFrameSaver
 from src.data.saving.vis_saver import VizualizationsSaver
 from src.data.summary.summarizer import can_summarize, summarize, print_all_summaries
+from src.data.checkpoints import STAGES, get_run_key, save_checkpoint, load_latest_checkpoint
 
-# Hides warnings for .fillna() calls
-pd.set_option('future.no_silent_downcasting', True)
-
-prog_data = load_std_prog_data()
-print(f"Will perform analyses: {", ".join(prog_data.args.analysis_options)}")
-print("")
-
-# Load DataFrames
-print("Starting ingest...")
-prog_data.data_repo = ingest(prog_data)
-prog_data.data_repo = process_periods(prog_data.data_repo)
-prog_data.data_repo = generate_metadata(prog_data.data_repo, prog_data.config)
-
-if(has_overlaps(prog_data.data_repo)):
-    print("Error: The ingested DataRepository has overlapping timestamps for some of its SourceData. This is not allowed- if using FileSystem ingest try PromQL instead.")
-
-if(prog_data.args.verbose):
-    prog_data.data_repo.print_contents()
-print("")
-
-# Analyze dataframes
-print("Starting analysis...")
-analyze(prog_data)
-
-# Summarize analysis results
-if(can_summarize(prog_data)):
-    summarize(prog_data)
-print("")
-
-# Visualize analysis results
-print("Generating visualizations...")
-vizualize(prog_data)
-if(prog_data.args.verbose):
-    prog_data.data_repo.print_contents()
-print("")
-
-# Save output data, only if an out directory is specified
-out_dir = prog_data.args.outdir
-if(out_dir is not None):
-    print("Saving data...")    
-    if(not os.path.exists(out_dir)):
-        os.mkdir(out_dir)
-
-    for saver in [DataFrameSaver(prog_data), AnalysisSaver(prog_data), SummarySaver(prog_data), VizualizationsSaver(prog_data)]:
-        saver.save()
+def main():
+    # Hides warnings for .fillna() calls
+    pd.set_option('future.no_silent_downcasting', True)
+
+    prog_data = load_std_prog_data()
+    print(f"Will perform analyses: {", ".join(prog_data.args.analysis_options)}")
+    print("")
+
+    # Resume from the latest checkpoint of this run, later checkpoints are saved beside it
+    run_key = get_run_key(prog_data)
+    checkpoint_dir = prog_data.get_option("checkpoints.directory", "checkpoint_dir")
+    completed_stages = 0
+    if(prog_data.args.resume_from is not None):
+        if(checkpoint_dir is None):
+            checkpoint_dir = prog_data.args.resume_from
+
+        stage, data_repo = load_latest_checkpoint(prog_data.args.resume_from, run_key)
+        if(stage is None):
+            print(f"No valid checkpoint in {prog_data.args.resume_from}, starting from ingest.")
+        else:
+            prog_data.data_repo = data_repo
+            completed_stages = STAGES.index(stage) + 1
+
+    # Load DataFrames
+    if(completed_stages < 1):
+        print("Starting ingest...")
+        prog_data.data_repo = ingest(prog_data)
+        if(checkpoint_dir is not None):
+            save_checkpoint(prog_data.data_repo, checkpoint_dir, "ingest", run_key)
+
+    if(completed_stages < 2):
+        prog_data.data_repo = process_periods(prog_data.data_repo)
+        prog_data.data_repo = generate_metadata(prog_data.data_repo, prog_data.config)
+
+        if(has_overlaps(prog_data.data_repo)):
+            print("Error: The ingested DataRepository has overlapping timestamps for some of its SourceData. This is not allowed- if using FileSystem ingest try PromQL instead.")
+
+        if(checkpoint_dir is not None):
+            save_checkpoint(prog_data.data_repo, checkpoint_dir, "metadata", run_key)
+
+    # Spill data to disk past the memory budget, ingest works on its own repositories
+    memory_budget = prog_data.get_option("memory.budget_mb", "memory_budget", None)
+    if(memory_budget is not None):
+        prog_data.data_repo.set_memory_budget(int(memory_budget * 1024 * 1024), prog_data.get_option("memory.spill_directory"))
+
+    if(prog_data.args.verbose):
+        prog_data.data_repo.print_contents()
     print("")
 
-# Print summaries
-print_all_summaries(prog_data.data_repo)
+    # Analyze dataframes
+    if(completed_stages < 3):
+        print("Starting analysis...")
+        analyze(prog_data)
+        if(checkpoint_dir is not None):
+            save_checkpoint(prog_data.data_repo, checkpoint_dir, "analysis", run_key)
+
+    # Summarize analysis results
+    if(can_summarize(prog_data)):
+        summarize(prog_data)
+    print("")
+
+    # Visualize analysis results
+    print("Generating visualizations...")
+    vizualize(prog_data)
+    if(prog_data.args.verbose):
+        prog_data.data_repo.print_contents()
+    print("")
+
+    # Save output data, only if an out directory is specified
+    out_dir = prog_data.args.outdir
+    if(out_dir is not None):
+        print("Saving data...")    
+        if(not os.path.exists(out_dir)):
+            os.mkdir(out_dir)
+
+        for saver in [DataFrameSaver(prog_data), AnalysisSaver(prog_data), SummarySaver(prog_data), VizualizationsSaver(prog_data)]:
+            saver.save()
+        print("")
+
+    # Print summaries
+    print_all_summaries(prog_data.data_repo)
+
+    try:
+        import psutil
+        psutil_available = True
+    except ImportError:
+        psutil_available = False
+
+    if(psutil_available):
+        process = psutil.Process(os.getpid())
+        memory_info = process.memory_info()
+        print(f"\nMemory usage: {memory_info.rss / (1024 * 1024):.2f} MB")
 
-try:
-    import psutil
-    psutil_available = True
-except ImportError:
-    psutil_available = False
+    if(memory_budget is not None):
+        data_repo = prog_data.data_repo
+        spilled_count = len(data_repo.filter_ids(data_repo.is_spilled))
+        print(f"DataRepository: {data_repo.get_resident_size() / (1024 * 1024):.2f} MB resident, {spilled_count} of {data_repo.count()} entries spilled to disk")
 
-if(psutil_available):
-    process = psutil.Process(os.getpid())
-    memory_info = process.memory_info()
-    print(f"\nMemory usage: {memory_info.rss / (1024 * 1024):.2f} MB")
\ No newline at end of file
+# Process pools (see query_ingest#_filter_plan_parallel) may import this module in their workers
+if(__name__ == "__main__"):
+    main()
@@ -22,8 +22,32 @@ def load_arguments():
     group = ingest_group.add_mutually_exclusive_group(required=True)
     group.add_argument('-p', '--period', dest='period', type=parse_time_range, help="A time range of the format <start>-<end> where your start and end times are UNIX timestamps.")
     group.add_argument('-f', '--file', dest='file', type=parse_file_list, help="A local file/directory to be used instead of polling Prometheus.")
+    ingest_group.add_argument('-w', '--workers', dest='workers', type=int, help="The maximum amount of PromQL queries to perform concurrently, overrides ingest.workers in config.")
+    cache_group = ingest_group.add_mutually_exclusive_group()
+    cache_group.add_argument('--cache', dest='cache', action='store_const', const=True, help="Cache PromQL responses on disk, overrides cache.enabled in config.")
+    cache_group.add_argument('--no-cache', dest='cache', action='store_const', const=False, help="Don't read or write cached PromQL responses, overrides cache.enabled in config.")
+    ingest_group.add_argument('--refresh', dest='refresh', action='store_true', help="Perform every PromQL query and replace its cached response.")
+    ingest_group.add_argument('--status-filter', dest='status_filter', choices=["client", "server"], help="Apply the running/pending status filter after querying (client) or join it into the truth queries (server), overrides ingest.status_filter in config.")
+    ingest_group.add_argument('--filter-processes', dest='filter_processes', type=int, help="The amount of processes that apply the running/pending status filter, overrides ingest.filter_processes in config.")
     ingest_group.add_argument('-u', '--users', dest='users', action='store_true', help="Ingest users from JupyterHub sources specified in config.")
 
+    # Analysis options
+    analysis_group = parser.add_argument_group("Analysis options", "Options for performing analyses")
+    fused_group = analysis_group.add_mutually_exclusive_group()
+    fused_group.add_argument('--fused', dest='fused', action='store_const', const=True, help="Compute the hours, jobs and totals analyses of each source in a single pass, overrides analysis.fused in config.")
+    fused_group.add_argument('--no-fused', dest='fused', action='store_const', const=False, help="Perform each analysis separately, overrides analysis.fused in config.")
+
+    lazy_group = analysis_group.add_mutually_exclusive_group()
+    lazy_group.add_argument('--lazy', dest='lazy', action='store_const', const=True, help="Only compute analysis results when they're first read, overrides analysis.lazy in config.")
+    lazy_group.add_argument('--no-lazy', dest='lazy', action='store_const', const=False, help="Compute every analysis result during analysis, overrides analysis.lazy in config.")
+
+    analysis_group.add_argument('--memory-budget', dest='memory_budget', type=int, help="Spill the least recently used data to disk past this many MB, overrides memory.budget_mb in config.")
+
+    # Checkpoint options
+    checkpoint_group = parser.add_argument_group("Checkpoint options", "Options for saving and restoring the DataRepository between stages")
+    checkpoint_group.add_argument('--checkpoint-dir', dest='checkpoint_dir', type=str, help="Save a checkpoint after ingest, metadata and analysis to this directory, overrides checkpoints.directory in config.")
+    checkpoint_group.add_argument('--resume-from', dest='resume_from', type=str, help="Resume from the latest valid checkpoint in this directory saved by a run with the same analyses, period/file, config file and data settings.")
+
     # Output options
     output_group = parser.add_argument_group("Output options", "Options for data output")
     output_group.add_argument('-o', '--outdir', dest='outdir', type=str, help="The directory to send output files to.")
@@ -50,6 +74,18 @@ def verify_arguments(prog_data):
         # If the file exists, provide warnings about other arguments that won't be used
         raise ArgumentException("Both file and period arguments provided, these arguments are mutually exclusive and you must select one.")
 
+    if(getattr(args, "workers", None) is not None and args.workers < 1):
+        raise ArgumentException("The amount of workers must be at least 1.")
+
+    if(getattr(args, "filter_processes", None) is not None and args.filter_processes < 1):
+        raise ArgumentException("The amount of filter processes must be at least 1.")
+
+    if(getattr(args, "memory_budget", None) is not None and args.memory_budget < 1):
+        raise ArgumentException("The memory budget must be at least 1 MB.")
+
+    if(getattr(args, "cache", None) is False and getattr(args, "refresh", False)):
+        raise ArgumentException("--refresh replaces cached responses, it can't be used with --no-cache.")
+
     if(args.period is not None):
         now = int(time.time())
         if(args.period[0] > now or args.period[1] > now):
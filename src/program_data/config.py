@@ -50,4 +50,39 @@ def verify_config(prog_data):
         print(f"The truth query (as specified in the configuration) doesn't have the type string identifier \"{prog_data.settings['type_string_identifier']}\" in it. Exiting.")
         exit(1)
 
+    workers = prog_data.get_option("ingest.workers", default=1)
+    if(not isinstance(workers, int) or workers < 1):
+        print(f"Failed to load configuration. \"ingest.workers\" must be an integer of at least 1, got \"{workers}\". Exiting.")
+        exit(1)
+
+    filter_processes = prog_data.get_option("ingest.filter_processes", default=1)
+    if(not isinstance(filter_processes, int) or filter_processes < 1):
+        print(f"Failed to load configuration. \"ingest.filter_processes\" must be an integer of at least 1, got \"{filter_processes}\". Exiting.")
+        exit(1)
+
+    status_filter = prog_data.get_option("ingest.status_filter", default="client")
+    if(status_filter not in ["client", "server"]):
+        print(f"Failed to load configuration. \"ingest.status_filter\" must be \"client\" or \"server\", got \"{status_filter}\". Exiting.")
+        exit(1)
+
+    memory_budget = prog_data.get_option("memory.budget_mb", default=None)
+    if(memory_budget is not None and (isinstance(memory_budget, bool) or not isinstance(memory_budget, (int, float)) or memory_budget <= 0)):
+        print(f"Failed to load configuration. \"memory.budget_mb\" must be a number greater than 0, got \"{memory_budget}\". Exiting.")
+        exit(1)
+
+    checkpoint_dir = prog_data.get_option("checkpoints.directory", "checkpoint_dir", None)
+    if(checkpoint_dir is not None and not isinstance(checkpoint_dir, str)):
+        print(f"Failed to load configuration. \"checkpoints.directory\" must be a path, got \"{checkpoint_dir}\". Exiting.")
+        exit(1)
+
+    fused = prog_data.get_option("analysis.fused", default=False)
+    if(not isinstance(fused, bool)):
+        print(f"Failed to load configuration. \"analysis.fused\" must be true or false, got \"{fused}\". Exiting.")
+        exit(1)
+
+    lazy = prog_data.get_option("analysis.lazy", default=False)
+    if(not isinstance(lazy, bool)):
+        print(f"Failed to load configuration. \"analysis.lazy\" must be true or false, got \"{lazy}\". Exiting.")
+        exit(1)
+
     return
\ No newline at end of file
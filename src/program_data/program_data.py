@@ -39,3 +39,27 @@ class ProgramData():
         verify_config(self)
     
         self.data_repo = DataRepository()
+
+    def get_option(self, config_key: str, arg_name: str = None, default=None):
+        """
+        Resolve an optional program option. A command line argument (if provided) takes priority
+          over the config value, which takes priority over the default value.
+
+        Args:
+            config_key (str): The key of the option in the config, nested sections are separated
+                by periods (i.e. "ingest.workers").
+            arg_name (str): The argparse destination that can override the config value.
+            default (object): The value used when neither the arguments or config provide one.
+        Returns:
+            object: The resolved option value.
+        """
+        if(arg_name is not None and getattr(self.args, arg_name, None) is not None):
+            return getattr(self.args, arg_name)
+
+        value = self.config
+        for key in config_key.split("."):
+            if(not isinstance(value, dict) or key not in value.keys() or value[key] is None):
+                return default
+            value = value[key]
+
+        return value
@@ -13,11 +13,15 @@ settings = {
     # Analysis options, the types are the required types to perform the analysis.
     # Methods are filled out by analysis.py on the analysis() call
     # Requirements are fulfilled in the analysis() call
+    # Aggregatable analyses only use namespace level sums of the source data, if every analysis
+    #   performed is aggregatable the PromQL ingest can query pre-aggregated data, see
+    #   query_designer#aggregate_namespace_query
     "analysis_settings": {
         "cpuhours": {
             "filter": filter_source_type("cpu"),
             "types": ["cpu"],
             "requires": [],
+            "aggregatable": True,
             "vis_options": {
                 "type": "horizontalbar",
                 "title": "Total CPU Hours by Namespace from %MONTH%",
@@ -31,12 +35,14 @@ settings = {
         "cpuhourstotal": {
             "filter": filter_analyis_type("cpuhours"),
             "types": ["cpu"],
-            "requires": ["cpuhours", "cpuhoursavailable"]
+            "requires": ["cpuhours", "cpuhoursavailable"],
+            "aggregatable": True
         },
         "cpuhoursavailable": {
             "filter": filter_source_type("cpu"),
             "types": ["cpu"],
-            "requires": []
+            "requires": [],
+            "aggregatable": True
         },
         "cpujobs": {
             "filter": filter_source_type("cpu"),
@@ -61,6 +67,7 @@ settings = {
             "filter": filter_source_type("gpu"),
             "types": ["gpu"],
             "requires": [],
+            "aggregatable": True,
             "vis_options": {
                 "type": "horizontalbar",
                 "title": "Total GPU Hours by Namespace from %MONTH%",
@@ -74,12 +81,14 @@ settings = {
         "gpuhourstotal": {
             "filter": filter_analyis_type("gpuhours"),
             "types": ["gpu"],
-            "requires": ["gpuhours", "gpuhoursavailable"]
+            "requires": ["gpuhours", "gpuhoursavailable"],
+            "aggregatable": True
         },
         "gpuhoursavailable": {
             "filter": filter_source_type("gpu"),
             "types": ["gpu"],
-            "requires": []
+            "requires": [],
+            "aggregatable": True
         },
         "gpujobs": {
             "filter": filter_source_type("gpu"),
@@ -108,6 +117,7 @@ settings = {
         "cvgpuhours": {
             "types": ["cpu", "gpu"],
             "requires": ["cpuhourstotal", "gpuhourstotal"],
+            "aggregatable": True,
             "vis_options": {
                 "type": "timeseries",
                 "title": "CPU and GPU hours by month",
@@ -132,6 +142,7 @@ settings = {
         "utilization": {
             "types": ["cpu", "gpu"],
             "requires": ["cpuhourstotal", "cpuhoursavailable", "gpuhourstotal", "gpuhoursavailable"],
+            "aggregatable": True,
             "vis_options": None
         }
     },
@@ -1,5 +1,7 @@
 import datetime
 import calendar
+import numpy as np
+import pandas as pd
 
 def from_unix_ts(timestamp):
     """
@@ -9,6 +11,37 @@ def from_unix_ts(timestamp):
     dt_object = datetime.datetime.fromtimestamp(timestamp)
     return f"{dt_object.month}/{dt_object.day}/{dt_object.year} {dt_object.hour}:{dt_object.minute:02d}"
 
+def from_unix_ts_array(timestamps):
+    """
+    Vectorized from_unix_ts, given an array of UNIX timestamps convert each of them to format
+      %m/%d/%Y %H:%M.
+
+    Args:
+        timestamps (array-like): The UNIX timestamps.
+    Returns:
+        np.ndarray: The formatted strings (object dtype).
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if(len(timestamps) == 0):
+        return np.array([], dtype=object)
+
+    # The local UTC offset can change (daylight savings), resolve it once per unique timestamp
+    unique_timestamps, inverse = np.unique(timestamps, return_inverse=True)
+    offsets = np.array([_local_utc_offset(int(timestamp)) for timestamp in unique_timestamps], dtype=np.int64)
+
+    local = pd.DatetimeIndex(pd.to_datetime(unique_timestamps + offsets, unit="s"))
+    formatted = (local.month.astype(str) + "/" + local.day.astype(str) + "/" + local.year.astype(str) + " "
+        + local.hour.astype(str) + ":" + local.minute.astype(str).str.zfill(2))
+
+    return np.asarray(formatted, dtype=object)[inverse]
+
+def _local_utc_offset(timestamp: int) -> int:
+    """
+    Get the offset in seconds of the local timezone from UTC at a UNIX timestamp.
+    """
+    local_dt = datetime.datetime.fromtimestamp(timestamp)
+    return int((local_dt - datetime.datetime(1970, 1, 1)).total_seconds()) - timestamp
+
 def to_unix_ts(date_time_str):
     """
     Given a timestamp of the format %m/%d/%Y %H:%M convert to UNIX timestamp.
@@ -18,6 +51,29 @@ def to_unix_ts(date_time_str):
     unix_timestamp = int(dt.timestamp())
     return unix_timestamp
 
+def to_unix_ts_array(date_time_strs):
+    """
+    Vectorized to_unix_ts, given an array of timestamps of the format %m/%d/%Y %H:%M convert each
+      of them to a UNIX timestamp.
+
+    Args:
+        date_time_strs (array-like): The formatted timestamps.
+    Returns:
+        np.ndarray: The UNIX timestamps (int64).
+    """
+    date_time_strs = np.asarray(date_time_strs, dtype=object)
+    if(len(date_time_strs) == 0):
+        return np.array([], dtype=np.int64)
+
+    naive = pd.to_datetime(date_time_strs, format='%m/%d/%Y %H:%M').to_pydatetime()
+
+    # Local times are resolved the same way to_unix_ts does, so ambiguous and nonexistent times
+    #   around daylight savings transitions convert identically
+    unique_naive, inverse = np.unique(naive, return_inverse=True)
+    timestamps = np.array([int(dt.timestamp()) for dt in unique_naive], dtype=np.int64)
+
+    return timestamps[inverse]
+
 def get_range_as_month(start_ts, end_ts, allowed_window=0):
     """
     Get a range as a month and year.
@@ -28,9 +28,8 @@ class VisualizationVariables():
             
             # Resolve the corresponding analysis variable with matching SourceIdentifier
             variable_value = None
-            for comp_id in data_repo.filter_ids(filter_analyis_type(targ_analysis)):
-                if(comp_id.find_source() == identifier.find_source()):
-                    variable_value = data_repo.get_data(comp_id)
+            for comp_id in data_repo.query(AnalysisIdentifier, analysis=targ_analysis, source=identifier.find_source()):
+                variable_value = data_repo.get_data(comp_id)
 
             if(variable_value is None):
                 raise Exception(f"Failed to resolve corresponding analysis variable for {targ_analysis}, current SourceID: {identifier.find_source()}")
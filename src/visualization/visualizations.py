@@ -19,8 +19,7 @@ def vizualize(prog_data: ProgramData):
     data_repo: DataRepository = prog_data.data_repo
 
     # Filter identifiers that are analyses and have vis options
-    analysis_type_lambda = filter_type(AnalysisIdentifier)
-    is_vis_analysis_filter = lambda identifier: analysis_type_lambda(identifier) and "vis_options" in settings["analysis_settings"][identifier.analysis].keys()
+    is_vis_analysis_filter = filter_type(AnalysisIdentifier) & (lambda identifier: "vis_options" in settings["analysis_settings"][identifier.analysis].keys())
     identifiers = data_repo.filter_ids(is_vis_analysis_filter)
 
     # Loop through visualizable analysis identifiers
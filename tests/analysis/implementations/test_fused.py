@@ -0,0 +1,71 @@
+import pytest
+import pandas as pd
+
+from src.analysis.analysis import analysis_options_methods
+from src.analysis.implementations.fused import FUSED_ANALYSES, fused_analyze, get_fused_result
+from src.data.data_repository import DataRepository
+from src.data.identifiers.identifier import SourceIdentifier, AnalysisIdentifier
+
+START_TS = 1740816000
+END_TS = 1743490799
+
+@pytest.fixture
+def mar25repo(mar25cpudf, mar25gpudf):
+    data_repo = DataRepository()
+    data_repo.add(SourceIdentifier(START_TS, END_TS, "cpu"), mar25cpudf)
+    data_repo.add(SourceIdentifier(START_TS, END_TS, "gpu"), mar25gpudf)
+    return data_repo
+
+def perform_individually(data_repo, analysis, source_identifier):
+    """
+    Perform an analysis with its individual method, performing the analyses it reads first.
+    """
+    source_type = source_identifier.type
+    if(analysis.endswith("total")):
+        base_analysis = analysis[:-len("total")]
+        base_result = perform_individually(data_repo, base_analysis, source_identifier)
+        base_identifier = AnalysisIdentifier(source_identifier, base_analysis)
+        data_repo.add(base_identifier, base_result)
+        if(analysis == source_type + "hourstotal"):
+            available_identifier = AnalysisIdentifier(source_identifier, source_type + "hoursavailable")
+            data_repo.add(available_identifier, perform_individually(data_repo, source_type + "hoursavailable", source_identifier))
+        return analysis_options_methods[analysis](base_identifier, data_repo)
+    return analysis_options_methods[analysis](source_identifier, data_repo)
+
+@pytest.mark.parametrize("source_type", ["cpu", "gpu"])
+def test_fused_identical(mar25repo, source_type):
+    source_identifier = SourceIdentifier(START_TS, END_TS, source_type)
+    results = fused_analyze(source_identifier, mar25repo, sorted(FUSED_ANALYSES))
+
+    assert set(results.keys()) == set(analysis for analysis in FUSED_ANALYSES if analysis.startswith(source_type))
+    for analysis, result in results.items():
+        expected = perform_individually(mar25repo, analysis, source_identifier)
+        if(isinstance(expected, pd.DataFrame)):
+            pd.testing.assert_frame_equal(result, expected)
+        else:
+            assert result == expected
+
+def test_fused_only_requested(mar25repo):
+    results = fused_analyze(SourceIdentifier(START_TS, END_TS, "gpu"), mar25repo, ["gpuhours", "cpujobs", "gpujobstotal"])
+    assert set(results.keys()) == {"gpuhours", "gpujobstotal"}
+
+def test_fused_cpu_jobs_missing_gpu(mar25cpudf):
+    data_repo = DataRepository()
+    data_repo.add(SourceIdentifier(START_TS, END_TS, "cpu"), mar25cpudf)
+    with pytest.raises(Exception, match="corresponding gpu data_block"):
+        fused_analyze(SourceIdentifier(START_TS, END_TS, "cpu"), data_repo, ["cpujobs"])
+
+def test_get_fused_result(mar25repo):
+    source_identifier = SourceIdentifier(START_TS, END_TS, "cpu")
+    analyses = ["cpuhours", "cpuhoursavailable", "cpuhourstotal"]
+    fused_results = {}
+
+    hours = get_fused_result(source_identifier, "cpuhours", analyses, mar25repo, fused_results)
+    hours_identifier = AnalysisIdentifier(source_identifier, "cpuhours")
+    mar25repo.add(hours_identifier, hours)
+
+    # The kernel only runs once per source, total identifiers find their source
+    assert set(fused_results[source_identifier].keys()) == {"cpuhoursavailable", "cpuhourstotal"}
+    total = get_fused_result(hours_identifier, "cpuhourstotal", analyses, mar25repo, fused_results)
+    assert total == hours["Hours"].sum()
+    assert set(fused_results[source_identifier].keys()) == {"cpuhoursavailable"}
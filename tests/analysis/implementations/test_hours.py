@@ -39,6 +39,22 @@ def test_hours_cpufeb24(feb24cpudf):
     result = _analyze_hours_byns_ondf(feb24cpudf)
     assert sum(result["Hours"]) == 23088
 
+def test_hours_namespace_prefixes():
+    # Namespaces that are regex patterns or prefixes of each other are summed separately, columns
+    #   without a namespace aren't counted
+    df = pd.DataFrame({
+        'Time': [1740816000, 1740819600],
+        '{namespace="ns.1", uid="uid1"}': [1.0, 2.0],
+        '{namespace="nsx1", uid="uid2"}': [4.0, None],
+        '{namespace="ns.10", uid="uid3"}': [8.0, 8.0],
+        '{uid="uid4"}': [32.0, 32.0],
+        '{namespace="ns0", uid="uid5"}': [0.0, None]
+    })
+    result = _analyze_hours_byns_ondf(df)
+
+    assert list(result["Namespace"]) == ["ns.10", "nsx1", "ns.1"]
+    assert list(result["Hours"]) == [16.0, 4.0, 3.0]
+
 def test_available_hours(mar25cpudf):
     result = _analyze_available_hours_ondf(mar25cpudf, "cpu", 1740816000, 1743490799)
     print(result)
\ No newline at end of file
@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 import pandas as pd
 
 from src.analysis.implementations.jobs import _analyze_jobs_byns_ondf
@@ -38,4 +39,27 @@ def test_jobs_gpujan24(jan24gpudf):
 
 def test_jobs_gpufeb24(feb24gpudf):
     result = _analyze_jobs_byns_ondf(feb24gpudf)
-    assert sum(result["Count"]) == 24
\ No newline at end of file
+    assert sum(result["Count"]) == 24
+
+@pytest.mark.parametrize("blacklist", [{"uid3", "other"}, ["uid3"], np.array(["uid3", "other"], dtype=object)])
+def test_jobs_blacklist(blacklist):
+    df = pd.DataFrame({
+        'Time': [1740816000, 1740819600],
+        '{namespace="ns1", uid="uid1"}': [1.0, None],
+        '{namespace="ns1", uid="uid1", container="b"}': [1.0, 1.0],
+        '{namespace="ns2", uid="uid2"}': [0.0, None],
+        '{namespace="ns2", uid="uid3"}': [2.0, 2.0],
+        '{namespace="ns3", uid="uid4"}': [1.0, None],
+        '{namespace="ns3", uid="uid5"}': [None, 1.0],
+        '{uid="uid6"}': [1.0, 1.0]
+    })
+
+    # Duplicate uids are counted once, ns2 has no jobs left and columns without a namespace aren't
+    #   counted
+    result = _analyze_jobs_byns_ondf(df, blacklist, True)
+    assert list(result["Namespace"]) == ["ns3", "ns1"]
+    assert list(result["Count"]) == [2, 1]
+
+    result = _analyze_jobs_byns_ondf(df, None, False)
+    assert list(result["Namespace"]) == ["ns2", "ns3", "ns1"]
+    assert list(result["Count"]) == [2, 2, 1]
@@ -0,0 +1,44 @@
+import argparse
+import pytest
+import pandas as pd
+
+from src.analysis.analysis import analyze
+from src.data.identifiers.identifier import SourceIdentifier, AnalysisIdentifier
+from src.program_data.program_data import ProgramData
+
+START_TS = 1740816000
+END_TS = 1743490799
+
+def analyzed_prog_data(default_config, cpudf, gpudf, analysis_options, **options):
+    prog_data = ProgramData(argparse.Namespace(analysis_options=analysis_options, file=None, period=(START_TS, END_TS), **options), default_config)
+    prog_data.data_repo.add(SourceIdentifier(START_TS, END_TS, "cpu"), cpudf)
+    prog_data.data_repo.add(SourceIdentifier(START_TS, END_TS, "gpu"), gpudf)
+    analyze(prog_data)
+    return prog_data
+
+@pytest.mark.parametrize("fused", [False, True])
+def test_lazy_identical(default_config, mar25cpudf, mar25gpudf, fused):
+    analysis_options = ["cpuhourstotal", "gpuhourstotal", "jobstotal"]
+    eager_repo = analyzed_prog_data(default_config, mar25cpudf, mar25gpudf, list(analysis_options), fused=fused).data_repo
+    lazy_repo = analyzed_prog_data(default_config, mar25cpudf, mar25gpudf, list(analysis_options), fused=fused, lazy=True).data_repo
+
+    assert list(lazy_repo.get_ids()) == list(eager_repo.get_ids())
+    assert all(lazy_repo.is_lazy(identifier) for identifier in lazy_repo.query(AnalysisIdentifier))
+
+    for identifier in eager_repo.query(AnalysisIdentifier):
+        expected = eager_repo.get_data(identifier)
+        if(isinstance(expected, pd.DataFrame)):
+            pd.testing.assert_frame_equal(lazy_repo.get_data(identifier), expected)
+        else:
+            assert lazy_repo.get_data(identifier) == expected
+
+def test_lazy_only_required(default_config, mar25cpudf, mar25gpudf):
+    data_repo = analyzed_prog_data(default_config, mar25cpudf, mar25gpudf, ["cpuhourstotal", "cpujobstotal"], lazy=True).data_repo
+    cpu_source = SourceIdentifier(START_TS, END_TS, "cpu")
+    cpuhours = AnalysisIdentifier(cpu_source, "cpuhours")
+
+    # Reading the hours total computes the analyses it requires, the jobs analyses aren't computed
+    data_repo.get_data(AnalysisIdentifier(cpuhours, "cpuhourstotal"))
+    assert not data_repo.is_lazy(cpuhours)
+    assert not data_repo.is_lazy(AnalysisIdentifier(cpu_source, "cpuhoursavailable"))
+    assert data_repo.is_lazy(AnalysisIdentifier(cpu_source, "cpujobs"))
@@ -1,6 +1,7 @@
 import pytest
 import argparse
 import os
+import numpy as np
 import pandas as pd
 
 from src.program_data.program_data import ProgramData
@@ -36,4 +37,18 @@ def default_config():
 @pytest.fixture
 def test_files_dir():
     """ The fixture that points to the directory of the testing files for ingest. """
-    return os.path.abspath(os.path.join(os.path.dirname(__file__), "test_files"))
\ No newline at end of file
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), "test_files"))
+
+@pytest.fixture
+def make_grafana_frame():
+    """ The fixture that builds Grafana DataFrames, an int64 Time column and float64 value columns. """
+    def make(columns=3, rows=4, fill=None):
+        if(fill is None):
+            values = np.arange(rows * columns, dtype=np.float64).reshape(rows, columns)
+        else:
+            values = np.full((rows, columns), float(fill))
+
+        df = pd.DataFrame(values, columns=[f'{{namespace="ns{i}", uid="uid{i}"}}' for i in range(columns)])
+        df.insert(0, "Time", 1740816000 + np.arange(rows, dtype=np.int64) * 3600)
+        return df
+    return make
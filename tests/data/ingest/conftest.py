@@ -5,6 +5,7 @@ import pandas as pd
 
 from src.program_data.program_data import ProgramData
 from src.program_data.arguments import parse_file_list
+from src.data.ingest.grafana_df_analyzer import convert_time_column
 
 @pytest.fixture
 def program_data_def_config(default_config):
@@ -35,17 +36,17 @@ def malformed_csv_path(test_files_dir):
 #region Dataframes
 @pytest.fixture
 def cpu_df(cpu_csv_path):
-    return pd.read_csv(cpu_csv_path)
+    return convert_time_column(pd.read_csv(cpu_csv_path))
 
 @pytest.fixture
 def gpu_df(gpu_csv_path):
-    return pd.read_csv(gpu_csv_path)
+    return convert_time_column(pd.read_csv(gpu_csv_path))
 
 # The malformed dataframe has multiple resource types (nvidia_com_gpu in 1st column then cpu in 
 #   rest) and has a time period spanning from 1/1-2/26.
 @pytest.fixture
 def malformed_df(malformed_csv_path):
-    return pd.read_csv(malformed_csv_path)
+    return convert_time_column(pd.read_csv(malformed_csv_path))
 #endregion
 
 #region File namespaces
@@ -0,0 +1,70 @@
+import pytest
+import os
+import time
+
+from src.data.ingest.promql.query_cache import QueryCache, normalize_query_url
+
+BASE_URL = "https://thanos.example.com/api/v1/query_range"
+
+def query_url(start, end, query="up{namespace=~\"a|b\"}"):
+    return f"{BASE_URL}?start={start}&end={end}&step=3600&query={query}"
+
+@pytest.fixture
+def cache(tmp_path):
+    return QueryCache(str(tmp_path), ttl=3600, max_bytes=1024**2)
+
+def test_normalize_query_url():
+    a = normalize_query_url(query_url(1704096000.0, 1706774399.0, "up{\n    namespace=~\"a|b\"\n}"))
+    b = normalize_query_url(query_url(1704096000, 1706774399, "up{ namespace =~ \"a|b\" }"))
+    c = normalize_query_url(query_url(1704096000, 1706774399, "sum by (namespace) (up)"))
+
+    assert a == b
+    assert c["query"] == "sum by(namespace)(up)"
+    assert a["start"] == 1704096000
+
+def test_normalize_keeps_quoted_whitespace():
+    a = normalize_query_url(query_url(0, 1, "up{pod=\"a  b\"}"))
+    b = normalize_query_url(query_url(0, 1, "up{pod=\"a b\"}"))
+
+    assert a != b
+
+def test_put_get(cache):
+    cache.put(query_url(0, 1), b"body")
+
+    assert cache.get(query_url(0.0, 1.0)) == b"body"
+    assert cache.get(query_url(0, 2)) is None
+    assert cache.hits == 1 and cache.misses == 1
+
+def test_persists_between_instances(cache, tmp_path):
+    cache.put(query_url(0, 1), b"body")
+    cache.close()
+
+    assert QueryCache(str(tmp_path)).get(query_url(0, 1)) == b"body"
+
+def test_refresh_ignores_entries(cache, tmp_path):
+    cache.put(query_url(0, 1), b"body")
+
+    assert QueryCache(str(tmp_path), refresh=True).get(query_url(0, 1)) is None
+
+def test_open_period_expires(tmp_path):
+    cache = QueryCache(str(tmp_path), ttl=-1)
+    now = int(time.time())
+
+    cache.put(query_url(0, 1), b"closed")
+    cache.put(query_url(now - 10, now + 3600), b"open")
+
+    assert cache.get(query_url(0, 1)) == b"closed"
+    assert cache.get(query_url(now - 10, now + 3600)) is None
+
+def test_lru_eviction(tmp_path):
+    body = os.urandom(16384) # Incompressible so the entry sizes are predictable
+    cache = QueryCache(str(tmp_path), max_bytes=len(body) * 2 + 1024)
+
+    cache.put(query_url(0, 1), body)
+    cache.put(query_url(0, 2), body)
+    cache.get(query_url(0, 1)) # Most recently used
+    cache.put(query_url(0, 3), body)
+
+    assert cache.get(query_url(0, 1)) == body
+    assert cache.get(query_url(0, 2)) is None
+    assert cache.get(query_url(0, 3)) == body
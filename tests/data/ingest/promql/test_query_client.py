@@ -0,0 +1,66 @@
+import pytest
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.data.ingest.promql.query_client import QueryClient
+from src.data.ingest.promql.query_executor import perform_query
+
+@pytest.fixture
+def flaky_server():
+    """ A local server that responds with a 502 to every other request and gzip encoded json otherwise. """
+    calls = {"count": 0}
+    body = json.dumps({"status": "success", "data": {"result": [{"metric": {"uid": "uid1"}, "values": [[0, "1"]]}]}}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            calls["count"] += 1
+            if(calls["count"] % 2 == 1):
+                self.send_response(502)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            compressed = gzip.compress(body)
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(compressed)))
+            self.end_headers()
+            self.wfile.write(compressed)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/api/v1/query_range", len(body)
+    server.shutdown()
+
+def test_retry_transient_failure(flaky_server):
+    url, _ = flaky_server
+    client = QueryClient(retries=2, backoff_factor=0)
+
+    result = perform_query(url, client)
+
+    assert result[0]["metric"]["uid"] == "uid1"
+    assert client.get_stats()[0].retries == 1
+
+def test_no_retries_fails(flaky_server):
+    url, _ = flaky_server
+    client = QueryClient(retries=0, backoff_factor=0)
+
+    with pytest.raises(Exception):
+        perform_query(url, client)
+
+def test_stats_record_bytes(flaky_server):
+    url, body_length = flaky_server
+    client = QueryClient(retries=2, backoff_factor=0)
+
+    perform_query(url, client)
+    stats = client.get_stats()[0]
+
+    assert stats.body_bytes == body_length
+    assert stats.wire_bytes > 0
@@ -0,0 +1,75 @@
+import pytest
+import json
+import pandas as pd
+
+from src.data.ingest.promql.query_decoder import decode_query_response
+from src.data.ingest.promql.query_executor import transform_query_response
+
+START_TS = 1740816000 # 3/1/2025 0:00
+STEP = 3600
+
+@pytest.fixture
+def query_result():
+    return [
+        {"metric": {"namespace": "ns2", "uid": "uid2"}, "values": [[START_TS + STEP, "4"], [START_TS + 3*STEP, "4"]]},
+        {"metric": {"namespace": "ns1", "uid": "uid1"}, "values": [[START_TS, "1"], [START_TS + STEP, "0.5"]]},
+        {"metric": {"namespace": "ns1", "uid": "uid3"}, "values": [[START_TS + 3*STEP, "NaN"]]}
+    ]
+
+def encode(result):
+    return json.dumps({"status": "success", "data": {"resultType": "matrix", "result": result}}).encode()
+
+def test_decode_matches_transform(query_result):
+    decoded = decode_query_response(encode(query_result), START_TS, START_TS + 5*STEP, STEP)
+
+    transformed = transform_query_response(query_result)
+
+    pd.testing.assert_frame_equal(decoded, transformed)
+
+def test_decode_skips_empty_timestamps(query_result):
+    decoded = decode_query_response(encode(query_result), START_TS, START_TS + 5*STEP, STEP)
+
+    # 2:00, 4:00 and 5:00 have no samples in any series
+    assert list(decoded["Time"]) == [START_TS, START_TS + STEP, START_TS + 3*STEP]
+
+def test_decode_empty_result():
+    decoded = decode_query_response(encode([]), START_TS, START_TS + 5*STEP, STEP)
+
+    assert list(decoded.columns) == ["Time"]
+    assert len(decoded) == 0
+
+def test_decode_missing_data():
+    with pytest.raises(Exception):
+        decode_query_response(b'{"status": "error", "error": "too many samples"}', START_TS, START_TS + 5*STEP, STEP)
+
+def test_decode_wrong_result_type():
+    body = json.dumps({"status": "success", "data": {"resultType": "vector", "result": []}}).encode()
+    with pytest.raises(Exception):
+        decode_query_response(body, START_TS, START_TS + 5*STEP, STEP)
+
+def test_transform_keeps_first_duplicate_metric():
+    result = [
+        {"metric": {"uid": "uid1"}, "values": [[START_TS, "1"]]},
+        {"metric": {"uid": "uid1"}, "values": [[START_TS, "2"], [START_TS + STEP, "3"]]}
+    ]
+    transformed = transform_query_response(result)
+
+    assert list(transformed.columns) == ["Time", '{uid="uid1"}']
+    assert list(transformed['{uid="uid1"}']) == [1.0, 3.0]
+
+def test_decode_keeps_first_duplicate_metric():
+    result = [
+        {"metric": {"uid": "uid1"}, "values": [[START_TS, "1"]]},
+        {"metric": {"uid": "uid1"}, "values": [[START_TS, "2"], [START_TS + STEP, "3"]]}
+    ]
+    decoded = decode_query_response(encode(result), START_TS, START_TS + 5*STEP, STEP)
+
+    assert list(decoded.columns) == ["Time", '{uid="uid1"}']
+    assert list(decoded['{uid="uid1"}']) == [1.0, 3.0]
+    pd.testing.assert_frame_equal(decoded, transform_query_response(result))
+
+def test_transform_empty_result():
+    transformed = transform_query_response([])
+
+    assert list(transformed.columns) == ["Time"]
+    assert len(transformed) == 0
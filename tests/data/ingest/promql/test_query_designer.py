@@ -0,0 +1,88 @@
+import pytest
+from dataclasses import replace
+
+from src.data.ingest.promql.query_designer import QueryData, shard_query, partition_namespaces, join_status_query, aggregate_namespace_query, can_aggregate_namespaces
+
+@pytest.fixture
+def march_query():
+    # 3/1/2025 0:00 - 3/31/2025 23:59:59
+    return QueryData("https://thanos.example.com/api/v1/query_range", "up", 60, "truth", "cpu", 1740816000, 1743490799)
+
+def test_shard_within_budget(march_query):
+    assert shard_query(march_query, None) == [march_query]
+    assert shard_query(march_query, 10**9, 100) == [march_query]
+
+def test_shards_cover_period(march_query):
+    shards = shard_query(march_query, 500000, 100)
+
+    assert len(shards) > 1
+    assert shards[0].start_ts == march_query.start_ts
+    assert shards[-1].end_ts == march_query.end_ts
+
+    # Shards are contiguous and don't overlap
+    for shard, next_shard in zip(shards, shards[1:]):
+        assert shard.end_ts + 1 == next_shard.start_ts
+
+def test_shards_aligned_to_step(march_query):
+    for shard in shard_query(march_query, 500000, 100):
+        assert (shard.start_ts - march_query.start_ts) % march_query.step == 0
+
+def test_shards_within_budget(march_query):
+    for shard in shard_query(march_query, 500000, 100):
+        steps = (shard.end_ts - shard.start_ts) // shard.step + 1
+        assert steps * 100 <= 500000
+
+def test_shards_whole_days(march_query):
+    shards = shard_query(march_query, 500000, 100)
+
+    assert all((shard.end_ts - shard.start_ts + 1) % 86400 == 0 for shard in shards[:-1])
+
+@pytest.fixture
+def namespace_query(march_query):
+    query_string = 'requests{namespace=~"csusb.*|csu.*|(a|b)-.*|sdsu-.*", namespace!~"sdsu-jupyterhub.*"}'
+    return QueryData(march_query.base_url, query_string, 3600, "truth", "cpu", march_query.start_ts, march_query.end_ts)
+
+def test_partition_namespaces(namespace_query):
+    groups = partition_namespaces(namespace_query, 2)
+
+    assert [group.query_string for group in groups] == [
+        'requests{namespace=~"csusb.*|csu.*", namespace!~"sdsu-jupyterhub.*"}',
+        'requests{namespace=~"(a|b)-.*|sdsu-.*", namespace!~"sdsu-jupyterhub.*"}'
+    ]
+
+def test_partition_namespaces_more_groups_than_alternatives(namespace_query):
+    assert len(partition_namespaces(namespace_query, 10)) == 4
+
+def test_partition_namespaces_single_group(namespace_query):
+    assert partition_namespaces(namespace_query, 1) == [namespace_query]
+
+def test_partition_namespaces_no_matcher(march_query):
+    assert partition_namespaces(march_query, 4) == [march_query]
+
+def test_join_status_query():
+    joined = join_status_query("requests{resource=\"cpu\"}\n", "phase{phase=~\"Running|Pending\"}\n")
+
+    assert joined == '(requests{resource="cpu"}) and on(uid) (max by(uid) (phase{phase=~"Running|Pending"}) > 0)'
+
+def test_partition_joined_query(namespace_query):
+    joined = replace(namespace_query, query_string=join_status_query('requests{namespace=~"a.*|b.*"}', 'phase{namespace=~"a.*|b.*"}'))
+    groups = partition_namespaces(joined, 2)
+
+    assert [group.query_string for group in groups] == [
+        '(requests{namespace=~"a.*"}) and on(uid) (max by(uid) (phase{namespace=~"a.*"}) > 0)',
+        '(requests{namespace=~"b.*"}) and on(uid) (max by(uid) (phase{namespace=~"b.*"}) > 0)'
+    ]
+
+def test_partition_mismatched_matchers(namespace_query):
+    joined = replace(namespace_query, query_string=join_status_query('requests{namespace=~"a.*|b.*"}', 'phase{namespace=~"a.*"}'))
+
+    assert partition_namespaces(joined, 2) == [joined]
+
+def test_aggregate_namespace_query():
+    aggregated = aggregate_namespace_query("(requests) and on(uid) (max by(uid) (phase) > 0)\n")
+
+    assert aggregated == "sum by(namespace, resource) (max by(namespace, resource, uid) ((requests) and on(uid) (max by(uid) (phase) > 0)))"
+
+def test_can_aggregate_namespaces():
+    assert can_aggregate_namespaces(["cpuhours", "cpuhoursavailable", "cpuhourstotal", "utilization"])
+    assert not can_aggregate_namespaces(["cpuhours", "cpujobs"])
@@ -3,24 +3,29 @@ import os
 import json
 import pandas as pd
 
-from src.data.ingest.promql.query_ingest import _filter_cols_zero, _merge_columns_on_uid, _infer_times, _preprocess_df, _apply_status_df, _filter_to_running_pending
-from src.data.ingest.grafana_df_analyzer import convert_to_numeric
+import numpy as np
+
+from src.data.ingest.promql import query_ingest
+from src.data.ingest.promql.query_ingest import _filter_cols_zero, _merge_columns_on_uid, _infer_times, _preprocess_df, _preprocess_df_report, _apply_status_df, _filter_to_running_pending
+from src.data.ingest.grafana_df_analyzer import convert_to_numeric, convert_time_column
 from src.data.data_repository import DataRepository
 from src.data.identifiers.identifier import *
 from src.data.filters import *
 
+START_TS = 1740816000 # 3/1/2025 0:00
+
 # Step 0
 @pytest.fixture
 def status_df(test_files_dir):
     file_name = os.path.join(test_files_dir, "mar25_dualquery", "status.csv")
-    df = convert_to_numeric(pd.read_csv(file_name))
+    df = convert_time_column(convert_to_numeric(pd.read_csv(file_name)))
     return df
 
 # Test step 1
 @pytest.fixture
 def status_df_expected_0filtered(test_files_dir):
     file_name = os.path.join(test_files_dir, "mar25_dualquery", "status_0filtered.csv")
-    df = convert_to_numeric(pd.read_csv(file_name))
+    df = convert_time_column(convert_to_numeric(pd.read_csv(file_name)))
     return df
 
 def test_strip_zero_statuses(status_df, status_df_expected_0filtered):
@@ -32,7 +37,7 @@ def test_strip_zero_statuses(status_df, status_df_expected_0filtered):
 @pytest.fixture
 def status_df_expected_merged(test_files_dir):
     file_name = os.path.join(test_files_dir, "mar25_dualquery", "status_merged.csv")
-    df = convert_to_numeric(pd.read_csv(file_name))
+    df = convert_time_column(convert_to_numeric(pd.read_csv(file_name)))
     return df
 
 def test_merge_columns_on_uid(status_df_expected_0filtered, status_df_expected_merged):
@@ -40,11 +45,30 @@ def test_merge_columns_on_uid(status_df_expected_0filtered, status_df_expected_m
 
     pd.testing.assert_frame_equal(merged, status_df_expected_merged, check_dtype=False)
 
+def test_merge_columns_on_uid_preserve_columns():
+    df = pd.DataFrame({
+        "Time": [START_TS, START_TS + 3600],
+        '{container="b", uid="uid2"}': [1.0, float("nan")],
+        '{container="a", uid="uid1"}': [float("nan"), float("nan")],
+        '{container="a", uid="uid2"}': [0.5, 2.0]
+    })
+    merged = _merge_columns_on_uid(df, True)
+
+    # Columns are ordered by uid and named after the first column of each uid
+    assert list(merged.columns) == ["Time", '{container="a", uid="uid1"}', '{container="b", uid="uid2"}']
+    assert merged.iloc[:, 1].isna().all()
+    assert list(merged.iloc[:, 2]) == [1.0, 2.0]
+
+def test_merge_columns_on_uid_no_columns():
+    df = pd.DataFrame({"Time": [START_TS]})
+
+    assert list(_merge_columns_on_uid(df).columns) == ["Time"]
+
 # Test step 3
 @pytest.fixture
 def status_df_expected_inferred(test_files_dir):
     file_name = os.path.join(test_files_dir, "mar25_dualquery", "status_inferred.csv")
-    df = convert_to_numeric(pd.read_csv(file_name))
+    df = convert_time_column(convert_to_numeric(pd.read_csv(file_name)))
     return df
 
 def test_infer_timestamps(status_df_expected_merged, status_df_expected_inferred):
@@ -54,29 +78,73 @@ def test_infer_timestamps(status_df_expected_merged, status_df_expected_inferred
 
     pd.testing.assert_frame_equal(inferred, status_df_expected_inferred, check_dtype=False)
 
+def test_infer_timestamps_off_step():
+    df = pd.DataFrame({"Time": START_TS + np.array([0, 9000, 10800, 16200]), "uid1": [1.0, 2.0, 3.0, 4.0]})
+    inferred = _infer_times(df, 3600)
+
+    # Inferred rows step from the row before the gap, a gap shorter than two steps is left as is
+    assert inferred["Time"].dtype == np.int64
+    assert list(inferred["Time"] - START_TS) == [0, 3600, 9000, 10800, 16200]
+    assert inferred["uid1"].isna().tolist() == [False, True, False, False, False]
+
+def _preprocess_steps(df, preserve_columns, step):
+    df = _filter_cols_zero(df.copy())
+    df = _merge_columns_on_uid(df, preserve_columns)
+    return _infer_times(df, step)
+
+@pytest.mark.parametrize("preserve_columns", [False, True])
+def test_preprocess_matches_steps(status_df, truth_cpu_in_df, preserve_columns):
+    for df in [status_df, truth_cpu_in_df]:
+        expected = _preprocess_steps(df, preserve_columns, 3600)
+        pd.testing.assert_frame_equal(_preprocess_df(df, preserve_columns, 3600), expected)
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4096])
+def test_preprocess_report(chunk_size):
+    rng = np.random.default_rng(0)
+    times = START_TS + 3600 * np.array([0, 1, 4, 5, 7])
+    columns = [f'{{container="c{i}", uid="uid{i % 7}"}}' for i in range(20)]
+
+    values = rng.integers(0, 3, size=(len(times), len(columns))).astype(np.float64)
+    values[rng.random(values.shape) < 0.3] = np.nan
+    values[:, [2, 9]] = 0 # Zero columns can share a uid with columns that have values
+    values[:, 5] = np.nan
+
+    df = pd.DataFrame(values, columns=columns)
+    df.insert(0, "Time", times)
+
+    preprocessed, report = _preprocess_df_report(df, True, 3600, chunk_size)
+
+    pd.testing.assert_frame_equal(preprocessed, _preprocess_steps(df, True, 3600))
+    assert report.columns == 20
+    dropped = int((np.nansum(values, axis=0) == 0).sum())
+    assert dropped >= 3
+    assert report.dropped_columns == dropped
+    assert report.merged_columns == 20 - dropped - (preprocessed.shape[1] - 1)
+    assert report.inferred_rows == 3
+
 # Application of status
 @pytest.fixture
 def truth_cpu_in_df(test_files_dir):
     file_name = os.path.join(test_files_dir, "mar25_dualquery", "truth_cpu_in.csv")
-    df = convert_to_numeric(pd.read_csv(file_name))
+    df = convert_time_column(convert_to_numeric(pd.read_csv(file_name)))
     return df
 
 @pytest.fixture
 def truth_cpu_out_df(test_files_dir):
     file_name = os.path.join(test_files_dir, "mar25_dualquery", "truth_cpu_out.csv")
-    df = convert_to_numeric(pd.read_csv(file_name))
+    df = convert_time_column(convert_to_numeric(pd.read_csv(file_name)))
     return df
 
 @pytest.fixture
 def truth_gpu_in_df(test_files_dir):
     file_name = os.path.join(test_files_dir, "mar25_dualquery", "truth_gpu_in.csv")
-    df = convert_to_numeric(pd.read_csv(file_name))
+    df = convert_time_column(convert_to_numeric(pd.read_csv(file_name)))
     return df
 
 @pytest.fixture
 def truth_gpu_out_df(test_files_dir):
     file_name = os.path.join(test_files_dir, "mar25_dualquery", "truth_gpu_out.csv")
-    df = convert_to_numeric(pd.read_csv(file_name))
+    df = convert_time_column(convert_to_numeric(pd.read_csv(file_name)))
     return df
 
 def test_apply_status_df(status_df, truth_cpu_in_df, truth_cpu_out_df):
@@ -106,6 +174,28 @@ def test_filter_running_pending(program_data_def_config, status_df, truth_cpu_in
     pd.testing.assert_frame_equal(out_cpu, truth_cpu_out_df)
     pd.testing.assert_frame_equal(out_gpu, truth_gpu_out_df)
 
+@pytest.mark.parametrize("fork", [True, False])
+def test_filter_running_pending_processes(program_data_def_config, monkeypatch, status_df, truth_cpu_in_df, truth_gpu_in_df, fork):
+    data_repo: DataRepository = DataRepository()
+    for month in range(3):
+        data_repo.add(SourceQueryIdentifier(month, month+1, None, "status"), status_df)
+        data_repo.add(SourceQueryIdentifier(month, month+1, "cpu", "truth"), truth_cpu_in_df)
+        data_repo.add(SourceQueryIdentifier(month, month+1, "gpu", "truth"), truth_gpu_in_df)
+
+    serial_repo = _filter_to_running_pending(program_data_def_config, data_repo)
+
+    # Without fork the source frames are sent to the workers through shared memory
+    if(not fork):
+        monkeypatch.setattr(query_ingest.multiprocessing, "get_all_start_methods", lambda: ["spawn"])
+    program_data_def_config.config["ingest"] = {"filter_processes": 2}
+    parallel_repo = _filter_to_running_pending(program_data_def_config, data_repo)
+
+    identifiers = serial_repo.filter_ids(filter_type(SourceIdentifier, strict=True))
+    assert len(identifiers) == 6
+    assert parallel_repo.filter_ids(filter_type(SourceIdentifier, strict=True)) == identifiers
+    for identifier in identifiers:
+        pd.testing.assert_frame_equal(parallel_repo.get_data(identifier), serial_repo.get_data(identifier))
+
 @pytest.fixture
 def truth_cpu_df(test_files_dir):
     file_name = os.path.join(test_files_dir, "mar25_dualquery", "truth_cpu_in.csv")
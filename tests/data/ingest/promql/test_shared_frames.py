@@ -0,0 +1,45 @@
+import pytest
+import os
+import numpy as np
+import pandas as pd
+from multiprocessing.shared_memory import SharedMemory
+
+from src.data.ingest.promql.shared_frames import share_frame, open_frame, take_frame, unlink_frame
+
+@pytest.fixture
+def grafana_df():
+    df = pd.DataFrame({
+        '{uid="a"}': [1.0, np.nan, 3.0],
+        '{uid="b"}': [np.nan, 2.0, 4.0]
+    })
+    df.insert(0, "Time", 1740816000 + np.arange(3) * 3600)
+    return df
+
+def test_take_frame(grafana_df):
+    frame = share_frame(grafana_df)
+    out_df = take_frame(frame)
+
+    pd.testing.assert_frame_equal(out_df, grafana_df)
+
+    # Taking a frame unlinks its block
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=frame.name)
+
+def test_open_frame(grafana_df):
+    frame = share_frame(grafana_df)
+    try:
+        df, shm = open_frame(frame)
+        pd.testing.assert_frame_equal(df, grafana_df)
+
+        # The DataFrame is backed by the block, a second DataFrame from the block sees its writes
+        df.iloc[0, 1] = 10.0
+        del df
+        shm.close()
+
+        assert take_frame(frame).iloc[0, 1] == 10.0
+    finally:
+        unlink_frame(frame)
+
+def test_share_frame_no_columns(grafana_df):
+    empty_df = grafana_df[["Time"]]
+    pd.testing.assert_frame_equal(take_frame(share_frame(empty_df)), empty_df)
@@ -1,7 +1,7 @@
 import pytest
 import pandas as pd
 
-from src.data.ingest.grafana_df_analyzer import get_period, get_resource_type, _extract_column_data
+from src.data.ingest.grafana_df_analyzer import get_period, get_resource_type, _extract_column_data, convert_time_column, format_time_column
 
 def test_extract_column_data_meaningless():
     data = _extract_column_data("{label1=\"value1\", label2=\"value2\"}")
@@ -54,4 +54,16 @@ def test_get_period_gpu(gpu_df):
 
 def test_get_period_empty():
     with pytest.raises(Exception):
-        get_period(pd.DataFrame)
\ No newline at end of file
+        get_period(pd.DataFrame)
+
+def test_convert_time_column(cpu_csv_path):
+    raw_df = pd.read_csv(cpu_csv_path)
+    df = convert_time_column(raw_df.copy())
+
+    assert df["Time"].dtype == "int64"
+    assert df["Time"].iloc[0] == 1704096000 # 1/1/2024 0:00
+
+    # Converting an already converted DataFrame is a no-op, formatting restores the .csv strings
+    assert convert_time_column(df) is df
+    assert list(format_time_column(df)["Time"]) == list(raw_df["Time"])
+    assert df["Time"].dtype == "int64"
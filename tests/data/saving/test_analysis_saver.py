@@ -0,0 +1,29 @@
+import argparse
+
+from src.data.identifiers.identifier import SourceIdentifier, AnalysisIdentifier
+from src.data.saving.analysis_saver import AnalysisSaver
+from src.program_data.program_data import ProgramData
+
+START_TS = 1740816000
+END_TS = 1743490799
+
+def test_text_results_order(default_config, tmp_path):
+    prog_data = ProgramData(argparse.Namespace(analysis_options=["cpuhours"], file=None, period=(0, 1), outdir=str(tmp_path)), default_config)
+    data_repo = prog_data.data_repo
+
+    # Added in another order than the analysis settings, gpu before cpu, like a fused or lazy run
+    for resource_type in ["gpu", "cpu"]:
+        source = SourceIdentifier(START_TS, END_TS, resource_type)
+        data_repo.add(source, None, {"readable_period": "March25"})
+        hours = AnalysisIdentifier(source, f"{resource_type}hours")
+        data_repo.add(AnalysisIdentifier(hours, f"{resource_type}jobstotal"), 2)
+        data_repo.add(AnalysisIdentifier(hours, f"{resource_type}hourstotal"), 1.0)
+
+    AnalysisSaver(prog_data).save()
+
+    with open(tmp_path / "analysis" / "text_results.txt") as file:
+        lines = file.read().splitlines()
+    assert lines == [
+        "For cpu-March25:", "  cpuhourstotal: 1.0", "  cpujobstotal: 2",
+        "For gpu-March25:", "  gpuhourstotal: 1.0", "  gpujobstotal: 2"
+    ]
@@ -0,0 +1,108 @@
+import os
+import copy
+from argparse import Namespace
+
+import pytest
+import pandas as pd
+
+from src.data.checkpoints import get_run_key, save_checkpoint, load_latest_checkpoint
+from src.data.data_repository import DataRepository
+from src.data.identifiers.identifier import SourceIdentifier, AnalysisIdentifier
+from src.program_data.program_data import ProgramData
+
+@pytest.fixture
+def repository(make_grafana_frame):
+    source = SourceIdentifier(1740816000, 1740830399, "cpu")
+    data_repo = DataRepository()
+    data_repo.add(source, make_grafana_frame(), {"period": "March 2025"})
+    return data_repo, source
+
+@pytest.fixture
+def run_key_of(default_config):
+    """ The run key of a run with the test arguments, changed by the keyword arguments. """
+    def run_key_of(config_data=None, **args):
+        args = {"analysis_options": ["cpuhours", "cpuhoursavailable"], "period": (0, 1), "file": None, "config": "./config.yaml", **args}
+        return get_run_key(ProgramData(Namespace(**args), copy.deepcopy(config_data if config_data is not None else default_config)))
+    return run_key_of
+
+@pytest.fixture
+def run_key(run_key_of):
+    return run_key_of()
+
+def test_get_run_key(run_key_of, run_key, default_config):
+    assert run_key_of(analysis_options=["cpuhoursavailable", "cpuhours"]) == run_key
+    assert run_key_of(analysis_options=["cpuhoursavailable"]) != run_key
+    assert run_key_of(config="./other.yaml") != run_key
+
+    # Settings that don't change the data don't change the key
+    config = copy.deepcopy(default_config)
+    config["ingest"] = {"workers": 8}
+    config["cache"] = {"ttl": 60}
+    config["memory"] = {"budget_mb": 1024}
+    config["sharding"] = {"sample_budget": 1000}
+    assert run_key_of(config) == run_key
+    assert run_key_of(workers=8, memory_budget=1024) == run_key
+
+    # Settings that do, from the config or the command line
+    config = copy.deepcopy(default_config)
+    config["step"] = 7200
+    assert run_key_of(config) != run_key
+    config = copy.deepcopy(default_config)
+    config["ingest"] = {"namespace_aggregation": True}
+    assert run_key_of(config) != run_key
+    assert run_key_of(status_filter="server") != run_key
+
+def test_round_trip(tmp_path, repository, run_key):
+    data_repo, source = repository
+    analysis = AnalysisIdentifier(source, "cpuhours")
+    data_repo.add(analysis, (pd.DataFrame({"Namespace": ["ns0"], "Hours": [1.0]}), 12.5))
+
+    save_checkpoint(data_repo, str(tmp_path), "analysis", run_key)
+    stage, restored = load_latest_checkpoint(str(tmp_path), run_key)
+
+    assert stage == "analysis"
+    assert restored.get_ids() == data_repo.get_ids()
+    pd.testing.assert_frame_equal(restored.get_data(source), data_repo.get_data(source))
+    assert restored.get_metadata(source) == {"period": "March 2025"}
+    pd.testing.assert_frame_equal(restored.get_data(analysis)[0], data_repo.get_data(analysis)[0])
+    assert restored.get_data(analysis)[1] == 12.5
+    assert restored.query(AnalysisIdentifier, analysis="cpuhours", source=source) == [analysis]
+
+def test_latest_stage(tmp_path, repository, run_key):
+    data_repo, source = repository
+    save_checkpoint(data_repo, str(tmp_path), "ingest", run_key)
+    save_checkpoint(data_repo, str(tmp_path), "metadata", run_key)
+    assert load_latest_checkpoint(str(tmp_path), run_key)[0] == "metadata"
+
+    # Saving an earlier stage deletes the later checkpoints
+    save_checkpoint(data_repo, str(tmp_path), "ingest", run_key)
+    assert sorted(os.listdir(tmp_path)) == ["ingest"]
+    assert load_latest_checkpoint(str(tmp_path), run_key)[0] == "ingest"
+
+def test_invalid_checkpoints(tmp_path, repository, run_key, default_config):
+    data_repo, source = repository
+    save_checkpoint(data_repo, str(tmp_path), "ingest", run_key)
+    save_checkpoint(data_repo, str(tmp_path), "metadata", run_key)
+
+    # Another run's checkpoints aren't restored
+    other_key = get_run_key(ProgramData(Namespace(analysis_options=["cpuhours"], period=(0, 1), file=None, config="./config.yaml"), default_config))
+    assert load_latest_checkpoint(str(tmp_path), other_key) == (None, None)
+
+    # Incomplete checkpoints fall back to the previous stage
+    os.remove(tmp_path / "metadata" / "0.npy")
+    assert load_latest_checkpoint(str(tmp_path), run_key)[0] == "ingest"
+
+    with open(tmp_path / "ingest" / "manifest.pkl", "wb") as file:
+        file.write(b"garbage")
+    assert load_latest_checkpoint(str(tmp_path), run_key) == (None, None)
+    assert load_latest_checkpoint(str(tmp_path / "missing"), run_key) == (None, None)
+
+def test_changed_config(tmp_path, repository, run_key, run_key_of, default_config):
+    data_repo, source = repository
+    save_checkpoint(data_repo, str(tmp_path), "metadata", run_key)
+
+    # A checkpoint built under other config settings isn't restored
+    changed_config = copy.deepcopy(default_config)
+    changed_config["ingest"] = {"status_filter": "server"}
+    assert load_latest_checkpoint(str(tmp_path), run_key_of(changed_config)) == (None, None)
+    assert load_latest_checkpoint(str(tmp_path), run_key)[0] == "metadata"
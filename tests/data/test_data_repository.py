@@ -1,10 +1,11 @@
 import os
 import pytest
 import sys
+import pandas as pd
 # sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from src.data.identifiers.identifier import *
 from src.data.data_repository import DataRepository
-from src.data.filters import filter_type, filter_source_type, filter_analyses_of
+from src.data.filters import filter_type, filter_source_type, filter_timestamps, filter_analyis_type, filter_analyses_of
 
 class TestDataRepository:
     def setup_method(self, method):
@@ -52,6 +53,47 @@ class TestDataRepository:
     def test_filter_analysis_of(self):
         assert len(self.repo.filter_ids(filter_analyses_of(self.srcid3))) == 1
 
+    def test_get_views(self):
+        df = pd.DataFrame({"Time": [0, 1], "{namespace=\"ns1\", uid=\"uid1\"}": [1.0, 2.0]})
+        srcid = SourceIdentifier(31, 40, "cpu")
+        self.repo.add(srcid, df)
+
+        views = self.repo.get_views(srcid)
+        assert views is self.repo.get_views(srcid)
+        assert list(views.nonzero_uids) == ["uid1"]
+
+        # Views don't outlive their data
+        self.repo.remove(srcid)
+        with pytest.raises(KeyError):
+            self.repo.get_views(srcid)
+
+    def test_get_views_not_dataframe(self):
+        with pytest.raises(ValueError):
+            self.repo.get_views(self.srcid1)
+
+    def test_query(self):
+        assert self.repo.query(SourceIdentifier, resource_type="cpu") == [self.srcid1, self.srcid2]
+        assert self.repo.query(analysis="gpuhours") == [self.aid1]
+        assert self.repo.query(AnalysisIdentifier, source=self.srcid2) == [self.aid2]
+        assert self.repo.query(period=(21, 30)) == [self.srcid3, self.aid1]
+        assert self.repo.query(AnalysisIdentifier, period=(0, 10)) == []
+        assert self.repo.query() == list(self.repo.get_ids())
+
+    def test_query_after_remove(self):
+        self.repo.remove(self.aid1)
+        assert self.repo.query(analysis="gpuhours") == []
+        assert self.repo.query(AnalysisIdentifier) == [self.aid2]
+
+        # Identifiers added again are ordered last
+        self.repo.remove(self.srcid1)
+        self.repo.add(self.srcid1, "test1")
+        assert self.repo.query(SourceIdentifier) == [self.srcid2, self.srcid3, self.srcid1]
+
+    def test_filters_match_scan(self):
+        filters = [filter_type(SourceIdentifier), filter_type(AnalysisIdentifier, True), filter_source_type("gpu"), filter_timestamps(11, 20), filter_analyis_type("cpuhours"), filter_analyses_of(self.srcid3), filter_analyses_of(self.aid1)]
+        for operation in filters:
+            assert self.repo.filter_ids(operation) == [identifier for identifier in self.repo.get_ids() if operation(identifier)]
+
 class TestPromQLDataRepository:
     """
     The point of these tests is to see if we can tell the difference between SourceQueryIdentifiers
@@ -75,4 +117,109 @@ class TestPromQLDataRepository:
         assert len(self.repo.filter_ids(filter_type(SourceIdentifier))) == 3
 
     def test_filter_type_strict(self):
-        assert len(self.repo.filter_ids(filter_type(SourceIdentifier, True))) == 1
\ No newline at end of file
+        assert len(self.repo.filter_ids(filter_type(SourceIdentifier, True))) == 1
+
+    def test_query_strict(self):
+        assert self.repo.query(SourceIdentifier, strict=True) == [self.srcid1]
+        assert self.repo.query(SourceQueryIdentifier, period=(21, 30)) == [self.srcid3]
+
+class TestSpillingDataRepository:
+    @pytest.fixture(autouse=True)
+    def setup_repository(self, make_grafana_frame):
+        self.srcids = [SourceIdentifier(i * 10, i * 10 + 9, "cpu") for i in range(3)]
+        self.aid = AnalysisIdentifier(self.srcids[0], "cpuhours")
+
+        self.repo = DataRepository()
+        for i, srcid in enumerate(self.srcids):
+            self.repo.add(srcid, make_grafana_frame(columns=10, rows=100, fill=i), {"index": i})
+        self.repo.add(self.aid, pd.DataFrame({"Namespace": ["ns0"], "Hours": [1.0]}))
+
+    def test_spills_source_frames_first(self, tmp_path):
+        # Room for about two source frames and the analysis
+        self.repo.set_memory_budget(2 * self.repo.get_size(self.srcids[0]) + self.repo.get_size(self.aid), str(tmp_path))
+
+        assert self.repo.is_spilled(self.srcids[0])
+        assert not self.repo.is_spilled(self.srcids[2])
+        assert not self.repo.is_spilled(self.aid)
+        assert self.repo.get_metadata(self.srcids[0]) == {"index": 0}
+        assert self.repo.get_resident_size() <= 2 * self.repo.get_size(self.srcids[0]) + self.repo.get_size(self.aid)
+
+    def test_reload(self, tmp_path):
+        self.repo.set_memory_budget(self.repo.get_size(self.srcids[0]), str(tmp_path))
+
+        # Loading a spilled frame spills the least recently used frame instead
+        df = self.repo.get_data(self.srcids[0])
+        assert not self.repo.is_spilled(self.srcids[0])
+        assert self.repo.is_spilled(self.srcids[2])
+        assert (df.iloc[:, 1:].to_numpy() == 0.0).all()
+        assert list(self.repo.get_views(self.srcids[0]).nonzero_uids) == []
+
+        self.repo.get_data(self.aid)
+        assert self.repo.is_spilled(self.srcids[0])
+        pd.testing.assert_frame_equal(self.repo.get_data(self.aid), pd.DataFrame({"Namespace": ["ns0"], "Hours": [1.0]}))
+
+    def test_remove_spilled(self, tmp_path):
+        self.repo.set_memory_budget(0, str(tmp_path))
+        assert all(self.repo.is_spilled(srcid) for srcid in self.srcids)
+
+        for srcid in self.srcids:
+            self.repo.remove(srcid)
+        assert self.repo.count() == 1
+        spill_dirs = list(tmp_path.iterdir())
+        assert len(spill_dirs) == 1 and len(list(spill_dirs[0].iterdir())) == 1
+
+class TestLazyDataRepository:
+    def setup_method(self, method):
+        self.srcid = SourceIdentifier(0, 10, "cpu")
+        self.aid = AnalysisIdentifier(self.srcid, "cpuhours")
+        self.totalid = AnalysisIdentifier(self.aid, "cpuhourstotal")
+        self.calls = []
+
+        self.repo = DataRepository()
+        self.repo.add(self.srcid, "test1")
+        self.repo.add_lazy(self.aid, lambda: self.calls.append("cpuhours") or 2.0)
+        self.repo.add_lazy(self.totalid, lambda: self.calls.append("cpuhourstotal") or self.repo.get_data(self.aid) * 3)
+
+    def test_not_evaluated(self):
+        assert self.repo.is_lazy(self.aid)
+        assert self.repo.get_size(self.aid) == 0
+        assert self.repo.query(AnalysisIdentifier, analysis="cpuhourstotal") == [self.totalid]
+        assert self.repo.filter_ids(filter_analyses_of(self.aid)) == [self.totalid]
+
+        self.repo.print_contents()
+        assert self.calls == []
+
+    def test_evaluated_once(self):
+        # Requirements are evaluated when they're read
+        assert self.repo.get_data(self.totalid) == 6.0
+        assert self.calls == ["cpuhourstotal", "cpuhours"]
+        assert not self.repo.is_lazy(self.aid) and not self.repo.is_lazy(self.totalid)
+
+        assert self.repo.get_data(self.totalid) == 6.0
+        assert self.repo.get_data(self.aid) == 2.0
+        assert self.calls == ["cpuhourstotal", "cpuhours"]
+
+    def test_failed_stays_lazy(self):
+        def fail():
+            raise ValueError("analysis failed")
+
+        failing = AnalysisIdentifier(self.srcid, "cpujobs")
+        self.repo.add_lazy(failing, fail)
+        with pytest.raises(ValueError, match="analysis failed"):
+            self.repo.get_data(failing)
+        assert self.repo.is_lazy(failing)
+
+        with pytest.raises(ValueError):
+            self.repo.add_lazy(failing, fail)
+        with pytest.raises(ValueError):
+            self.repo.add_lazy(AnalysisIdentifier(self.srcid, "gpujobs"), None)
+
+    def test_memory_budget(self, tmp_path):
+        self.repo.set_memory_budget(0, str(tmp_path))
+        assert self.repo.is_lazy(self.aid) and not self.repo.is_spilled(self.aid)
+
+        assert self.repo.get_data(self.aid) == 2.0
+        self.repo.get_data(self.srcid)
+        assert self.repo.is_spilled(self.aid)
+        assert self.repo.get_data(self.aid) == 2.0
+        assert self.calls == ["cpuhours"]
@@ -1,8 +1,9 @@
 import os
+import pickle
 import pytest
 import sys
 # sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src.data.identifiers.identifier import Identifier, SourceIdentifier, AnalysisIdentifier, VisIdentifier
+from src.data.identifiers.identifier import Identifier, SourceIdentifier, SourceQueryIdentifier, AnalysisIdentifier, VisIdentifier
 
 def test_equality():
     assert SourceIdentifier(1200, 1500, "cpu") == SourceIdentifier(1200, 1500, "cpu")
@@ -32,4 +33,21 @@ def test_nested_source():
 def test_meta_analysis():
     aid1 = AnalysisIdentifier(None, "analysis1")
 
-    assert aid1.is_meta_analysis()
\ No newline at end of file
+    assert aid1.is_meta_analysis()
+
+def test_compact():
+    aid = AnalysisIdentifier(SourceIdentifier(0, 1, "cpu"), "".join(["cpu", "hours"]))
+
+    assert not hasattr(aid, "__dict__")
+    assert aid.analysis is sys.intern("cpuhours")
+    with pytest.raises(AttributeError):
+        aid.analysis = "gpuhours"
+
+def test_pickle():
+    srcid = SourceQueryIdentifier(0, 1, "cpu", "truth")
+    aid = AnalysisIdentifier(AnalysisIdentifier(srcid, "analysis1"), "analysis2")
+
+    loaded = pickle.loads(pickle.dumps(aid))
+    assert loaded == aid
+    assert hash(loaded) == hash(aid)
+    assert loaded.find_source() == srcid
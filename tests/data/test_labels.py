@@ -0,0 +1,77 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.data.labels import get_label, parse_labels, label_table, LabelTable
+
+def test_get_label():
+    column = "{container=\"chp\", namespace=\"sdsu-rci-jh\", pod_uid=\"not-the-uid\", uid=\"65f8e2f3\"}"
+
+    assert get_label(column, "namespace") == "sdsu-rci-jh"
+    assert get_label(column, "uid") == "65f8e2f3"
+    assert get_label(column, "pod_uid") == "not-the-uid"
+    assert get_label(column, "node") is None
+
+def test_get_label_whitespace():
+    # Custom .csv files have a space after the opening brace
+    assert get_label("{ namespace=\"ns1\", uid=\"uid1\"}", "namespace") == "ns1"
+    assert parse_labels("{ namespace=\"ns1\", uid=\"uid1\"}") == {"namespace": "ns1", "uid": "uid1"}
+
+def test_parse_labels_copy():
+    column = "{namespace=\"ns1\", uid=\"uid1\"}"
+    parse_labels(column)["uid"] = "changed"
+
+    assert parse_labels(column)["uid"] == "uid1"
+
+@pytest.fixture
+def labeled_df():
+    return pd.DataFrame(columns=[
+        "Time",
+        "{namespace=\"ns1\", node=\"node-a\", uid=\"uid1\"}",
+        "{namespace=\"ns2\", uid=\"uid2\"}",
+        "{namespace=\"ns1\", node=\"node-b\", uid=\"uid3\"}"
+    ])
+
+def test_label_table(labeled_df):
+    table = label_table(labeled_df)
+
+    assert list(table.values("namespace")) == [None, "ns1", "ns2", "ns1"]
+
+    codes, categories = table.codes("namespace")
+    assert list(codes) == [-1, 0, 1, 0]
+    assert list(categories) == ["ns1", "ns2"]
+
+    categorical = table.categorical("node")
+    assert list(categorical.categories) == ["node-a", "node-b"]
+    assert categorical.isna().tolist() == [True, False, True, False]
+
+def test_label_table_require(labeled_df):
+    table = label_table(labeled_df)
+
+    assert list(table.require("uid", np.arange(1, 4))) == ["uid1", "uid2", "uid3"]
+    with pytest.raises(Exception):
+        table.require("node", np.arange(1, 4))
+    with pytest.raises(Exception):
+        table.require("uid") # The Time column doesn't have a uid
+
+def test_label_table_cached(labeled_df):
+    table = label_table(labeled_df)
+
+    assert label_table(labeled_df.columns) is table
+    assert label_table(labeled_df.iloc[:, 1:]) is not table
+
+def test_label_table_to_dataframe(labeled_df):
+    table_df = label_table(labeled_df).to_dataframe()
+
+    assert list(table_df.columns) == ["namespace", "node", "uid"]
+    assert isinstance(table_df["namespace"].dtype, pd.CategoricalDtype)
+    assert table_df["uid"].tolist()[1:] == ["uid1", "uid2", "uid3"]
+
+def test_label_table_sequence():
+    table = label_table(["{uid=\"uid1\"}"])
+
+    assert isinstance(table, LabelTable)
+    assert list(table.values("uid")) == ["uid1"]
+
+def test_get_label_spaced_equals():
+    assert get_label("{namespace = \"ns1\", uid=\"uid1\"}", "namespace") == "ns1"
@@ -0,0 +1,81 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.data.source_views import SourceViews, _nansum_columns
+
+@pytest.fixture
+def source_df():
+    df = pd.DataFrame({
+        "{namespace=\"ns1\", uid=\"uid1\"}": [1.0, np.nan, 2.0],
+        "{namespace=\"ns1\", uid=\"uid2\"}": [np.nan, np.nan, np.nan],
+        "{namespace=\"ns2\", uid=\"uid3\"}": [0.0, 4.0, np.nan],
+    })
+    df.insert(0, "Time", 1740816000 + np.arange(3) * 3600)
+    return df
+
+def test_values(source_df):
+    views = SourceViews(source_df)
+
+    assert list(views.value_positions) == [1, 2, 3]
+    np.testing.assert_array_equal(views.values, source_df.iloc[:, 1:].to_numpy(dtype=np.float64))
+    assert not views.values.flags.writeable
+
+def test_sums(source_df):
+    views = SourceViews(source_df)
+
+    assert list(views.column_sums) == [3.0, 0.0, 4.0]
+    assert list(views.nonzero) == [True, False, True]
+    assert list(views.nonzero_uids) == ["uid1", "uid3"]
+
+def test_labels(source_df):
+    views = SourceViews(source_df)
+
+    assert list(views.uids) == ["uid1", "uid2", "uid3"]
+    assert list(views.label_values("namespace")) == ["ns1", "ns1", "ns2"]
+    assert views.label_values("node").tolist() == [None, None, None]
+
+def test_uid_codes():
+    df = pd.DataFrame({
+        "Time": [1740816000],
+        "{uid=\"uid2\"}": [1.0],
+        "{uid=\"uid1\"}": [0.0],
+        "{uid=\"uid2\", container=\"b\"}": [2.0],
+        "{uid=\"uid3\"}": [3.0]
+    })
+    views = SourceViews(df)
+    codes, categories = views.uid_codes
+
+    assert list(categories[codes]) == ["uid2", "uid1", "uid2", "uid3"]
+    assert list(views.first_uid_columns) == [True, True, False, True]
+    assert list(views.nonzero_uids) == ["uid2", "uid3"]
+
+def test_no_time_column(source_df):
+    views = SourceViews(source_df.iloc[:, 1:])
+
+    assert list(views.value_positions) == [0, 1, 2]
+    assert list(views.uids) == ["uid1", "uid2", "uid3"]
+
+def test_missing_uid():
+    views = SourceViews(pd.DataFrame({"Time": [0], "{namespace=\"ns1\"}": [1.0]}))
+
+    with pytest.raises(Exception):
+        views.uids
+
+def test_views_memoized(source_df):
+    views = SourceViews(source_df)
+
+    assert views.values is views.values
+    assert views.column_sums is views.column_sums
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+def test_nansum_columns(chunk_size):
+    rng = np.random.default_rng(0)
+    values = np.asfortranarray(rng.random((10, 7)))
+    values[rng.random(values.shape) < 0.4] = np.nan
+    values[:, 2] = np.nan
+    values[3, 4] = -5.0
+
+    np.testing.assert_array_equal(_nansum_columns(values, chunk_size), np.nansum(values, axis=0))
+    assert len(_nansum_columns(values[:0], chunk_size)) == 7
+    assert len(_nansum_columns(values[:, :0], chunk_size)) == 0
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from src.data.spill import SpilledData, sizeof, is_grafana_frame, spill, load, delete
+
+def test_sizeof(make_grafana_frame):
+    df = make_grafana_frame()
+    assert sizeof(df) >= df.memory_usage(index=True).sum()
+
+    result_df = pd.DataFrame({"Namespace": ["ns1", "ns2"], "Hours": [1.0, 2.0]})
+    assert sizeof(result_df) >= result_df.memory_usage(index=True, deep=True).sum()
+    assert sizeof((df, result_df)) > sizeof(df) + sizeof(result_df)
+
+def test_spill_frame(tmp_path, make_grafana_frame):
+    df = make_grafana_frame()
+    assert is_grafana_frame(df)
+
+    spilled = spill(df, str(tmp_path / "frame"))
+    assert spilled.kind == "frame"
+    assert spilled.size >= sizeof(df.iloc[:, 1:].to_numpy())
+
+    loaded = load(spilled)
+    pd.testing.assert_frame_equal(loaded, df)
+
+    # Values are memory-mapped copy-on-write, writes don't reach the file
+    loaded.iloc[0, 1] = -1.0
+    pd.testing.assert_frame_equal(load(spilled), df)
+
+    delete(spilled)
+    assert not any(path.exists() for path in tmp_path.iterdir())
+
+def test_spill_pickle(tmp_path):
+    result = (pd.DataFrame({"Namespace": ["ns1"], "Hours": [1.0]}), 12.5)
+    assert not is_grafana_frame(result[0])
+
+    spilled = spill(result, str(tmp_path / "result"))
+    assert spilled.kind == "pickle"
+
+    loaded = load(spilled)
+    pd.testing.assert_frame_equal(loaded[0], result[0])
+    assert loaded[1] == 12.5
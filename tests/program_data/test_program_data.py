@@ -0,0 +1,39 @@
+import pytest
+import argparse
+
+from src.program_data.program_data import ProgramData
+from src.program_data.arguments import load_arguments
+
+@pytest.fixture
+def prog_data(default_config):
+    default_config["ingest"] = {"workers": 4}
+    return ProgramData(argparse.Namespace(analysis_options=["cpuhours"], file=None, period=(0, 1)), default_config)
+
+def test_get_option_config(prog_data):
+    assert prog_data.get_option("ingest.workers", "workers", 1) == 4
+
+def test_get_option_default(prog_data):
+    assert prog_data.get_option("ingest.missing", "missing", 1) == 1
+
+def test_get_option_argument_priority(prog_data):
+    prog_data.args.workers = 8
+    assert prog_data.get_option("ingest.workers", "workers", 1) == 8
+
+def test_cache_refresh(monkeypatch):
+    monkeypatch.setattr("sys.argv", ["main.py", "cpuhours", "-p", "2024", "--cache", "--refresh"])
+    args = load_arguments()
+    assert args.cache is True and args.refresh is True
+
+def test_no_cache_refresh(default_config):
+    with pytest.raises(SystemExit):
+        ProgramData(argparse.Namespace(analysis_options=["cpuhours"], file=None, period=(0, 1), cache=False, refresh=True), default_config)
+
+@pytest.mark.parametrize("memory_budget", [0, -5])
+def test_invalid_memory_budget_argument(default_config, memory_budget):
+    with pytest.raises(SystemExit):
+        ProgramData(argparse.Namespace(analysis_options=["cpuhours"], file=None, period=(0, 1), memory_budget=memory_budget), default_config)
+
+def test_invalid_memory_budget_config(default_config):
+    default_config["memory"] = {"budget_mb": -5}
+    with pytest.raises(SystemExit):
+        ProgramData(argparse.Namespace(analysis_options=["cpuhours"], file=None, period=(0, 1)), default_config)